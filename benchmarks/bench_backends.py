@@ -0,0 +1,72 @@
+"""einsum compared with feinsum and the raw backend einsum, for each installed backend on CPU."""
+import importlib
+import timeit
+
+import numpy as np
+import named_einsum
+
+CASES = {
+    'matvec': ('A[i, j], x[j] -> y[i]', [(3, 3), (3,)]),
+    'khatri_rao': ('A[i, l], B[j, l] -> KRP[i * j, l]', [(64, 16), (64, 16)]),
+    'batched': ('A[batch, i, k], B[batch, k, j] -> C[batch, i, j]',
+                [(128, 16, 16), (128, 16, 16)]),
+}
+
+
+def _numpy():
+    return np.asarray, np.einsum, lambda x: x
+
+
+def _torch():
+    torch = importlib.import_module('torch')
+    return torch.from_numpy, torch.einsum, lambda x: x
+
+
+def _jax():
+    jnp = importlib.import_module('jax.numpy')
+    return jnp.asarray, jnp.einsum, lambda x: x.block_until_ready()
+
+
+BACKENDS = {'numpy': _numpy, 'torch': _torch, 'jax': _jax}
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=2000):
+    """Time every case on every installed backend, returning seconds per call."""
+    results = {}
+    for backend, load in BACKENDS.items():
+        try:
+            convert, raw_einsum, sync = load()
+        except ImportError:
+            continue
+        for name, (subscripts, shapes) in CASES.items():
+            arrays = [convert(np.random.rand(*shape)) for shape in shapes]
+            compiled = named_einsum.translate(subscripts)
+            # Outputs with product axes are reshaped by einsum, so feinsum and the raw einsum
+            # are given the expanded operands that they expect
+            expanded = named_einsum.shape_check(named_einsum.parse(subscripts), arrays)
+            named_einsum.einsum(subscripts, *arrays)
+
+            results[f'{backend}.{name}'] = {
+                'raw': _time(lambda: sync(raw_einsum(compiled, *expanded)), number),
+                'feinsum': _time(
+                    lambda: sync(named_einsum.feinsum(subscripts, *expanded)), number
+                ),
+                'einsum': _time(lambda: sync(named_einsum.einsum(subscripts, *arrays)), number),
+            }
+    return results
+
+
+def main():
+    """Print a table of per-call times and the overhead of einsum over the raw backend."""
+    print(f'{"case":<20}{"raw":>12}{"feinsum":>12}{"einsum":>12}{"overhead":>12}')
+    for name, times in run().items():
+        print(f'{name:<20}' + ''.join(f'{t * 1e6:>10.2f}us' for t in times.values()) +
+              f'{(times["einsum"] - times["raw"]) * 1e6:>+10.2f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Matrix products dispatched to matmul compared with a single einsum call, on numpy."""
+import timeit
+
+import numpy as np
+import named_einsum
+import named_einsum.blas
+
+CASES = {
+    'matmul_16': ('A[i, k], B[k, j] -> C[i, j]', [(16, 16), (16, 16)]),
+    'matmul_128': ('A[i, k], B[k, j] -> C[i, j]', [(128, 128), (128, 128)]),
+    'batched': ('A[batch, i, k], B[batch, k, j] -> C[batch, i, j]',
+                [(64, 32, 32), (64, 32, 32)]),
+    'transposed': ('A[k, i], B[j, k] -> C[j, i]', [(128, 96), (64, 128)]),
+    'outer': ('x[i], y[j] -> A[i * j]', [(512,), (512,)]),
+    'tensordot': ('A[i, k, l], B[l, k, j] -> C[i, j]', [(64, 16, 16), (16, 16, 64)]),
+}
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=200):
+    """Time every case with and without matmul dispatch, returning seconds per call."""
+    results = {}
+    backends = set(named_einsum.blas.BACKENDS)
+    try:
+        for name, (subscripts, shapes) in CASES.items():
+            arrays = [np.random.rand(*shape) for shape in shapes]
+            expression = named_einsum.prepare(subscripts)
+            expanded = named_einsum.shape_check(expression.parsed, arrays)
+
+            named_einsum.blas.BACKENDS.clear()
+            named_einsum.blas.BACKENDS.update(backends)
+            matmul = _time(lambda: expression(*arrays), number)
+            named_einsum.blas.BACKENDS.clear()
+            results[name] = {
+                'raw': _time(lambda: np.einsum(expression.compiled, *expanded), number),
+                'einsum': _time(lambda: expression(*arrays), number),
+                'matmul': matmul,
+            }
+    finally:
+        named_einsum.blas.BACKENDS.update(backends)
+    return results
+
+
+def main():
+    """Print a table of per-call times and the speedup of matmul dispatch over einsum."""
+    print(f'{"case":<16}{"raw":>12}{"einsum":>12}{"matmul":>12}{"speedup":>10}')
+    for name, times in run().items():
+        print(f'{name:<16}' + ''.join(f'{t * 1e6:>10.2f}us' for t in times.values()) +
+              f'{times["einsum"] / times["matmul"]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
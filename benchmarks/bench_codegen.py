@@ -0,0 +1,57 @@
+"""Batches of tiny contractions through einsum and through generated kernels, on numpy."""
+import importlib
+import timeit
+
+import numpy as np
+import named_einsum
+
+# Each case has the subscripts of one entry, their shapes, and the subscripts of a whole batch
+CASES = {
+    'matmul_3x3': ('A[i, k], B[k, j] -> C[i, j]', [(3, 3), (3, 3)],
+                   'A[n, i, k], B[n, k, j] -> C[n, i, j]'),
+    'mass_4x4': ('phi_i[a, q], phi_j[b, q], weight[q], det[q] -> mass[a, b]',
+                 [(4, 4), (4, 4), (4,), (4,)],
+                 'phi_i[n, a, q], phi_j[n, b, q], weight[n, q], det[n, q] -> mass[n, a, b]'),
+}
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=20, batch_sizes=(64, 10000)):
+    """Time every case with einsum and each kernel method, returning seconds per call."""
+    methods = ['numpy']
+    try:
+        importlib.import_module('numba')
+        methods.append('numba')
+    except ImportError:
+        pass
+
+    results = {}
+    for num_batch in batch_sizes:
+        # Small batches measure the per-call overhead, and large ones the arithmetic
+        results[f'batch={num_batch}'] = batch_results = {}
+        for name, (subscripts, shapes, batched) in CASES.items():
+            arrays = [np.random.rand(num_batch, *shape) for shape in shapes]
+            batch_results[name] = {
+                'einsum': _time(lambda: named_einsum.einsum(batched, *arrays), number)
+            }
+            for method in methods:
+                kernel = named_einsum.kernel(subscripts, shapes, method)
+                kernel(*arrays)
+                batch_results[name][method] = _time(lambda: kernel(*arrays), number)
+    return results
+
+
+def main():
+    """Print a table of per-call times of einsum and the numpy and numba kernels."""
+    print(f'{"case":<14}{"batch":>8}{"einsum":>12}{"numpy":>12}{"numba":>12}')
+    for batch, batch_results in run().items():
+        for name, times in batch_results.items():
+            print(f'{name:<14}{batch[len("batch="):]:>8}' +
+                  ''.join(f'{t * 1e6:>10.2f}us' for t in times.values()))
+
+
+if __name__ == '__main__':
+    main()
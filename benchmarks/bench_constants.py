@@ -0,0 +1,36 @@
+"""The README mass matrix with and without memoised constant operands, on numpy."""
+import timeit
+
+import named_einsum
+from mass_matrix import MASS, operands as mass_operands
+
+CONSTANTS = ('phi_ix', 'phi_iy', 'phi_jx', 'phi_jy', 'weight_x', 'weight_y')
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=20, num_elements=256, num_basis=4, num_quadrature=5):
+    """Time the mass matrix with and without constants, returning seconds per call."""
+    operands = mass_operands(num_elements, num_basis, num_quadrature)
+    return {
+        'mass': {
+            'single_call': _time(lambda: named_einsum.einsum(MASS, *operands), number),
+            'greedy': _time(lambda: named_einsum.einsum(MASS, *operands, optimize=True), number),
+            'constants': _time(
+                lambda: named_einsum.einsum(MASS, *operands, constants=CONSTANTS), number
+            ),
+        }
+    }
+
+
+def main():
+    """Print a table of per-call times."""
+    print(f'{"case":<12}{"single_call":>14}{"greedy":>14}{"constants":>14}')
+    for name, times in run().items():
+        print(f'{name:<12}' + ''.join(f'{t * 1e6:>12.2f}us' for t in times.values()))
+
+
+if __name__ == '__main__':
+    main()
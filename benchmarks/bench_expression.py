@@ -0,0 +1,46 @@
+"""Per-call overhead of prepared expressions compared with einsum and feinsum."""
+import timeit
+
+import numpy as np
+import named_einsum
+from mass_matrix import MASS
+
+
+CASES = {
+    'matvec': ('A[i, j], x[j] -> y[i]', [(3, 3), (3,)]),
+    'khatri_rao': ('A[i, l], B[j, l] -> KRP[i * j, l]', [(3, 2), (3, 2)]),
+    'mass': (MASS, [(2, 2)] * 4 + [(2,)] * 2 + [(1, 2, 2)]),
+}
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=20000):
+    """Run all cases, returning a dict of per-call times in seconds."""
+    results = {}
+    for name, (subscripts, shapes) in CASES.items():
+        arrays = [np.random.rand(*shape) for shape in shapes]
+        compiled = named_einsum.translate(subscripts)
+        expr = named_einsum.prepare(subscripts)
+
+        results[name] = {
+            'numpy': _time(lambda: np.einsum(compiled, *arrays), number),
+            'feinsum': _time(lambda: named_einsum.feinsum(subscripts, *arrays), number),
+            'einsum': _time(lambda: named_einsum.einsum(subscripts, *arrays), number),
+            'expression': _time(lambda: expr(*arrays), number),
+        }
+    return results
+
+
+def main():
+    """Print a table of per-call times."""
+    results = run()
+    print(f'{"case":<12}' + ''.join(f'{key:>14}' for key in next(iter(results.values()))))
+    for name, times in results.items():
+        print(f'{name:<12}' + ''.join(f'{t * 1e6:>12.2f}us' for t in times.values()))
+
+
+if __name__ == '__main__':
+    main()
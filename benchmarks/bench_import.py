@@ -0,0 +1,48 @@
+"""Startup time of the package, measured in fresh interpreters."""
+import subprocess
+import sys
+import timeit
+
+STATEMENTS = {
+    'python': 'pass',
+    'import': 'import named_einsum',
+    'import_translate': 'import named_einsum; named_einsum.translate("A[i, j], x[j] -> y[i]")',
+    'import_einsum': ('import numpy as np, named_einsum; '
+                      'named_einsum.einsum("A[i, j], x[j] -> y[i]", np.ones((2, 2)), np.ones(2))'),
+}
+
+# Modules that a plain import of the package must not pull in
+LAZY_MODULES = ['autoray', 'numpy', 'named_einsum.lark_parser', 'named_einsum.expression']
+
+
+def _time(statement, number):
+    return min(timeit.repeat(
+        lambda: subprocess.run([sys.executable, '-c', statement], check=True),
+        number=1, repeat=number
+    ))
+
+
+def imported_lazy_modules():
+    """Returns the lazily imported modules that are loaded by ``import named_einsum``."""
+    output = subprocess.run(
+        [sys.executable, '-c', 'import sys, named_einsum; print(" ".join(sys.modules))'],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return [module for module in LAZY_MODULES if module in output]
+
+
+def run(number=10):
+    """Time each statement in a new interpreter, returning the best time in seconds."""
+    return {name: _time(statement, number) for name, statement in STATEMENTS.items()}
+
+
+def main():
+    """Print startup times, relative to starting the interpreter alone."""
+    results = run()
+    for name, t in results.items():
+        print(f'{name:<18}{t * 1e3:>10.1f}ms {(t - results["python"]) * 1e3:>+10.1f}ms')
+    print('eagerly imported:', ', '.join(imported_lazy_modules()) or 'none')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""einsum compared with jit and the raw backend einsum, for jax and torch on CPU."""
+import importlib
+import timeit
+
+import numpy as np
+import named_einsum
+
+CASES = {
+    'matmul': ('A[i, k], B[k, j] -> C[i, j]', [(8, 8), (8, 8)]),
+    'khatri_rao': ('A[i, l], B[j, l] -> KRP[i * j, l]', [(64, 16), (64, 16)]),
+    'chain': ('A[i, j], B[j, k], C[k, l] -> D[i, l]', [(16, 16), (16, 16), (16, 16)]),
+}
+
+
+def _jax():
+    jax, jnp = importlib.import_module('jax'), importlib.import_module('jax.numpy')
+    return jnp.asarray, jnp.einsum, lambda x: x.block_until_ready(), jax.jit
+
+
+def _torch():
+    torch = importlib.import_module('torch')
+    return torch.from_numpy, torch.einsum, lambda x: x, lambda f: f
+
+
+BACKENDS = {'jax': _jax, 'torch': _torch}
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=500):
+    """Time every case on every installed backend, returning seconds per call."""
+    results = {}
+    for backend, load in BACKENDS.items():
+        try:
+            convert, raw_einsum, sync, compile_raw = load()
+        except ImportError:
+            continue
+        for name, (subscripts, shapes) in CASES.items():
+            arrays = [convert(np.random.rand(*shape)) for shape in shapes]
+            expanded = named_einsum.shape_check(named_einsum.parse(subscripts), arrays)
+            compiled = named_einsum.translate(subscripts)
+            raw = compile_raw(lambda *operands: raw_einsum(compiled, *operands))
+            jitted = named_einsum.jit(subscripts)
+            sync(jitted(*arrays))
+            sync(raw(*expanded))
+
+            results[f'{backend}.{name}'] = {
+                'raw': _time(lambda: sync(raw(*expanded)), number),
+                'einsum': _time(lambda: sync(named_einsum.einsum(subscripts, *arrays)), number),
+                'jit': _time(lambda: sync(jitted(*arrays)), number),
+            }
+    return results
+
+
+def main():
+    """Print a table of per-call times of the (compiled, for jax) raw einsum, einsum and jit."""
+    print(f'{"case":<20}{"raw":>12}{"einsum":>12}{"jit":>12}')
+    for name, times in run().items():
+        print(f'{name:<20}' + ''.join(f'{t * 1e6:>10.2f}us' for t in times.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""Scaling of multithreaded execution with the number of workers."""
+import os
+import timeit
+
+import named_einsum
+from mass_matrix import MASS_1D, operands_1d
+
+
+def run(num_elements=20000, num_basis=8, num_quadrature=16, number=3):
+    """Time the mass matrix for increasing worker counts, in seconds per call."""
+    operands = operands_1d(num_elements, num_basis, num_quadrature)
+
+    results = {'serial': min(timeit.repeat(
+        lambda: named_einsum.einsum(MASS_1D, *operands), number=number, repeat=3
+    )) / number}
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        results[f'workers={workers}'] = min(timeit.repeat(
+            lambda: named_einsum.einsum(MASS_1D, *operands, workers=workers),
+            number=number, repeat=3
+        )) / number
+        workers *= 2
+    return results
+
+
+def main():
+    """Print per-call times and speedup over serial execution."""
+    results = run()
+    for name, t in results.items():
+        print(f'{name:<12}{t * 1e3:>10.2f}ms {results["serial"] / t:>6.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Parse throughput of the shared parser compared with building a parser per call."""
+import timeit
+
+import named_einsum.parser
+from named_einsum.lark_parser import Lark_StandAlone
+
+EXPRESSIONS = {
+    'small': 'A[i, j], x[j] -> y[i]',
+    'mass': '''
+      phi_ix[basis_ix, quadrature_x],
+      phi_iy[basis_iy, quadrature_y],
+      phi_jx[basis_jx, quadrature_x],
+      phi_jy[basis_jy, quadrature_y],
+      weight_x[quadrature_x],
+      weight_y[quadrature_y],
+      jacobian_det[element, quadrature_x, quadrature_y]
+      ->
+      mass[element, basis_ix, basis_iy, basis_jx, basis_jy]
+    ''',
+}
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=500):
+    """Run all expressions, returning a dict of per-parse times in seconds."""
+    results = {}
+    for name, expression in EXPRESSIONS.items():
+        results[name] = {
+            'new_parser': _time(lambda: Lark_StandAlone().parse(expression), number),
+            'shared_parser': _time(lambda: named_einsum.parser.parse(expression), number),
+        }
+    return results
+
+
+def main():
+    """Print a table of per-parse times and throughput."""
+    for name, times in run().items():
+        for key, t in times.items():
+            print(f'{name:<8}{key:<16}{t * 1e6:>10.1f}us {1 / t:>10.0f} parses/s')
+
+
+if __name__ == '__main__':
+    main()
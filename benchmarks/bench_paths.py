@@ -0,0 +1,28 @@
+"""Single-call contraction compared with optimized pairwise contraction paths."""
+import timeit
+
+import named_einsum
+from mass_matrix import MASS, operands as mass_operands
+
+
+def run(num_elements=64, num_basis=4, num_quadrature=5, number=3):
+    """Time the mass matrix with each optimization strategy, in seconds per call."""
+    operands = mass_operands(num_elements, num_basis, num_quadrature)
+
+    results = {}
+    for optimize in [False, 'greedy', 'optimal']:
+        results[str(optimize)] = min(timeit.repeat(
+            lambda: named_einsum.einsum(MASS, *operands, optimize=optimize),
+            number=number, repeat=3
+        )) / number
+    return results
+
+
+def main():
+    """Print per-call times for each strategy."""
+    for optimize, t in run().items():
+        print(f'{optimize:<10}{t * 1e3:>10.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
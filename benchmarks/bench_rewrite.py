@@ -0,0 +1,42 @@
+"""Contractions with and without the rewrite pass, on numpy."""
+import timeit
+
+import numpy as np
+import named_einsum
+
+CASES = {
+    'pre_reduce': ('A[i, j], B[j, k] -> C[i]', [(200, 200), (200, 200)]),
+    'pre_reduce_chain': ('A[i, j, m], B[j, k], C[k, l] -> D[i, l]',
+                         [(30, 30, 30), (30, 30), (30, 30)]),
+    'scalar': ('alpha, A[i, j], B[j, k] -> C[i, k]', [(), (20, 20), (20, 20)]),
+    'size_1': ('A[i, j, u], B[j, k, v] -> C[i, k]', [(60, 60, 1), (60, 60, 1)]),
+}
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=100):
+    """Time every case with and without rewriting, returning seconds per call."""
+    results = {}
+    for name, (subscripts, shapes) in CASES.items():
+        arrays = [np.asarray(np.random.rand(*shape)) for shape in shapes]
+        expression = named_einsum.prepare(subscripts)
+        results[name] = {
+            'literal': _time(lambda: expression(*arrays, rewrite=False), number),
+            'rewritten': _time(lambda: expression(*arrays), number),
+        }
+    return results
+
+
+def main():
+    """Print a table of per-call times and the speedup of rewriting."""
+    print(f'{"case":<20}{"literal":>12}{"rewritten":>12}{"speedup":>10}')
+    for name, times in run().items():
+        print(f'{name:<20}' + ''.join(f'{t * 1e6:>10.2f}us' for t in times.values()) +
+              f'{times["literal"] / times["rewritten"]:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Overhead of shape checking as the number of operands and axes grows."""
+import timeit
+
+import numpy as np
+import named_einsum
+
+
+def chain(num_operands, axes_per_operand):
+    """Returns a chain expression and its operand shapes, ending with a product-axis operand."""
+    variables = []
+    shapes = []
+    for k in range(num_operands - 1):
+        axes = [f'link{k}', f'link{k + 1}'] + [f'a{k}_{m}' for m in range(axes_per_operand)]
+        variables.append(f'T{k}[{", ".join(axes)}]')
+        shapes.append((2,) * len(axes))
+    variables.append(f'P[link0 * link{num_operands - 1}]')
+    shapes.append((4,))
+    return ', '.join(variables) + ' ->', shapes
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(operands=(2, 4, 8, 16), axes=(0, 1, 2), number=2000):
+    """Time shape_check and Expression.plan for each size, returning seconds per call."""
+    results = {}
+    for num_operands in operands:
+        for axes_per_operand in axes:
+            subscripts, shapes = chain(num_operands, axes_per_operand)
+            parsed = named_einsum.parse(subscripts)
+            expression = named_einsum.prepare(subscripts)
+            variables = [np.empty(shape) for shape in shapes]
+            results[f'{num_operands}x{axes_per_operand}'] = {
+                'shape_check': _time(lambda: named_einsum.shape_check(parsed, variables),
+                                     number),
+                'plan': _time(lambda: expression.plan(shapes), number),
+            }
+    return results
+
+
+def main():
+    """Print a table of shape check times by operands x axes per operand."""
+    for name, times in run().items():
+        print(f'{name:<8}' + ''.join(f'{key:>14}{t * 1e6:>10.2f}us' for key, t in times.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""A sparse chain of matrix products with sparse and with dense operands, on numpy."""
+import importlib
+import timeit
+
+import numpy as np
+import named_einsum
+
+CHAIN = 'A[i, j], B[j, k], x[k, m] -> y[i, m]'
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=10, size=2000, density=0.001, num_columns=8):
+    """Time the chain with sparse and densified operands, returning seconds per call."""
+    try:
+        scipy_sparse = importlib.import_module('scipy.sparse')
+        importlib.import_module('sparse')
+    except ImportError:
+        return {}
+    A = scipy_sparse.random(size, size, density=density, format='csr', random_state=0)
+    B = scipy_sparse.random(size, size, density=density, format='csr', random_state=1)
+    x = np.random.rand(size, num_columns)
+    dense = (A.toarray(), B.toarray(), x)
+    return {
+        'chain': {
+            'dense': _time(lambda: named_einsum.einsum(CHAIN, *dense, optimize=True), number),
+            'sparse': _time(lambda: named_einsum.einsum(CHAIN, A, B, x, optimize=True), number),
+        }
+    }
+
+
+def main():
+    """Print a table of per-call times."""
+    print(f'{"case":<12}{"dense":>14}{"sparse":>14}')
+    for name, times in run().items():
+        print(f'{name:<12}' + ''.join(f'{t * 1e3:>12.2f}ms' for t in times.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Latency of translating expressions that are already cached."""
+import timeit
+
+import named_einsum
+from bench_parser import EXPRESSIONS
+
+
+def _time(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def run(number=100000):
+    """Time cache hits of translate and prepare, returning a dict of seconds per call."""
+    results = {}
+    for name, expression in EXPRESSIONS.items():
+        named_einsum.translate(expression)
+        named_einsum.prepare(expression)
+        results[name] = {
+            'translate': _time(lambda: named_einsum.translate(expression), number),
+            'translate_parsed': _time(lambda: named_einsum.translate(expression, True), number),
+            'prepare': _time(lambda: named_einsum.prepare(expression), number),
+        }
+    return results
+
+
+def main():
+    """Print a table of per-call cache hit latencies."""
+    for name, times in run().items():
+        for key, t in times.items():
+            print(f'{name:<8}{key:<18}{t * 1e9:>10.0f}ns')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""The README mass matrix expressions and their operands, shared by the benchmarks."""
+import numpy as np
+
+# Element mass matrices of a 2D tensor-product discretisation, as in the README
+MASS = '''
+  phi_ix[basis_ix, quadrature_x],
+  phi_iy[basis_iy, quadrature_y],
+  phi_jx[basis_jx, quadrature_x],
+  phi_jy[basis_jy, quadrature_y],
+  weight_x[quadrature_x],
+  weight_y[quadrature_y],
+  jacobian_det[element, quadrature_x, quadrature_y]
+  ->
+  mass[element, basis_ix, basis_iy, basis_jx, basis_jy]
+'''
+
+# The same along a single direction
+MASS_1D = '''
+  phi_i[basis_i, quadrature],
+  phi_j[basis_j, quadrature],
+  weight[quadrature],
+  jacobian_det[element, quadrature]
+  ->
+  mass[element, basis_i, basis_j]
+'''
+
+
+def operands(num_elements, num_basis=4, num_quadrature=5):
+    """Random operands of ``MASS``, with the same basis functions along both directions."""
+    phi = np.random.rand(num_basis, num_quadrature)
+    weight = np.random.rand(num_quadrature)
+    jacobian_det = np.random.rand(num_elements, num_quadrature, num_quadrature)
+    return [phi, phi, phi, phi, weight, weight, jacobian_det]
+
+
+def operands_1d(num_elements, num_basis=4, num_quadrature=5):
+    """Random operands of ``MASS_1D``."""
+    phi = np.random.rand(num_basis, num_quadrature)
+    return [phi, phi, np.random.rand(num_quadrature),
+            np.random.rand(num_elements, num_quadrature)]
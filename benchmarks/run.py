@@ -0,0 +1,107 @@
+"""
+Run the benchmarks, save their results and compare them against a baseline.
+
+Usage::
+
+    python benchmarks/run.py --save results.json
+    python benchmarks/run.py --baseline results.json --threshold 1.2
+
+Each ``bench_*.py`` module provides ``run()``, returning (nested) dicts of seconds.  Results are
+flattened to dotted names, and with a baseline every time is compared with the baseline time.
+Times that are slower by more than the threshold ratio are reported as regressions, and the
+runner exits with status 1 if there are any.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+BENCHMARK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover():
+    """Returns the names of all benchmark modules."""
+    return sorted(name[:-3] for name in os.listdir(BENCHMARK_DIRECTORY)
+                  if name.startswith('bench_') and name.endswith('.py'))
+
+
+def flatten(results, prefix=''):
+    """Flatten nested dicts of times into a dict from dotted names to times."""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = float(value)
+    return flat
+
+
+def run(modules):
+    """Run some benchmark modules, returning their flattened results."""
+    sys.path.insert(0, BENCHMARK_DIRECTORY)
+    results = {}
+    for name in modules:
+        print(f'running {name}...', file=sys.stderr)
+        module = importlib.import_module(name)
+        results.update(flatten(module.run(), name[len('bench_'):] + '.'))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Returns
+    -------
+    list of tuple
+      Name, baseline time, time and ratio of every benchmark in both, slowest ratio first
+    """
+    rows = [(name, baseline[name], results[name], results[name] / baseline[name])
+            for name in results if baseline.get(name)]
+    rows.sort(key=lambda row: -row[3])
+    for name, before, after, ratio in rows:
+        flag = 'REGRESSION' if ratio > threshold else ''
+        print(f'{name:<48}{before * 1e6:>12.2f}us{after * 1e6:>12.2f}us{ratio:>8.2f}x {flag}')
+    return rows
+
+
+def main(argv=None):
+    """Parse arguments, run the benchmarks and compare them against a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('benchmarks', nargs='*', help='benchmark modules to run, i.e. bench_parser')
+    parser.add_argument('--save', help='file to save the results to, as JSON')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='slowdown ratio reported as a regression (default 1.2)')
+    args = parser.parse_args(argv)
+
+    results = run(args.benchmarks or discover())
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        rows = compare(results, baseline, args.threshold)
+        regressions = [row for row in rows if row[3] > args.threshold]
+        if regressions:
+            print(f'{len(regressions)} regressions above {args.threshold}x')
+            return 1
+    else:
+        for name, t in results.items():
+            print(f'{name:<48}{t * 1e6:>12.2f}us')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,51 @@
 """Main import for named_einsum."""
-import functools
+import importlib
+
 import named_einsum.parser
 import named_einsum.exceptions
-import autoray
+import named_einsum.cache
+import named_einsum.persistent
+import named_einsum.profiling
+from named_einsum.cache import (  # noqa: F401
+    cache_info, cache_clear, set_cache_size, set_cache_policy
+)
+from named_einsum.persistent import (  # noqa: F401
+    enable_persistent_cache, disable_persistent_cache
+)
+from named_einsum.profiling import profile  # noqa: F401
+
+# Modules that need the array backends are only imported on first use, so that importing the
+# package (i.e. to translate expressions) does not import autoray and numpy.
+_LAZY_ATTRIBUTES = {
+    'Expression': 'named_einsum.expression',
+    'stream': 'named_einsum.streaming',
+    'out_of_core': 'named_einsum.outofcore',
+    'einsum_many': 'named_einsum.multi',
+    'estimate': 'named_einsum.costs',
+    'bind': 'named_einsum.binding',
+    'jit': 'named_einsum.specialized',
+    'kernel': 'named_einsum.codegen',
+}
+_LAZY_MODULES = ('expression', 'streaming', 'outofcore', 'slicing', 'processes', 'paths',
+                 'multi', 'costs', 'blas', 'rewrite', 'constants', 'binding',
+                 'specialized', 'sparsity', 'codegen', 'layout')
+
+
+def __getattr__(name):
+    """Import backend-dependent attributes and submodules on first access."""
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _LAZY_MODULES:
+        value = importlib.import_module(f'named_einsum.{name}')
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the attributes of the package, including the lazily imported ones."""
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_MODULES))
 
 
 def _generate_variable_subscripts(variable, mapping):
@@ -21,6 +64,10 @@ def parse(s):
 
 def compile(parsed):
     """Compile a parsed string into an executable einsum statement."""
+    for idx, (axis_name, letter) in enumerate(parsed.axis_mapping.items()):
+        if letter is None:
+            raise named_einsum.exceptions.TooManyAxesError(axis_name, idx)
+
     input_var_strs = []
     for input_variable in parsed.input_variables:
         input_var_strs.append(
@@ -33,95 +80,22 @@ def compile(parsed):
     return ','.join(input_var_strs) + '->' + output_var_str
 
 
-def shape_check(parsed, variables):
-    """Check the shape of input variables against a parsed expression."""
-    variable_shapes = {}
-    material_variable_axes = []
-
-    for (var_spec, var) in zip(parsed.input_variables, variables):
-        ndim = var.ndim
-        naxis = len(var_spec.axes)
-
-        # Check if we have an ellipse axis
-        ellipsis_axis_num = -1
-        for i, axis in enumerate(var_spec.axes):
-            if isinstance(axis, named_einsum.parser.EllipsisAxis):
-                if ellipsis_axis_num != -1:
-                    raise named_einsum.exceptions.AmbiguousEllipsesError(var_spec.name)
-                ellipsis_axis_num = i
-
-        # Check number of axes
-        if ellipsis_axis_num == -1 and ndim != len(var_spec.axes):
-            raise named_einsum.exceptions.InconsistentShapeDefinitionError(
-                var_spec.name, len(var_spec.axes), ndim
-            )
-
-        # Fill out the ellipse axes to get a materialized list of axis that are
-        # either a ProductAxis or NamedAxis
-        mat_axis = []
-
-        # Helper to check shape and materialize axes
-        def check_axis(axis, size):
-            mat_axis.append(axis)
-            if isinstance(axis, named_einsum.parser.ProductAxis):
-                # If we have a product axis, check that the product of axis shapes is consistent
-                product_size = 1
-                for subaxis in axis.axes:
-                    axis_name = subaxis.name
-                    if axis_name not in variable_shapes:
-                        return
-                    product_size *= variable_shapes[axis_name]
-                if product_size != size:
-                    raise named_einsum.exceptions.InconsistentAxisSizeError(
-                        f'Product ({axis.einsum_repr})', [product_size, size]
-                    )
-            else:
-                axis_name = axis.name
-
-                # If this is the first time we encounter this axis, set it and return
-                if axis_name not in variable_shapes:
-                    variable_shapes[axis_name] = size
-                    return
-
-                # ... else check to make sure we are consistent
-                previous_size = variable_shapes[axis_name]
-                if previous_size != size:
-                    raise named_einsum.exceptions.InconsistentAxisSizeError(
-                        axis_name, (previous_size, size)
-                    )
-
-        # Finally, handle axis checking with ellipses
-        shape_ptr = 0
-        for i, axis in enumerate(var_spec.axes):
-            if ellipsis_axis_num == -1 or i < ellipsis_axis_num:
-                # Before ellipsis
-                check_axis(axis, var.shape[shape_ptr])
-                shape_ptr += 1
-            elif ellipsis_axis_num != -1 and i >= (naxis - ellipsis_axis_num):
-                # After ellipsis
-                check_axis(axis, var.shape[shape_ptr])
-                shape_ptr += 1
-            else:
-                # Current axis belongs in the ellipsis
-                num_ellipse_axes = (ndim - naxis) + 1
-                for j in range(num_ellipse_axes):
-                    check_axis(
-                        named_einsum.parser.NamedAxis(f'!ellipsis_{j}'),
-                        var.shape[shape_ptr]
-                    )
-                    shape_ptr += 1
-
-        material_variable_axes.append(mat_axis)
+def shape_check(parsed, variables, on_copy=None):
+    """
+    Check the shape of input variables against a parsed expression.
 
-    # Reshape variables to reduce product axes
-    reshaped_variables = []
-    for (var_spec, var) in zip(material_variable_axes, variables):
-        output_shape = []
-        for axis in var_spec:
-            output_shape.extend([variable_shapes[subaxis_name] for subaxis_name in axis.axis_names])
-        reshaped_variables.append(var.reshape(tuple(output_shape)))
+    Variables with product axes are reshaped to expand them.  With ``on_copy`` set to
+    ``'warn'`` or ``'raise'``, reshapes that would copy a variable warn or raise.
+    """
+    import named_einsum.layout  # pylint: disable=import-outside-toplevel
+    layouts = [named_einsum.layout.VariableLayout(var_spec)
+               for var_spec in parsed.input_variables]
+    plan = named_einsum.layout.plan_shapes(layouts, [var.shape for var in variables])
 
-    return reshaped_variables
+    # Reshape variables to reduce product axes
+    return [var if shape is None else
+            named_einsum.layout.checked_reshape(var, shape, layout.name, on_copy)
+            for (var, shape, layout) in zip(variables, plan.input_shapes, layouts)]
 
 
 def compute_output_shape(parsed, var):
@@ -130,59 +104,73 @@ def compute_output_shape(parsed, var):
         # Scalar shape
         return (())
 
-    var_spec = parsed.output_variable
-    flat_axes = var_spec.flattened_axes
-    naxis = len(flat_axes)
-
-    # Check if we have an ellipse axis
-    ellipsis_axis_num = -1
-    for i, axis in enumerate(flat_axes):
-        if isinstance(axis, named_einsum.parser.EllipsisAxis):
-            if ellipsis_axis_num != -1:
-                raise named_einsum.exceptions.AmbiguousEllipsesError(var_spec.name)
-            ellipsis_axis_num = i
-
-    # Fill out the ellipse axes to get a materialized list of axis that are
-    # either a ProductAxis or NamedAxis
-    if ellipsis_axis_num != -1:
-        ellipse_axes = []
-        for i in range(var.ndim - naxis + 1):
-            ellipse_axes.append(named_einsum.parser.NamedAxis(
-                f'!ellipsis_{i}'
-            ))
-        material_axes = []
-        for axis in var_spec.axes:
-            if isinstance(axis, named_einsum.parser.EllipsisAxis):
-                material_axes.extend(ellipse_axes)
-            else:
-                material_axes.append(axis)
-    else:
-        material_axes = var_spec.axes
-
-    # Now, collapse ProductAxes
-    output_shape = []
-    shape_ptr = 0
-    for axis in material_axes:
-        if isinstance(axis, named_einsum.parser.ProductAxis):
-            size = functools.reduce(
-                lambda x, y: x * y, var.shape[shape_ptr: shape_ptr + axis.num_axes], 1
-            )
-            output_shape.append(size)
-            shape_ptr += axis.num_axes
-        else:
-            output_shape.append(var.shape[shape_ptr])
-            shape_ptr += 1
-
-    return tuple(output_shape)
-
-
-@functools.cache
+    import named_einsum.layout  # pylint: disable=import-outside-toplevel
+    layout = named_einsum.layout.VariableLayout(parsed.output_variable, 'output')
+    return layout.unflattened_shape(var.shape)
+
+
+_TRANSLATE_CACHE = named_einsum.cache.register('translate')
+_CANONICAL_CACHE = named_einsum.cache.register('canonical')
+_PREPARE_CACHE = named_einsum.cache.register('prepare')
+
+
+def _is_valid_translation(entry):
+    """Returns whether an entry loaded from the persistent cache is a translation."""
+    return (isinstance(entry, tuple) and len(entry) == 2 and isinstance(entry[0], str) and
+            all(hasattr(entry[1], name)
+                for name in ('input_variables', 'output_variable', 'axis_mapping')))
+
+
 def translate(subscripts, return_parsed=False):
     """Translate a readable einsum string into something that can be executed by (i.e.) numpy."""
-    parsed = parse(subscripts)
+    # Spellings that only differ in formatting share one entry, with a single parsed expression
+    entry = _TRANSLATE_CACHE.get(subscripts, record_miss=False)
+    if entry is None:
+        key, entry = named_einsum.cache.get_normalized(_TRANSLATE_CACHE, subscripts)
+    if entry is None:
+        entry = named_einsum.persistent.load('translate', key, _is_valid_translation)
+        if entry is None:
+            # Expressions that only differ in naming share a compiled entry
+            parsed = parse(subscripts)
+            canonical = named_einsum.cache.canonical_form(parsed)
+            compiled = _CANONICAL_CACHE.get(canonical)
+            if compiled is None:
+                compiled = compile(parsed)
+                _CANONICAL_CACHE.put(canonical, compiled)
+            entry = (compiled, parsed)
+            named_einsum.persistent.store('translate', key, entry)
+        named_einsum.cache.put_normalized(_TRANSLATE_CACHE, key, subscripts, entry)
+
     if return_parsed:
-        return compile(parsed), parsed
-    return compile(parsed)
+        return entry
+    return entry[0]
+
+
+translate.cache_info = _TRANSLATE_CACHE.info
+translate.cache_clear = _TRANSLATE_CACHE.clear
+
+
+def prepare(subscripts):
+    """
+    Prepare a readable einsum string for repeated evaluation.
+
+    Parameters
+    ----------
+    subscripts : string
+      Readable einsum subscripts string
+
+    Returns
+    -------
+    Expression
+      Callable expression that takes the input arrays
+    """
+    expression = _PREPARE_CACHE.get(subscripts, record_miss=False)
+    if expression is None:
+        key, expression = named_einsum.cache.get_normalized(_PREPARE_CACHE, subscripts)
+    if expression is None:
+        expression = named_einsum.Expression(subscripts)
+        named_einsum.cache.put_normalized(_PREPARE_CACHE, key, subscripts, expression)
+    return expression
 
 
 def einsum(subscripts, *args, **kwargs):
@@ -195,19 +183,20 @@ def einsum(subscripts, *args, **kwargs):
       Existing einsum function to wrap
     subscripts : string
       Readable einsum subscripts string
+    optimize : bool, string or list of tuple, optional
+      Contraction path strategy, see ``Expression.__call__``
 
     Returns
     -------
     array
       Output of einsum
     """
-    compiled_subscripts, parsed_subscripts = translate(subscripts, True)
-    reshaped_input = shape_check(parsed_subscripts, args)
-
-    output = autoray.do('einsum', compiled_subscripts, *reshaped_input, **kwargs)
-    output_shape = compute_output_shape(parsed_subscripts, output)
-
-    return output.reshape(output_shape)
+    if named_einsum.profiling.ENABLED:
+        with named_einsum.profiling.record_call() as record:
+            expression = prepare(subscripts)
+            record.phase('prepare')
+            return expression(*args, **kwargs)
+    return prepare(subscripts)(*args, **kwargs)
 
 
 def feinsum(subscripts, *args, **kwargs):
@@ -227,5 +216,6 @@ def feinsum(subscripts, *args, **kwargs):
     array
       Output of einsum
     """
+    import autoray  # pylint: disable=import-outside-toplevel
     compiled_subscripts, parsed_subscripts = translate(subscripts, True)
     return autoray.do('einsum', compiled_subscripts, *args, **kwargs)
@@ -0,0 +1,93 @@
+"""Partial evaluation of expressions, by contracting some of their operands ahead of time."""
+from types import SimpleNamespace
+
+import autoray
+
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.layout
+import named_einsum.parser
+import named_einsum.paths
+
+
+def bind(subscripts, operands, name='bound'):
+    """
+    Contract some operands of an expression ahead of time, leaving a smaller expression.
+
+    The bound operands are contracted to one tensor, which keeps the axes that the unbound
+    variables or the output still need.  The returned expression takes the unbound variables
+    in their original order, followed by the bound tensor as variable ``name``, and has the
+    same output as the original expression.
+
+    Parameters
+    ----------
+    subscripts : string
+      Readable einsum subscripts string
+    operands : dict
+      Operands to bind, by variable name.  Their variables may not have an ellipsis, and every
+      axis of their product axes must be sized by the bound operands.
+    name : string, optional
+      Name of the variable for the bound tensor in the returned expression
+
+    Returns
+    -------
+    subscripts : string
+      Readable einsum subscripts string of the remaining contraction
+    bound : array
+      Contraction of the bound operands, to be passed as the last operand
+    """
+    expression = named_einsum.prepare(subscripts)
+    parsed = expression.parsed
+    names = [variable.name for variable in parsed.input_variables]
+    for variable in operands:
+        if variable not in names:
+            raise named_einsum.exceptions.UnknownVariableError(variable)
+    if not operands:
+        raise named_einsum.exceptions.BindingError('no operands given')
+    if name in names or (parsed.output_variable is not None and
+                         parsed.output_variable.name == name):
+        raise named_einsum.exceptions.BindingError(f'variable {name} already exists')
+
+    positions = [k for k, variable in enumerate(names) if variable in operands]
+    layouts = [expression.input_layouts[k] for k in positions]
+    for layout in layouts:
+        if layout.ellipsis != -1:
+            raise named_einsum.exceptions.BindingError(f'{layout.name} has an ellipsis')
+    arrays = [operands[names[k]] for k in positions]
+    try:
+        plan = named_einsum.layout.plan_shapes(layouts, [array.shape for array in arrays])
+    except KeyError as error:
+        raise named_einsum.exceptions.BindingError(
+            f'axis {error.args[0]} is not sized by the bound operands'
+        ) from error
+
+    # Axes still needed by the unbound variables or the output, in order of appearance
+    needed = set(parsed.output_variable.axis_names if parsed.output_variable else ())
+    for k, variable in enumerate(parsed.input_variables):
+        if k not in positions:
+            needed.update(variable.axis_names)
+    axes = [axis for axis in dict.fromkeys(
+        axis for input_axes in plan.input_axes for axis in input_axes
+    ) if axis in needed]
+
+    arrays = [array if shape is None else array.reshape(shape)
+              for array, shape in zip(arrays, plan.input_shapes)]
+    backend = autoray.infer_backend(arrays[0])
+    backend_einsum = autoray.get_lib_fn(backend, 'einsum')
+    if len(arrays) > 2:
+        path = named_einsum.paths.greedy_path(plan.input_axes, axes, plan.axis_sizes)
+        bound = named_einsum.paths.contract_path(backend_einsum, arrays, plan.input_axes, axes,
+                                                 path, backend)
+    else:
+        bound = backend_einsum(named_einsum.paths.einsum_subscripts(plan.input_axes, axes),
+                               *arrays)
+
+    variables = [variable for k, variable in enumerate(parsed.input_variables)
+                 if k not in positions]
+    variables.append(named_einsum.parser.Variable(
+        name, [named_einsum.parser.NamedAxis(axis) for axis in axes]
+    ))
+    remaining = named_einsum.parser.unparse(
+        SimpleNamespace(input_variables=variables, output_variable=parsed.output_variable)
+    )
+    return remaining, bound
@@ -0,0 +1,136 @@
+"""Recognition of matmul-shaped contractions, which are dispatched to matmul instead of einsum."""
+from types import SimpleNamespace
+
+import autoray
+
+# Backends whose einsum is slower than matmul for matmul-shaped contractions.  Others (i.e.
+# torch and jax) already lower such einsums to batched matrix products themselves.
+BACKENDS = {'numpy'}
+
+# Smallest number of multiply-adds for which the transposes and reshapes around matmul pay off,
+# i.e. from square matrix products of about 25 x 25
+MIN_FLOPS = 2 ** 14
+
+
+def _product(values):
+    out = 1
+    for value in values:
+        out *= value
+    return out
+
+
+def matmul_recipe(axes_a, axes_b, output_axes):
+    """
+    Recognise a pairwise contraction that is a (batched) matrix product.
+
+    Axes in both operands and the output are batch axes, axes in both operands only are
+    contracted, and axes in one operand and the output are the rows or columns of the product.
+    This covers matmul, batched matmul, outer products and tensordot, with any axis order.
+
+    Parameters
+    ----------
+    axes_a, axes_b : list of string
+      Flat axis names of the two operands
+    output_axes : list of string
+      Flat axis names of the output
+
+    Returns
+    -------
+    SimpleNamespace or None
+      The transposes of both operands and the output around the product, or None if the
+      contraction is not a matrix product (i.e. it has repeated axes within an operand, or axes
+      that are summed over within a single operand)
+    """
+    set_a, set_b, set_output = set(axes_a), set(axes_b), set(output_axes)
+    if (len(set_a) != len(axes_a) or len(set_b) != len(axes_b) or
+            not set_a | set_b <= set_output | (set_a & set_b)):
+        return None
+
+    # Batch, row and column axes follow the output order so that the output rarely needs a
+    # transpose, and contracted axes follow the order of the first operand
+    batch = [axis for axis in output_axes if axis in set_a and axis in set_b]
+    rows = [axis for axis in output_axes if axis in set_a and axis not in set_b]
+    columns = [axis for axis in output_axes if axis in set_b and axis not in set_a]
+    contracted = [axis for axis in axes_a if axis in set_b and axis not in set_output]
+
+    order = batch + rows + columns
+    perm_a = tuple(axes_a.index(axis) for axis in batch + rows + contracted)
+    perm_b = tuple(axes_b.index(axis) for axis in batch + contracted + columns)
+    perm_output = tuple(order.index(axis) for axis in output_axes)
+    return SimpleNamespace(
+        batch=batch, rows=rows, columns=columns, contracted=contracted,
+        # Positions of the axes of each group in the operands
+        batch_dims=perm_a[:len(batch)],
+        row_dims=perm_a[len(batch):len(batch) + len(rows)],
+        contracted_dims=perm_a[len(batch) + len(rows):],
+        column_dims=perm_b[len(batch) + len(contracted):],
+        perm_a=None if perm_a == tuple(range(len(axes_a))) else perm_a,
+        perm_b=None if perm_b == tuple(range(len(axes_b))) else perm_b,
+        perm_output=None if perm_output == tuple(range(len(order))) else perm_output,
+    )
+
+
+def contract(backend, recipe, a, b):
+    """
+    Evaluate a matrix product recipe with the backend's transpose and matmul.
+
+    Axis sizes are taken from the operands, so a recipe also applies to slices of them.
+
+    Parameters
+    ----------
+    backend : string
+      Name of the array backend
+    recipe : SimpleNamespace
+      Recipe returned by ``matmul_recipe``
+    a, b : array
+      Operands, with product axes already expanded
+
+    Returns
+    -------
+    array
+      Output with axes ordered as the output axes of the recipe
+    """
+    shape_a, shape_b = a.shape, b.shape
+    batch = tuple(shape_a[dim] for dim in recipe.batch_dims)
+    rows = tuple(shape_a[dim] for dim in recipe.row_dims)
+    columns = tuple(shape_b[dim] for dim in recipe.column_dims)
+    num_contracted = _product(shape_a[dim] for dim in recipe.contracted_dims)
+    num_rows, num_columns = _product(rows), _product(columns)
+
+    if recipe.perm_a is not None or recipe.perm_b is not None:
+        transpose = autoray.get_lib_fn(backend, 'transpose')
+        if recipe.perm_a is not None:
+            a = transpose(a, recipe.perm_a)
+        if recipe.perm_b is not None:
+            b = transpose(b, recipe.perm_b)
+
+    # Reshapes are skipped when the groups are single axes already, i.e. for plain matmuls
+    if batch:
+        num_batch = _product(batch)
+        matrix_a = (num_batch, num_rows, num_contracted)
+        matrix_b = (num_batch, num_contracted, num_columns)
+    else:
+        matrix_a, matrix_b = (num_rows, num_contracted), (num_contracted, num_columns)
+    if tuple(a.shape) != matrix_a:
+        a = a.reshape(matrix_a)
+    if tuple(b.shape) != matrix_b:
+        b = b.reshape(matrix_b)
+
+    output = autoray.get_lib_fn(backend, 'matmul')(a, b)
+    shape = batch + rows + columns
+    if tuple(output.shape) != shape:
+        output = output.reshape(shape)
+    if recipe.perm_output is not None:
+        output = autoray.get_lib_fn(backend, 'transpose')(output, recipe.perm_output)
+    return output
+
+
+def find(axes_a, axes_b, output_axes, axis_sizes):
+    """Returns a matrix product recipe for a contraction large enough for matmul, or None."""
+    if _product(axis_sizes[axis] for axis in set(axes_a).union(axes_b)) < MIN_FLOPS:
+        return None
+    recipe = matmul_recipe(list(axes_a), list(axes_b), list(output_axes))
+    # Outer products are no faster through matmul than through einsum
+    if recipe is None or not recipe.contracted:
+        return None
+    return recipe
@@ -0,0 +1,226 @@
+"""Bounded caches used for translated expressions and execution plans."""
+from collections import OrderedDict, namedtuple
+import re
+import threading
+
+import named_einsum.parser
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+DEFAULT_MAXSIZE = 1024
+
+_CACHES = {}
+
+
+POLICIES = ('lru', 'fifo')
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache with hit/miss statistics.
+
+    Parameters
+    ----------
+    maxsize : int or None
+      Maximum number of entries to hold before evicting the least recently used one, or None
+      for an unbounded cache.
+    policy : string, optional
+      ``'lru'`` to evict the least recently used entry, or ``'fifo'`` to evict the oldest
+      entry, which makes hits slightly cheaper since they do not reorder entries.
+    """
+
+    def __init__(self, maxsize=128, policy='lru'):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._maxsize = maxsize
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """Returns the number of cached entries."""
+        return len(self._data)
+
+    def __contains__(self, key):
+        """Returns whether a key is cached, without touching statistics or recency."""
+        return key in self._data
+
+    @property
+    def maxsize(self):
+        """Returns the maximum number of entries."""
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        """Sets the maximum number of entries, evicting old ones if needed."""
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    @property
+    def policy(self):
+        """Returns the eviction policy."""
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy):
+        """Sets the eviction policy, one of ``POLICIES``."""
+        if policy not in POLICIES:
+            raise ValueError(f'unknown cache policy {policy!r}, expected one of {POLICIES}')
+        self._policy = policy
+
+    def _evict(self):
+        if self._maxsize is None:
+            return
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None, record_miss=True):
+        """
+        Returns a cached value and marks it as recently used, or ``default`` on a miss.
+
+        Misses are not counted with ``record_miss=False``, i.e. for a lookup that is retried
+        under another key.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                if record_miss:
+                    self.misses += 1
+                return default
+            if self._policy == 'lru':
+                self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Insert a value, evicting the least recently used entries if the cache is full."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._evict()
+
+    def info(self):
+        """Returns hit/miss statistics of this cache."""
+        return CacheInfo(self.hits, self.misses, self._maxsize, len(self._data))
+
+    def clear(self):
+        """Remove all entries and reset statistics."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_COMMENT = re.compile(r'//[^\n]*')
+_SPACE_AROUND_SYMBOLS = re.compile(r' ?([^\w ]+) ?')
+
+
+def normalize(subscripts):
+    """
+    Returns subscripts without comments and without whitespace that does not separate names.
+
+    Spellings of an expression that only differ in formatting normalise to the same string, so
+    they share cache entries before being parsed.
+    """
+    return _SPACE_AROUND_SYMBOLS.sub(r'\1', ' '.join(_COMMENT.sub(' ', subscripts).split()))
+
+
+def get_normalized(cache, subscripts):
+    """
+    Look up subscripts in a cache keyed by normalised subscripts.
+
+    Callers try the spelling as given first (with ``record_miss=False``), since hits add it as
+    an alias of the normalised entry, so that repeated lookups skip normalising.
+
+    Returns
+    -------
+    tuple
+      The normalised key and the cached value, or None on a miss
+    """
+    key = normalize(subscripts)
+    value = cache.get(key)
+    if value is not None and key != subscripts:
+        cache.put(subscripts, value)
+    return key, value
+
+
+def put_normalized(cache, key, subscripts, value):
+    """Store a value under a normalised key, and the spelling it was looked up with."""
+    cache.put(key, value)
+    if key != subscripts:
+        cache.put(subscripts, value)
+
+
+def canonical_form(parsed):
+    """
+    Returns a hashable normal form of a parsed expression.
+
+    Variable names are dropped and axis names are replaced by their order of first appearance,
+    so expressions that differ only in whitespace, comments or naming share the same form.
+    """
+    indices = {}
+
+    def _axis(axis):
+        if isinstance(axis, named_einsum.parser.EllipsisAxis):
+            return None
+        return tuple(indices.setdefault(name, len(indices)) for name in axis.axis_names)
+
+    def _variable(variable):
+        return tuple(_axis(axis) for axis in variable.axes)
+
+    inputs = tuple(_variable(variable) for variable in parsed.input_variables)
+    output = (_variable(parsed.output_variable) if parsed.output_variable is not None
+              else ())
+    return (inputs, output)
+
+
+def register(name, maxsize=DEFAULT_MAXSIZE):
+    """Create a named cache that is managed by ``cache_info``, ``cache_clear`` and friends."""
+    cache = LRUCache(maxsize)
+    _CACHES[name] = cache
+    return cache
+
+
+def cache_info():
+    """Returns a dictionary of hit/miss statistics for every library cache, by name."""
+    return {name: cache.info() for name, cache in _CACHES.items()}
+
+
+def cache_clear():
+    """Remove all entries from every library cache."""
+    for cache in _CACHES.values():
+        cache.clear()
+
+
+def set_cache_size(maxsize, name=None):
+    """
+    Set the maximum number of entries of the library caches.
+
+    Parameters
+    ----------
+    maxsize : int or None
+      New maximum size, or None for unbounded caches
+    name : string, optional
+      Name of a single cache to resize.  By default all caches are resized.
+    """
+    caches = _CACHES.values() if name is None else [_CACHES[name]]
+    for cache in caches:
+        cache.maxsize = maxsize
+
+
+def set_cache_policy(policy, name=None):
+    """
+    Set the eviction policy of the library caches.
+
+    Parameters
+    ----------
+    policy : string
+      ``'lru'`` (the default) or ``'fifo'``
+    name : string, optional
+      Name of a single cache to change.  By default all caches are changed.
+    """
+    caches = _CACHES.values() if name is None else [_CACHES[name]]
+    for cache in caches:
+        cache.policy = policy
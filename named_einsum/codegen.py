@@ -0,0 +1,228 @@
+"""Generated kernels for tiny fixed-size contractions, vectorised over a leading batch axis."""
+import importlib
+import itertools
+
+import numpy as np
+
+import named_einsum
+import named_einsum.cache
+import named_einsum.exceptions
+
+_KERNEL_CACHE = named_einsum.cache.register('kernels')
+
+# Largest number of products (i.e. the product of all axis sizes) that is unrolled
+MAX_TERMS = 4096
+
+METHODS = ('numpy', 'numba')
+
+# Batch entries per call of numpy kernels, so that their temporaries stay in cache
+BLOCK_SIZE = 4096
+
+# Largest number of products (batch entries times terms) that numpy kernels gather into one
+# array.  The unrolled expressions cost a few numpy calls per output entry, so smaller batches
+# are contracted by gathering the entries of every term and summing their products instead.
+GATHER_SIZE = 2 ** 15
+
+
+def _product(values):
+    out = 1
+    for value in values:
+        out *= value
+    return out
+
+
+def _flat_index(axes, assignment, axis_sizes):
+    """Row-major position of an entry of an operand, given the value of every axis."""
+    index = 0
+    for axis in axes:
+        index = index * axis_sizes[axis] + assignment[axis]
+    return index
+
+
+def unrolled_terms(input_axes, output_axes, axis_sizes):
+    """
+    Unroll a contraction into sums of products of single entries.
+
+    Parameters
+    ----------
+    input_axes : list of list of string
+      Flat axis names of each operand
+    output_axes : list of string
+      Flat axis names of the output
+    axis_sizes : dict
+      Size of every axis
+
+    Returns
+    -------
+    list of list of tuple
+      For every entry of the (flattened) output, its terms, each of which is a tuple with the
+      flat position of one entry in every operand
+    """
+    contracted = [axis for axis in dict.fromkeys(itertools.chain(*input_axes))
+                  if axis not in output_axes]
+    num_terms = _product(axis_sizes[axis] for axis in itertools.chain(output_axes, contracted))
+    if num_terms > MAX_TERMS:
+        raise named_einsum.exceptions.KernelSizeError(num_terms, MAX_TERMS)
+
+    entries = []
+    for output_values in itertools.product(*(range(axis_sizes[axis]) for axis in output_axes)):
+        terms = []
+        for contracted_values in itertools.product(*(range(axis_sizes[axis])
+                                                     for axis in contracted)):
+            assignment = dict(zip(output_axes, output_values))
+            assignment.update(zip(contracted, contracted_values))
+            terms.append(tuple(_flat_index(axes, assignment, axis_sizes) for axes in input_axes))
+        entries.append(terms)
+    return entries
+
+
+def _gather_indices(entries, num_inputs):
+    """Positions of the entries of each operand in every term, of shape (terms, outputs)."""
+    num_terms = len(entries[0]) if entries else 0
+    return [np.array([[terms[term][k] for terms in entries] for term in range(num_terms)],
+                     dtype=np.intp).reshape(num_terms, len(entries))
+            for k in range(num_inputs)]
+
+
+def _sum_source(terms):
+    return ' + '.join(' * '.join(f'x{k}_{index}' for k, index in enumerate(term))
+                      for term in terms) or '0'
+
+
+def generate_source(entries, input_sizes, method='numpy'):
+    """
+    Generate the source of a kernel from its unrolled terms.
+
+    Kernels take the operands flattened to ``(batch, size)`` and write into a flat output of
+    shape ``(batch, number of output entries)``.  Numpy kernels have one vectorised expression
+    per output entry, and numba kernels loop over the batch with one scalar expression per
+    output entry.
+
+    Parameters
+    ----------
+    entries : list of list of tuple
+      Terms returned by ``unrolled_terms``
+    input_sizes : list of int
+      Number of entries of each operand
+    method : string, optional
+      Either ``'numpy'`` or ``'numba'``
+
+    Returns
+    -------
+    string
+      Source of a function named ``kernel``
+    """
+    arguments = ''.join(f'x{k}, ' for k in range(len(input_sizes)))
+    lines = [f'def kernel({arguments}out):']
+    if method == 'numpy':
+        for k, size in enumerate(input_sizes):
+            if size:
+                names = ''.join(f'x{k}_{index}, ' for index in range(size))
+                lines.append(f'    {names}= x{k}.T')
+        for position, terms in enumerate(entries):
+            lines.append(f'    out[:, {position}] = {_sum_source(terms)}')
+    else:
+        # Only the entries that appear in some term are loaded
+        used = [sorted({term[k] for terms in entries for term in terms})
+                for k in range(len(input_sizes))]
+        lines.append('    for b in range(out.shape[0]):')
+        for k, indices in enumerate(used):
+            lines.extend(f'        x{k}_{index} = x{k}[b, {index}]' for index in indices)
+        for position, terms in enumerate(entries):
+            lines.append(f'        out[b, {position}] = {_sum_source(terms)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _default_method():
+    try:
+        importlib.import_module('numba')
+    except ImportError:
+        return 'numpy'
+    return 'numba'
+
+
+def generate(expression, shapes, method=None):
+    """
+    Generate a kernel for an expression with fixed shapes, vectorised over a batch axis.
+
+    Every operand has a leading batch axis (of the same size) in front of its shape in
+    ``shapes``, and so does the output, otherwise ``KernelShapeError`` is raised.  Contractions
+    with more than ``MAX_TERMS`` products raise ``KernelSizeError``, since they are large
+    enough for einsum to pay off.  Product axes and ellipses are laid out as in
+    ``Expression.__call__``.  Kernels are cached per expression, shapes and method in the
+    ``'kernels'`` cache.
+
+    Parameters
+    ----------
+    expression : Expression
+      Prepared expression
+    shapes : list of tuple
+      Shape of each operand, without the batch axis
+    method : string, optional
+      ``'numpy'`` for unrolled numpy expressions on blocks of the batch, or ``'numba'`` for a
+      numba compiled loop over the batch.  Defaults to numba if it is installed.  Numpy kernels
+      gather the entries of every term instead for batches of up to ``GATHER_SIZE`` products,
+      where a few numpy calls per output entry would cost more than einsum.
+
+    Returns
+    -------
+    callable
+      Function from the batched operands to the batched output (a numpy array)
+    """
+    method = method or _default_method()
+    if method not in METHODS:
+        raise ValueError(f'Unknown kernel method {method!r}, expected one of {METHODS}')
+    shapes = tuple(tuple(shape) for shape in shapes)
+    key = (expression.key, shapes, method)
+    cached = _KERNEL_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    plan = expression.plan(shapes)
+    if plan.output_axes is None:
+        raise named_einsum.exceptions.EllipsisBroadcastError('cannot generate a kernel')
+    output_shape = tuple(plan.axis_sizes[axis] for axis in plan.output_axes)
+    if expression.output_layout is not None and expression.output_layout.has_product:
+        output_shape = expression.output_layout.unflattened_shape(output_shape)
+    input_sizes = [_product(plan.axis_sizes[axis] for axis in axes) for axes in plan.input_axes]
+    entries = unrolled_terms(plan.input_axes, plan.output_axes, plan.axis_sizes)
+
+    namespace = {}
+    exec(compile(generate_source(entries, input_sizes, method),  # pylint: disable=exec-used
+                 f'<kernel {expression.subscripts}>', 'exec'), namespace)
+    function = namespace['kernel']
+    if method == 'numba':
+        function = importlib.import_module('numba').njit(function)
+    num_outputs = len(entries)
+    indices = _gather_indices(entries, len(input_sizes))
+    gather_batch = GATHER_SIZE // max(indices[0].size if indices else 0, 1)
+
+    def _kernel(*arrays):
+        num_batch = len(arrays[0])
+        if (len(arrays) != len(shapes) or
+                any(array.shape != (num_batch,) + shape for array, shape in zip(arrays, shapes))):
+            raise named_einsum.exceptions.KernelShapeError(
+                list(shapes), [tuple(array.shape) for array in arrays]
+            )
+        flat = [array.reshape(num_batch, size) for array, size in zip(arrays, input_sizes)]
+        out = np.empty((num_batch, num_outputs), dtype=np.result_type(*flat))
+        if method == 'numba':
+            function(*flat, out)
+        elif num_batch <= gather_batch:
+            product = flat[0][:, indices[0]]
+            for array, index in zip(flat[1:], indices[1:]):
+                product = product * array[:, index]
+            product.sum(axis=1, out=out)
+        else:
+            for start in range(0, num_batch, BLOCK_SIZE):
+                block = slice(start, start + BLOCK_SIZE)
+                function(*(array[block] for array in flat), out[block])
+        return out.reshape((num_batch,) + output_shape)
+
+    _KERNEL_CACHE.put(key, _kernel)
+    return _kernel
+
+
+def kernel(subscripts, shapes, method=None):
+    """Returns the kernel of readable einsum subscripts for fixed shapes, see ``generate``."""
+    return generate(named_einsum.prepare(subscripts), shapes, method)
@@ -0,0 +1,140 @@
+"""Memoisation of the intermediates that constant operands contract to, across calls."""
+from types import SimpleNamespace
+
+import autoray
+
+import named_einsum.blas
+import named_einsum.cache
+import named_einsum.exceptions
+import named_einsum.paths
+
+_CONSTANTS_CACHE = named_einsum.cache.register('constants')
+
+
+def split_plan(plan, positions):
+    """
+    Split a planned contraction into a constant part and the remainder.
+
+    The constant operands are contracted to one intermediate, which keeps the axes that the
+    other operands or the output still need.  The remainder contracts the other operands
+    together with that intermediate, which is passed last.
+
+    Parameters
+    ----------
+    plan : SimpleNamespace
+      Plan returned by ``Expression.plan``
+    positions : tuple of int
+      Positions of the constant operands
+
+    Returns
+    -------
+    SimpleNamespace
+      ``axes`` of the intermediate, ``path`` to contract the constant operands along (or None
+      for a single einsum call), ``subscripts`` of that call, ``plan`` of the remainder and
+      ``compiled``, its einsum string (None if it has more axes than letters)
+    """
+    constant_axes = [plan.input_axes[k] for k in positions]
+    other_axes = [axes for k, axes in enumerate(plan.input_axes) if k not in positions]
+    needed = set(plan.output_axes).union(*other_axes)
+    axes = tuple(axis for axis in dict.fromkeys(
+        axis for operand_axes in constant_axes for axis in operand_axes
+    ) if axis in needed)
+
+    # Constants are contracted once, so a good path matters more than the cost of finding it
+    path = subscripts = None
+    if len(constant_axes) > 2:
+        path = named_einsum.paths.greedy_path(constant_axes, axes, plan.axis_sizes)
+    else:
+        subscripts = named_einsum.paths.einsum_subscripts(constant_axes, axes)
+
+    input_axes = other_axes + [list(axes)]
+    remaining = set(plan.output_axes).union(*input_axes)
+    new_plan = SimpleNamespace(
+        axis_sizes={axis: size for axis, size in plan.axis_sizes.items() if axis in remaining},
+        input_axes=input_axes,
+        input_shapes=[None] * len(input_axes),
+        output_axes=plan.output_axes,
+        blas=None,
+    )
+    if len(input_axes) == 2:
+        new_plan.blas = named_einsum.blas.find(*input_axes, plan.output_axes, plan.axis_sizes)
+    try:
+        compiled = named_einsum.paths.einsum_subscripts(input_axes, plan.output_axes)
+    except named_einsum.exceptions.TooManyAxesError:
+        compiled = None
+    return SimpleNamespace(axes=axes, path=path, subscripts=subscripts, plan=new_plan,
+                           compiled=compiled)
+
+
+def _positions(expression, constants):
+    """Returns the positions of the constant variables of an expression, in order."""
+    names = [layout.name for layout in expression.input_layouts]
+    for name in constants:
+        if name not in names:
+            raise named_einsum.exceptions.UnknownVariableError(name)
+    # A variable that appears more than once is constant everywhere it appears
+    return tuple(k for k, name in enumerate(names) if name in constants)
+
+
+def apply(expression, plan, given, arrays, constants, backend):
+    """
+    Replace the constant operands of a contraction by their (memoised) intermediate.
+
+    The intermediate is reused while the constant operands are the same objects, with the
+    same versions, as when it was computed.  Only the latest intermediate is kept for each
+    expression, set of constants and input shapes.
+
+    Parameters
+    ----------
+    expression : Expression
+      Expression being evaluated
+    plan : SimpleNamespace
+      Plan returned by ``Expression.plan``
+    given : list of array
+      Operands as given, which constant operands are identified by
+    arrays : list of array
+      Operands, with product axes already expanded
+    constants : iterable or dict of string
+      Names of the constant variables, or a dict from their names to versions, which must
+      change whenever the operand is modified in place
+    backend : string
+      Name of the array backend
+
+    Returns
+    -------
+    tuple
+      Operands, plan and einsum string (None if it has more axes than letters) of the
+      remaining contraction
+    """
+    positions = _positions(expression, constants)
+    constant_arrays = tuple(given[k] for k in positions)
+    if isinstance(constants, dict):
+        names = [expression.input_layouts[k].name for k in positions]
+        versions = tuple(constants[name] for name in names)
+    else:
+        versions = tuple(getattr(array, '_version', None) for array in constant_arrays)
+
+    key = (expression.subscripts, positions, tuple(tuple(array.shape) for array in given))
+    entry = _CONSTANTS_CACHE.get(key)
+    if entry is None:
+        entry = SimpleNamespace(split=split_plan(plan, positions), state=None)
+        _CONSTANTS_CACHE.put(key, entry)
+
+    # The operands, versions and intermediate are replaced together, for concurrent calls
+    state = entry.state
+    if (state is None or state[1] != versions or
+            any(a is not b for a, b in zip(state[0], constant_arrays))):
+        split = entry.split
+        backend_einsum = autoray.get_lib_fn(backend, 'einsum')
+        expanded = [arrays[k] for k in positions]
+        if split.path is None:
+            intermediate = backend_einsum(split.subscripts, *expanded)
+        else:
+            intermediate = named_einsum.paths.contract_path(
+                backend_einsum, expanded, [plan.input_axes[k] for k in positions],
+                split.axes, split.path, backend
+            )
+        state = entry.state = (constant_arrays, versions, intermediate)
+
+    operands = [array for k, array in enumerate(arrays) if k not in positions]
+    return operands + [state[2]], entry.split.plan, entry.split.compiled
@@ -0,0 +1,92 @@
+"""Estimates of the cost and memory of contractions, computed from shapes alone."""
+from types import SimpleNamespace
+
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.paths
+import named_einsum.slicing
+
+
+def _size(axes, axis_sizes):
+    size = 1
+    for axis in axes:
+        size *= axis_sizes[axis]
+    return size
+
+
+def _shape_and_itemsize(operand):
+    """Returns the shape of an array or shape, and the itemsize of arrays (None for shapes)."""
+    if isinstance(operand, (tuple, list)):
+        return tuple(operand), None
+    dtype = getattr(operand, 'dtype', None)
+    return tuple(operand.shape), getattr(dtype, 'itemsize', None)
+
+
+def estimate(subscripts, *shapes_or_arrays, optimize=False, itemsize=None):
+    """
+    Estimate the cost and memory of a contraction without touching any data.
+
+    Parameters
+    ----------
+    subscripts : string
+      Readable einsum subscripts string
+    shapes_or_arrays : tuple or array
+      Shape (as a tuple or list) or array of each input variable
+    optimize : bool, string or list of tuple, optional
+      Contraction path strategy, see ``Expression.__call__``.  By default the cost of a single
+      backend einsum call is estimated, unless the expression has too many axes for one.
+    itemsize : int, optional
+      Bytes per element, by default the largest itemsize of the given arrays
+
+    Returns
+    -------
+    SimpleNamespace
+      ``flops`` (multiply-adds), ``largest_intermediate`` (elements of the largest array
+      allocated, including the output), ``output_size`` (elements), ``output_shape``,
+      ``axis_sizes`` (size of every named axis), ``path`` (pairwise path, or None for a single
+      einsum call) and ``peak_bytes`` (memory allocated at once, or None if the itemsize is
+      unknown)
+    """
+    expression = named_einsum.prepare(subscripts)
+    operands = [_shape_and_itemsize(operand) for operand in shapes_or_arrays]
+    shapes = [shape for shape, _ in operands]
+    itemsizes = [size for _, size in operands if size is not None]
+    if itemsize is None and itemsizes:
+        itemsize = max(itemsizes)
+
+    plan = expression.plan(shapes)
+    if plan.output_axes is None:
+        raise named_einsum.exceptions.EllipsisBroadcastError('cannot estimate the contraction')
+
+    output_size = _size(plan.output_axes, plan.axis_sizes)
+    path = None
+    if expression.compiled is None:
+        # Expressions with too many axes for a single einsum are always contracted pairwise
+        path = expression.contraction_path(plan, 'greedy' if optimize is False else optimize)
+    elif optimize is not False and len(shapes) > 2:
+        path = expression.contraction_path(plan, optimize)
+    else:
+        named_einsum.paths.check_optimize(optimize, expression.num_inputs)
+
+    if path is not None:
+        flops, largest = named_einsum.paths.path_cost(
+            plan.input_axes, plan.output_axes, plan.axis_sizes, path
+        )
+        largest = max(largest, output_size)
+    else:
+        # A single einsum call visits every combination of axis values once
+        flops = _size(plan.axis_sizes, plan.axis_sizes)
+        largest = output_size
+
+    flat_shape = tuple(plan.axis_sizes[name] for name in plan.output_axes)
+    return SimpleNamespace(
+        flops=flops,
+        largest_intermediate=largest,
+        output_size=output_size,
+        output_shape=(() if expression.output_layout is None
+                      else expression.output_layout.unflattened_shape(flat_shape)),
+        axis_sizes=dict(plan.axis_sizes),
+        path=path,
+        peak_bytes=(None if itemsize is None
+                    else named_einsum.slicing.peak_elements(plan, path) * itemsize),
+    )
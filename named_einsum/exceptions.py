@@ -60,3 +60,124 @@ class TooManyAxesError(NamedEinsumError):
             f'Axis {axis_name}, unique index {idx}, ' +
             f'exceeds available characters for einsum: {len(VALID_CHARACTERS)}'
         )
+
+
+class InvalidPathError(NamedEinsumError):
+    """A contraction path or optimization strategy could not be used for an expression."""
+
+    def __init__(self, path, reason):
+        self.path = path
+        self.reason = reason
+        super().__init__(f'Invalid contraction path {path}: {reason}')
+
+
+class UnknownAxisError(NamedEinsumError):
+    """An axis was requested by name that does not appear in the expression."""
+
+    def __init__(self, axis):
+        self.axis = axis
+        super().__init__(f'Axis {axis} not found in expression.')
+
+
+class SlicingError(NamedEinsumError):
+    """A contraction could not be split into slices as requested."""
+
+    def __init__(self, reason):
+        self.reason = reason
+        super().__init__(f'Unable to slice contraction: {reason}')
+
+
+class MemoryLimitError(SlicingError):
+    """No way of slicing a contraction was found that fits within a memory limit."""
+
+    def __init__(self, limit, required):
+        self.limit = limit
+        self.required = required
+        super().__init__(
+            f'at least {required} bytes are needed, which exceeds the memory limit of ' +
+            f'{limit} bytes'
+        )
+
+
+class KernelSizeError(NamedEinsumError):
+    """A contraction is too large to be unrolled into a generated kernel."""
+
+    def __init__(self, num_terms, limit):
+        self.num_terms = num_terms
+        self.limit = limit
+        super().__init__(
+            f'Contraction has {num_terms} terms, which exceeds the limit of {limit} terms ' +
+            'for generated kernels.'
+        )
+
+
+class KernelShapeError(NamedEinsumError):
+    """Operands were given to a generated kernel whose shapes differ from its fixed shapes."""
+
+    def __init__(self, expected, found):
+        self.expected = expected
+        self.found = found
+        super().__init__(f'Kernel operands have shapes {found}, expected a common batch size '
+                         f'followed by {expected}.')
+
+
+class UnknownVariableError(NamedEinsumError):
+    """A variable was given by name that does not appear in the expression."""
+
+    def __init__(self, variable):
+        self.variable = variable
+        super().__init__(f'Variable {variable} not found in expression.')
+
+
+class OutputShapeError(NamedEinsumError):
+    """An output array was given whose shape does not match the result of the expression."""
+
+    def __init__(self, expected, found):
+        self.expected = expected
+        self.found = found
+        super().__init__(f'Output array has shape {found}, expected {expected}.')
+
+
+class ReshapeCopyError(NamedEinsumError):
+    """An array could not be reshaped to (or from) its product axes without copying."""
+
+    def __init__(self, variable, shape):
+        self.variable = variable
+        self.shape = shape
+        super().__init__(f'Reshaping {variable} to {shape} would copy it.')
+
+
+class ReshapeCopyWarning(UserWarning):
+    """An array was copied to reshape it to (or from) its product axes."""
+
+
+class MissingOperandError(NamedEinsumError):
+    """No operand was given for an input variable of an expression."""
+
+    def __init__(self, variable):
+        self.variable = variable
+        super().__init__(f'No operand given for variable {variable}.')
+
+
+class EllipsisBroadcastError(NamedEinsumError):
+    """Inputs have differing numbers of ellipsis axes, so their axes cannot be lined up."""
+
+    def __init__(self, reason):
+        self.reason = reason
+        super().__init__(f'Inputs have differing numbers of ellipsis axes: {reason}.')
+
+
+class BindingError(NamedEinsumError):
+    """Operands could not be bound to an expression and contracted ahead of time."""
+
+    def __init__(self, reason):
+        self.reason = reason
+        super().__init__(f'Unable to bind operands: {reason}')
+
+
+class SparseOperandError(NamedEinsumError):
+    """An option of einsum is not supported for sparse operands."""
+
+    def __init__(self, reason):
+        self.reason = reason
+        super().__init__(f'Unsupported for sparse operands: {reason}.')
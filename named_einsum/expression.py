@@ -0,0 +1,467 @@
+"""Prepared named einsum expressions with precomputed execution layouts."""
+from types import SimpleNamespace
+import concurrent.futures
+import functools
+import itertools
+import os
+
+import autoray
+
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.cache
+import named_einsum.layout
+import named_einsum.blas
+import named_einsum.constants
+import named_einsum.paths
+import named_einsum.persistent
+import named_einsum.profiling
+import named_einsum.rewrite
+import named_einsum.slicing
+import named_einsum.sparsity
+import named_einsum.processes
+
+_PATH_CACHE = named_einsum.cache.register('paths')
+_PLAN_CACHE = named_einsum.cache.register('plans')
+
+
+def path_signature(plan):
+    """
+    Returns the axes of a plan numbered by first appearance, with their sizes.
+
+    The signature determines the contraction paths of a plan, whatever its axes are named.  It
+    is computed once and kept on the (cached) plan.
+    """
+    signature = getattr(plan, 'path_signature', None)
+    if signature is None:
+        numbers = {}
+        for axis in itertools.chain(*plan.input_axes, plan.output_axes or ()):
+            numbers.setdefault(axis, len(numbers))
+        signature = (tuple(tuple(numbers[axis] for axis in axes) for axes in plan.input_axes),
+                     tuple(numbers[axis] for axis in plan.output_axes or ()),
+                     tuple(plan.axis_sizes[axis] for axis in numbers))
+        plan.path_signature = signature
+    return signature
+
+
+def _is_valid_path(path, num_inputs):
+    """Returns whether a (loaded) path contracts some number of operands."""
+    try:
+        named_einsum.paths.validate_path(path, num_inputs)
+    except (named_einsum.exceptions.InvalidPathError, TypeError):
+        return False
+    return True
+
+
+def call_options(options):
+    """
+    Collect the options of a call of an expression, see ``Expression.__call__``.
+
+    Parameters
+    ----------
+    options : dict
+      Keyword arguments of the call other than ``out``
+
+    Returns
+    -------
+    SimpleNamespace
+      The options, with None for those not given, and ``kwargs`` holding the remaining keyword
+      arguments, to be passed to the backend einsum.  Also whether slices are evaluated on a
+      pool of workers (``parallel``) and how many at the same time (``concurrency``), whether
+      the contraction is to be ``sliced`` if needed, and the number of slices asked for
+      (``slice_count``, by default one per worker when evaluated in parallel).
+    """
+    options = dict(options)
+    optimize = options.pop('optimize', False)
+    # None is the same as False, and no constants (i.e. an empty list or dict) as None
+    result = SimpleNamespace(
+        optimize=False if optimize is None else optimize,
+        constants=options.pop('constants', None) or None,
+        rewrite=options.pop('rewrite', True),
+        on_copy=options.pop('on_copy', None),
+        **{name: options.pop(name, None) for name in
+           ('memory_limit', 'slice_over', 'num_slices', 'workers', 'executor')},
+    )
+    result.kwargs = options
+    result.parallel = result.workers is not None or result.executor is not None
+    result.sliced = (result.parallel or result.memory_limit is not None or
+                     result.slice_over is not None or result.num_slices is not None)
+    result.concurrency = (result.workers or os.cpu_count()) if result.parallel else 1
+    result.slice_count = result.num_slices or (result.concurrency if result.parallel else None)
+    return result
+
+
+class Expression:
+    """
+    A named einsum expression that has been parsed and laid out ahead of time.
+
+    Parsing, ellipsis location and the product axis layout of every variable are
+    computed once on construction, so calling the expression only has to check the
+    shapes of its operands before dispatching to the backend einsum.
+
+    Expressions with more unique axes than there are einsum letters have no ``compiled``
+    string, and are always contracted pairwise, with letters local to each pairwise step.
+
+    Parameters
+    ----------
+    subscripts : string
+      Readable einsum subscripts string
+    """
+
+    def __init__(self, subscripts):
+        self.subscripts = subscripts
+        try:
+            self.compiled, self.parsed = named_einsum.translate(subscripts, True)
+        except named_einsum.exceptions.TooManyAxesError:
+            self.compiled, self.parsed = None, named_einsum.parse(subscripts)
+        self.key = named_einsum.cache.canonical_form(self.parsed)
+        self.input_layouts = [named_einsum.layout.VariableLayout(var)
+                              for var in self.parsed.input_variables]
+        self.output_layout = (
+            None if self.parsed.output_variable is None
+            else named_einsum.layout.VariableLayout(self.parsed.output_variable, 'output')
+        )
+        self._reshape_output = self.output_layout is not None and self.output_layout.has_product
+
+    def __repr__(self):
+        """String representation of this expression."""
+        return f'Expression({self.compiled or self.subscripts!r})'
+
+    @property
+    def num_inputs(self):
+        """Returns the number of input variables of this expression."""
+        return len(self.input_layouts)
+
+    def plan(self, shapes):
+        """
+        Check a list of input shapes, returning the plan computed by ``plan_shapes``.
+
+        Plans are cached by the subscripts and input shapes, so repeated calls with the same
+        shapes skip the shape checks.  The returned plan is shared and must not be modified.
+
+        Plans of two inputs also hold a ``blas`` recipe (see ``blas.matmul_recipe``) if the
+        contraction is a matrix product large enough to be dispatched to matmul, or None.  Every
+        plan holds a ``rewrite`` of the contraction (see ``rewrite.rewrite_plan``), or None.
+        """
+        try:
+            key = (self.subscripts, tuple(shapes))
+            plan = _PLAN_CACHE.get(key)
+        except TypeError:
+            # Shapes given as lists
+            key = (self.subscripts, tuple(tuple(shape) for shape in shapes))
+            plan = _PLAN_CACHE.get(key)
+        if plan is None:
+            plan = named_einsum.layout.plan_shapes(self.input_layouts, shapes, self.output_layout)
+            plan.blas = None
+            if len(shapes) == 2 and plan.output_axes is not None:
+                plan.blas = named_einsum.blas.find(*plan.input_axes, plan.output_axes,
+                                                   plan.axis_sizes)
+            plan.rewrite = named_einsum.rewrite.rewrite_plan(plan)
+            _PLAN_CACHE.put(key, plan)
+        return plan
+
+    def contraction_path(self, plan, optimize='greedy'):
+        """
+        Find a pairwise contraction path for the shapes in a plan.
+
+        Paths found by a search are cached per expression and ``path_signature`` of the plan,
+        so plans that were rewritten or split (which have other operands than the expression)
+        are cached by the operands they actually contract.
+
+        Parameters
+        ----------
+        plan : SimpleNamespace
+          Plan returned by ``plan``
+        optimize : bool, string or list of tuple
+          ``True``/``'greedy'``, ``'optimal'`` or an explicit path of position pairs
+
+        Returns
+        -------
+        list of tuple
+          Pairs of operand positions to contract
+        """
+        if not isinstance(optimize, (bool, str)):
+            return named_einsum.paths.validate_path(optimize, self.num_inputs)
+
+        key = (self.key, optimize, path_signature(plan))
+        path = _PATH_CACHE.get(key)
+        if path is None:
+            path = named_einsum.persistent.load(
+                'paths', key, lambda loaded: _is_valid_path(loaded, len(plan.input_axes))
+            )
+            if path is None:
+                path = named_einsum.paths.find_path(
+                    plan.input_axes, plan.output_axes, plan.axis_sizes, optimize
+                )
+                named_einsum.persistent.store('paths', key, path)
+            _PATH_CACHE.put(key, path)
+        return path
+
+    def _output_view(self, out, flat_shape):
+        """Check the shape of an output array, returning a flat view of it."""
+        shape = (() if self.output_layout is None
+                 else self.output_layout.unflattened_shape(flat_shape))
+        if tuple(out.shape) != tuple(shape):
+            raise named_einsum.exceptions.OutputShapeError(tuple(shape), tuple(out.shape))
+        flat_out = named_einsum.layout.reshape_view(out, tuple(flat_shape))
+        if flat_out is None:
+            raise named_einsum.exceptions.ReshapeCopyError('out', tuple(flat_shape))
+        return flat_out
+
+    def __call__(self, *arrays, out=None, **options):
+        """
+        Evaluate the expression on some input arrays.
+
+        If any operand is sparse (scipy.sparse or pydata sparse), the contraction is done by
+        ``sparsity.contract`` instead, which keeps it sparse for as long as possible.  It
+        supports none of ``memory_limit``, ``slice_over``, ``num_slices``, ``workers``,
+        ``executor``, ``out``, ``constants`` and extra keyword arguments.
+
+        Options other than ``out`` are collected by ``call_options``.
+
+        Parameters
+        ----------
+        arrays : array
+          Input arrays, one per input variable
+        optimize : bool, string or list of tuple, optional
+          Contract the operands pairwise along a path, which is either searched for with
+          ``True``/``'greedy'`` or ``'optimal'``, or given explicitly as a list of position
+          pairs.  By default (or with None) all operands are passed to a single backend einsum
+          call.
+        memory_limit : int, optional
+          Maximum number of bytes to allocate at once.  If the contraction would need more,
+          it is evaluated in slices along the named axis that needs the fewest slices.
+        slice_over : string, optional
+          Name of the axis to slice along, instead of picking one automatically
+        num_slices : int, optional
+          Number of slices to use, instead of picking the fewest within ``memory_limit``
+        workers : int, optional
+          Evaluate slices on a pool of this many threads.  Unless ``num_slices`` is given, the
+          contraction is split into one slice per worker, preferably along an output axis.
+          Slices along a contracted axis are combined with a tree reduction.
+        executor : concurrent.futures.Executor or string, optional
+          Evaluate slices on an existing executor instead of a new thread pool, or on a new
+          pool of ``workers`` with ``'threads'`` or ``'processes'``.  With processes (or a
+          ``ProcessPoolExecutor``), numpy operands and the output are placed in shared memory.
+        out : array, optional
+          Array to write the output into, which must have the shape of the output.  Product
+          axes are written through a flat view of ``out``, so it must be reshapeable without
+          copying.  Numpy outputs of a single einsum call are written in place by the backend;
+          otherwise the result is copied in.
+        on_copy : string, optional
+          Either ``'warn'`` or ``'raise'`` (``ReshapeCopyError``) when reshaping an input to
+          expand its product axes, or the output to collapse them, would copy it.  By default
+          reshapes copy silently when they have to (i.e. for non-contiguous arrays).
+        rewrite : bool, optional
+          Simplify the contraction first, by summing out axes that only one input has, squeezing
+          size-1 axes, folding scalar inputs and reordering inputs (see
+          ``rewrite.rewrite_plan``).  Rewriting is skipped for explicit paths, extra keyword
+          arguments and ``slice_over`` axes that it would sum out.
+        constants : iterable or dict of string, optional
+          Names of input variables whose operands do not change between calls.  They are
+          contracted to an intermediate once, which later calls reuse while the operands are
+          the same objects (see ``constants.apply``).  Operands modified in place need a
+          version instead, given as a dict from variable names to versions; torch tensors
+          count their own versions.
+        kwargs
+          Extra keyword arguments passed to the backend einsum
+
+        Returns
+        -------
+        array
+          Output of einsum
+        """
+        options = call_options(options) if options else _DEFAULT_OPTIONS
+        if named_einsum.sparsity.has_sparse(arrays):
+            return self._contract_sparse(arrays, out, options)
+
+        record = owned = None
+        if named_einsum.profiling.ENABLED:
+            record, owned = named_einsum.profiling.begin(self.compiled or self.subscripts,
+                                                         arrays)
+
+        plan = self.plan([array.shape for array in arrays])
+        if record is not None:
+            record.phase('plan')
+        reshaped = self._reshape_inputs(arrays, plan, options.on_copy)
+        if record is not None:
+            record.phase('reshape_inputs')
+
+        call = self._plan_call(plan, arrays, reshaped, options)
+        flat_out = None
+        if out is not None and call.plan.output_axes is not None:
+            flat_out = self._output_view(
+                out, tuple(call.plan.axis_sizes[name] for name in call.plan.output_axes)
+            )
+        if record is not None:
+            record.phase('path')
+
+        output = self._contract(call, flat_out, options.kwargs)
+        if record is not None:
+            record.phase('contract')
+            record.complete(call.plan, call.backend, output, call.path, call.slices,
+                            max(array.dtype.itemsize for array in call.arrays), call.workers)
+
+        output = self._write_output(output, out, flat_out, options.on_copy)
+        if record is not None:
+            record.phase('reshape_output')
+            named_einsum.profiling.end(record, owned)
+        return output
+
+    def _contract_sparse(self, arrays, out, options):
+        """Contract operands of which some are sparse, see ``sparsity.contract``."""
+        given = {'memory_limit': options.memory_limit, 'slice_over': options.slice_over,
+                 'num_slices': options.num_slices, 'workers': options.workers,
+                 'executor': options.executor, 'out': out, 'constants': options.constants,
+                 **options.kwargs}
+        unsupported = [name for name, value in given.items() if value is not None]
+        if unsupported:
+            raise named_einsum.exceptions.SparseOperandError(', '.join(unsupported))
+        return named_einsum.sparsity.contract(self, arrays, options.optimize)
+
+    def _reshape_inputs(self, arrays, plan, on_copy):
+        """Expand the product axes of the inputs, as planned."""
+        if on_copy is None:
+            return [array if shape is None else array.reshape(shape)
+                    for array, shape in zip(arrays, plan.input_shapes)]
+        return [array if shape is None else
+                named_einsum.layout.checked_reshape(array, shape, layout.name, on_copy)
+                for array, shape, layout in zip(arrays, plan.input_shapes, self.input_layouts)]
+
+    def _plan_call(self, plan, given, arrays, options):
+        """
+        Decide how a call is contracted.
+
+        Parameters
+        ----------
+        plan : SimpleNamespace
+          Plan of the input shapes, returned by ``plan``
+        given : list of array
+          Operands as given to the call
+        arrays : list of array
+          Operands with their product axes expanded
+        options : SimpleNamespace
+          Options of the call, returned by ``call_options``
+
+        Returns
+        -------
+        SimpleNamespace
+          The ``arrays`` and ``plan`` to contract (after any rewrite or constants), their
+          ``backend``, ``compiled`` einsum string, ``path`` (None for a single call), matmul
+          ``recipe`` (or None) and ``slices`` (see ``slicing.choose_slices``).  Slices are
+          evaluated on the ``executor`` (or a new pool if it is None and they are
+          ``parallel``) by a number of ``workers``, which are ``processes`` or threads.
+        """
+        call = SimpleNamespace(arrays=arrays, plan=plan, backend=autoray.infer_backend(arrays[0]),
+                               compiled=self.compiled, path=None, recipe=None, slices=None,
+                               workers=1)
+        self._simplify(call, given, options)
+        call.path = self._choose_path(call, options.optimize)
+        if call.path is None and not options.kwargs and call.backend in named_einsum.blas.BACKENDS:
+            # Matrix products are dispatched to matmul, which is faster than einsum on some
+            # backends
+            call.recipe = call.plan.blas
+        if options.sliced:
+            executor = options.executor
+            if isinstance(executor, str) and executor not in ('threads', 'processes'):
+                raise named_einsum.exceptions.SlicingError(f'unknown executor {executor}')
+            call.executor = None if isinstance(executor, str) else executor
+            call.processes = (executor == 'processes' or
+                              isinstance(executor, concurrent.futures.ProcessPoolExecutor))
+            call.parallel, call.workers = options.parallel, options.concurrency
+            call.slices = named_einsum.slicing.choose_slices(
+                call.plan, max(array.dtype.itemsize for array in call.arrays), call.path, options
+            )
+        return call
+
+    def _simplify(self, call, given, options):
+        """Contract constant operands separately, or rewrite the contraction, if asked to."""
+        plan = call.plan
+        if options.constants is not None:
+            if not isinstance(options.optimize, (bool, str)):
+                raise named_einsum.exceptions.InvalidPathError(
+                    options.optimize, 'explicit paths cannot be combined with constants'
+                )
+            if plan.output_axes is None:
+                raise named_einsum.exceptions.EllipsisBroadcastError(
+                    'cannot contract constants separately'
+                )
+            call.arrays, call.plan, compiled = named_einsum.constants.apply(
+                self, plan, given, call.arrays, options.constants, call.backend
+            )
+        else:
+            rewritten = (getattr(plan, 'rewrite', None) if options.rewrite and not options.kwargs
+                         else None)
+            if (rewritten is None or not isinstance(options.optimize, (bool, str)) or
+                    (options.slice_over is not None and
+                     options.slice_over.lower() not in rewritten.plan.axis_sizes)):
+                return
+            call.arrays = named_einsum.rewrite.apply(rewritten, call.arrays, call.backend)
+            call.plan, compiled = rewritten.plan, rewritten.compiled
+        # Expressions with too many axes for one einsum call stay pairwise once simplified
+        if self.compiled is not None:
+            call.compiled = compiled
+
+    def _choose_path(self, call, optimize):
+        """Returns the pairwise contraction path of a call, or None for a single einsum call."""
+        if call.compiled is None:
+            if call.plan.output_axes is None:
+                # Broadcasting ellipses needs a single einsum call, so report the missing letters
+                named_einsum.compile(self.parsed)
+            return self.contraction_path(call.plan, 'greedy' if optimize is False else optimize)
+        if optimize is False:
+            return None
+        if len(call.arrays) > 2 and call.plan.output_axes is not None:
+            return self.contraction_path(call.plan, optimize)
+        # A single einsum call is used instead, but only for a valid optimize argument
+        named_einsum.paths.check_optimize(optimize, self.num_inputs)
+        return None
+
+    @staticmethod
+    def _contract(call, flat_out, kwargs):
+        """Contract the operands of a call as planned by ``_plan_call``."""
+        backend_einsum = autoray.get_lib_fn(call.backend, 'einsum')
+        if call.slices is None:
+            if call.path is not None or call.recipe is not None:
+                return _contract_operands(call, backend_einsum, kwargs, *call.arrays)
+            if flat_out is not None and call.backend == 'numpy':
+                return backend_einsum(call.compiled, *call.arrays, out=flat_out, **kwargs)
+            return backend_einsum(call.compiled, *call.arrays, **kwargs)
+        if call.processes:
+            return named_einsum.processes.contract_shared(call, **kwargs)
+
+        contract = functools.partial(_contract_operands, call, backend_einsum, kwargs)
+        if call.parallel and call.executor is None:
+            with concurrent.futures.ThreadPoolExecutor(call.workers) as pool:
+                return named_einsum.slicing.contract_sliced(contract, call, pool, flat_out)
+        return named_einsum.slicing.contract_sliced(contract, call, call.executor, flat_out)
+
+    def _write_output(self, output, out, flat_out, on_copy):
+        """Copy the output into ``out``, or collapse its product axes."""
+        if out is not None:
+            if flat_out is None:
+                flat_out = self._output_view(out, output.shape)
+            if output is not flat_out:
+                flat_out[...] = output
+            return out
+        if self._reshape_output:
+            return named_einsum.layout.checked_reshape(
+                output, self.output_layout.unflattened_shape(output.shape),
+                self.output_layout.name, on_copy
+            )
+        return output
+
+
+def _contract_operands(call, backend_einsum, kwargs, *operands):
+    """Contract some operands (or slices of them) as planned for a call."""
+    if call.recipe is not None:
+        return named_einsum.blas.contract(call.backend, call.recipe, *operands)
+    if call.path is None:
+        return backend_einsum(call.compiled, *operands, **kwargs)
+    return named_einsum.paths.contract_path(
+        backend_einsum, operands, call.plan.input_axes, call.plan.output_axes, call.path,
+        call.backend, **kwargs
+    )
+
+
+_DEFAULT_OPTIONS = call_options({})
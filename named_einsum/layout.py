@@ -0,0 +1,226 @@
+"""Axis layouts of variables, and checking and reshaping arrays against them."""
+from types import SimpleNamespace
+import warnings
+
+import autoray
+
+import named_einsum.parser
+import named_einsum.exceptions
+
+
+def _product(values):
+    out = 1
+    for value in values:
+        out *= value
+    return out
+
+
+def reshape_view(array, shape):
+    """
+    Reshape an array without copying it.
+
+    Returns
+    -------
+    array or None
+      A view of the array with the new shape, or None if the reshape would need a copy
+    """
+    backend = autoray.infer_backend(array)
+    if backend == 'numpy':
+        # Assigning the shape of a view raises instead of silently copying
+        view = array.view()
+        try:
+            view.shape = shape
+        except AttributeError:
+            return None
+        return view
+    if backend == 'torch':
+        try:
+            return array.view(shape)
+        except RuntimeError:
+            return None
+    # Other backends (i.e. jax) have immutable arrays, where a reshape is never observable
+    return array.reshape(shape)
+
+
+def checked_reshape(array, shape, name, on_copy):
+    """
+    Reshape an array, warning or raising if that would copy it.
+
+    Parameters
+    ----------
+    array : array
+      Array to reshape
+    shape : tuple of int
+      New shape
+    name : string
+      Name of the variable, for messages
+    on_copy : string or None
+      ``'warn'`` or ``'raise'`` if the reshape would copy, or None to copy silently
+    """
+    if on_copy is None:
+        return array.reshape(shape)
+    if on_copy not in ('warn', 'raise'):
+        raise ValueError(f'on_copy must be None, "warn" or "raise", not {on_copy!r}')
+
+    view = reshape_view(array, shape)
+    if view is not None:
+        return view
+    if on_copy == 'raise':
+        raise named_einsum.exceptions.ReshapeCopyError(name, tuple(shape))
+    warnings.warn(f'Reshaping {name} to {tuple(shape)} copies it.',
+                  named_einsum.exceptions.ReshapeCopyWarning, stacklevel=3)
+    return array.reshape(shape)
+
+
+class VariableLayout:
+    """
+    Precomputed axis layout of a single variable.
+
+    Each axis of the variable is stored as a group of axis names, where product axes
+    contribute a group of more than one name.  Groups are split around the (optional)
+    ellipsis so that materializing the layout for a given number of dimensions is cheap.
+
+    Parameters
+    ----------
+    variable : Variable
+      Parsed variable
+    default_name : string, optional
+      Name to use in messages if the variable has none (i.e. an unnamed output)
+    """
+
+    def __init__(self, variable, default_name=None):
+        self.name = variable.name or default_name
+        self.num_axes = len(variable.axes)
+        self.ellipsis = -1
+        for i, axis in enumerate(variable.axes):
+            if isinstance(axis, named_einsum.parser.EllipsisAxis):
+                if self.ellipsis != -1:
+                    raise named_einsum.exceptions.AmbiguousEllipsesError(variable.name)
+                self.ellipsis = i
+
+        groups = [tuple(axis.axis_names) for axis in variable.axes]
+        if self.ellipsis == -1:
+            self.head = groups
+            self.tail = []
+        else:
+            self.head = groups[:self.ellipsis]
+            self.tail = groups[self.ellipsis + 1:]
+        self.has_product = any(len(group) > 1 for group in groups)
+        self.flat_names = [name for group in groups for name in group]
+
+    def materialize(self, ndim):
+        """Returns the group of axis names for each of the ``ndim`` dimensions."""
+        if self.ellipsis == -1:
+            if ndim != self.num_axes:
+                raise named_einsum.exceptions.InconsistentShapeDefinitionError(
+                    self.name, self.num_axes, ndim
+                )
+            return self.head
+
+        num_ellipsis = ndim - len(self.head) - len(self.tail)
+        if num_ellipsis < 0:
+            raise named_einsum.exceptions.InconsistentShapeDefinitionError(
+                self.name, self.num_axes - 1, ndim
+            )
+        return (self.head +
+                [(f'!ellipsis_{j}',) for j in range(num_ellipsis)] +
+                self.tail)
+
+    def unflattened_shape(self, shape):
+        """Collapse a flat shape (one dimension per named axis) into this layout."""
+        if not self.has_product:
+            return tuple(shape)
+
+        num_tail = sum(len(group) for group in self.tail)
+        if self.ellipsis == -1:
+            groups = self.head
+        else:
+            num_head = sum(len(group) for group in self.head)
+            num_ellipsis = len(shape) - num_head - num_tail
+            groups = self.head + [('',)] * num_ellipsis + self.tail
+
+        output_shape = []
+        shape_ptr = 0
+        for group in groups:
+            output_shape.append(_product(shape[shape_ptr:shape_ptr + len(group)]))
+            shape_ptr += len(group)
+        return tuple(output_shape)
+
+
+def plan_shapes(layouts, shapes, output_layout=None):
+    """
+    Check input shapes against variable layouts without touching any data.
+
+    Parameters
+    ----------
+    layouts : list of VariableLayout
+      Layouts of the input variables
+    shapes : list of tuple
+      Shapes of the input arrays
+    output_layout : VariableLayout, optional
+      Layout of the output variable, or None for a scalar output
+
+    Returns
+    -------
+    SimpleNamespace
+      ``axis_sizes`` maps every axis name to its size, ``input_axes`` holds the flat axis
+      names of each input after product axes have been expanded, and ``input_shapes`` holds
+      the shape that each input must be reshaped to (or None if no reshape is needed).
+      ``output_axes`` holds the flat axis names of the output, or None if the inputs have
+      differing numbers of ellipsis axes.
+    """
+    axis_sizes = {}
+    materialized = []
+
+    # Named axes define the axis sizes...
+    for layout, shape in zip(layouts, shapes):
+        groups = layout.materialize(len(shape))
+        for group, size in zip(groups, shape):
+            if len(group) != 1:
+                continue
+            previous_size = axis_sizes.setdefault(group[0], size)
+            if previous_size != size:
+                raise named_einsum.exceptions.InconsistentAxisSizeError(
+                    group[0], (previous_size, size)
+                )
+        materialized.append(groups)
+
+    # ... which product axes must then be consistent with.
+    input_axes = []
+    input_shapes = []
+    for layout, groups, shape in zip(layouts, materialized, shapes):
+        if layout.has_product:
+            for group, size in zip(groups, shape):
+                if len(group) == 1:
+                    continue
+                product_size = _product(axis_sizes[name] for name in group)
+                if product_size != size:
+                    raise named_einsum.exceptions.InconsistentAxisSizeError(
+                        f'Product ({"*".join(group)})', (product_size, size)
+                    )
+            input_shapes.append(tuple(axis_sizes[name] for group in groups for name in group))
+        else:
+            input_shapes.append(None)
+        input_axes.append(layout.flat_names if layout.ellipsis == -1
+                          else [name for group in groups for name in group])
+
+    # Ellipsis axes are named by position, which only lines up if every input agrees
+    ellipsis_ranks = {len(groups) - len(layout.head) - len(layout.tail)
+                      for layout, groups in zip(layouts, materialized) if layout.ellipsis != -1}
+    if len(ellipsis_ranks) > 1:
+        output_axes = None
+    elif output_layout is None:
+        output_axes = []
+    else:
+        num_ellipsis = max(ellipsis_ranks, default=0) if output_layout.ellipsis != -1 else 0
+        groups = output_layout.materialize(
+            len(output_layout.head) + len(output_layout.tail) + num_ellipsis
+        )
+        output_axes = [name for group in groups for name in group]
+
+    return SimpleNamespace(
+        axis_sizes=axis_sizes,
+        input_axes=input_axes,
+        input_shapes=input_shapes,
+        output_axes=output_axes
+    )
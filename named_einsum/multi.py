@@ -0,0 +1,200 @@
+"""Evaluation of several expressions on shared operands, computing common intermediates once."""
+from types import SimpleNamespace
+import itertools
+import operator
+
+import autoray
+
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.paths
+
+
+def _size(axes, axis_sizes):
+    size = 1
+    for axis in axes:
+        size *= axis_sizes[axis]
+    return size
+
+
+def _leaf_key(variable, axes):
+    """Identify an operand by its variable name and (flat) axis names."""
+    return (((variable, tuple(axes)),), frozenset(axes))
+
+
+def _intermediate_key(key_a, key_b, result):
+    """Identify a pairwise intermediate by the operands it contains and the axes it keeps."""
+    return (tuple(sorted(key_a[0] + key_b[0])), frozenset(result))
+
+
+def _pairs(operands, output_axes):
+    """Yields the positions, result axes and key of every pair of operands."""
+    for i, j in itertools.combinations(range(len(operands)), 2):
+        (key_i, axes_i), (key_j, axes_j) = operands[i], operands[j]
+        others = [axes for k, (_, axes) in enumerate(operands) if k not in (i, j)]
+        result = named_einsum.paths.result_axes(axes_i, axes_j, others, output_axes)
+        yield i, j, result, _intermediate_key(key_i, key_j, result)
+
+
+def _ranked_pairs(operands, output_axes, axis_sizes, known, demand):
+    """Yields the rank, positions and resulting operand of every pair of operands."""
+    for i, j, result, key in _pairs(operands, output_axes):
+        axes_i, axes_j = operands[i][1], operands[j][1]
+        removed = _size(result, axis_sizes) - (_size(axes_i, axis_sizes) +
+                                               _size(axes_j, axis_sizes))
+        rank = (key not in known, set(axes_i).isdisjoint(axes_j), -(demand or {}).get(key, 0),
+                removed, _size(set(axes_i).union(axes_j), axis_sizes))
+        yield rank, i, j, (key, result)
+
+
+def shared_greedy_path(operands, output_axes, axis_sizes, known=(), demand=None):
+    """
+    Find a contraction path that reuses already computed intermediates where possible.
+
+    Pairs whose intermediate is in ``known`` cost nothing and are contracted first.  Otherwise
+    pairs are ranked as in ``paths.greedy_path``, except that among pairs sharing an axis, those
+    whose intermediate is wanted by the most expressions come first.
+
+    Parameters
+    ----------
+    operands : list of tuple
+      Key and flat axis names of each operand
+    output_axes : list of string
+      Flat axis names of the output
+    axis_sizes : dict
+      Size of every axis
+    known : container, optional
+      Keys of intermediates that are already computed
+    demand : dict, optional
+      Number of expressions that can form each intermediate, by key
+
+    Returns
+    -------
+    list of tuple
+      Pairs of positions to contract
+    """
+    operands = list(operands)
+    path = []
+    while len(operands) > 1:
+        _, i, j, operand = min(_ranked_pairs(operands, output_axes, axis_sizes, known, demand),
+                               key=operator.itemgetter(0))
+        path.append((i, j))
+        operands = [operand for k, operand in enumerate(operands) if k not in (i, j)] + [operand]
+    return path
+
+
+def einsum_many(expressions, operands):
+    """
+    Evaluate several expressions on named operands, computing shared intermediates only once.
+
+    Every expression is contracted pairwise, preferring pairs of operands that other
+    expressions contract as well.  Intermediates are identified by the variable and
+    axis names of the operands they contain and the axes they keep, so an intermediate of one
+    expression is reused by later ones that contract the same variables over the same axes.
+    Axis names must therefore mean the same thing in every expression.
+
+    Parameters
+    ----------
+    expressions : dict or list of string
+      Readable einsum subscripts strings, by name or in a list
+    operands : dict
+      Arrays by variable name, for every input variable of the expressions
+
+    Returns
+    -------
+    outputs : dict or list of array
+      Output of each expression, in the same form as ``expressions``
+    report : SimpleNamespace
+      ``flops`` (multiply-adds computed), ``flops_without_sharing`` (of evaluating each
+      expression on its own along a greedy path), ``flops_saved`` and ``shared_intermediates``
+      (the number of intermediates that were reused)
+    """
+    items = (list(expressions.items()) if isinstance(expressions, dict)
+             else list(enumerate(expressions)))
+    planned, demand = _plan_many(items, operands)
+
+    shared = SimpleNamespace(memo={}, demand=demand, report=SimpleNamespace(
+        flops=0, flops_without_sharing=0, flops_saved=0, shared_intermediates=0
+    ))
+    outputs = {}
+    for name, expression, variables, arrays, plan in planned:
+        if plan.output_axes is None:
+            # Broadcasting between differing numbers of ellipses is left to the backend
+            outputs[name] = expression(*arrays)
+        else:
+            outputs[name] = _contract_sharing(expression, variables, arrays, plan, shared)
+
+    report = shared.report
+    report.flops_saved = report.flops_without_sharing - report.flops
+    if isinstance(expressions, dict):
+        return outputs, report
+    return [outputs[name] for name, _ in items], report
+
+
+def _plan_many(items, operands):
+    """Plan every expression, and count the expressions that can form each pairwise intermediate."""
+    planned = []
+    demand = {}
+    for name, subscripts in items:
+        expression = named_einsum.prepare(subscripts)
+        variables = [variable.name for variable in expression.parsed.input_variables]
+        for variable in variables:
+            if variable not in operands:
+                raise named_einsum.exceptions.MissingOperandError(variable)
+        arrays = [operands[variable] for variable in variables]
+        plan = expression.plan([array.shape for array in arrays])
+        planned.append((name, expression, variables, arrays, plan))
+        if plan.output_axes is not None:
+            leaves = [(_leaf_key(variable, axes), tuple(axes))
+                      for variable, axes in zip(variables, plan.input_axes)]
+            for key in {key for _, _, _, key in _pairs(leaves, plan.output_axes)}:
+                demand[key] = demand.get(key, 0) + 1
+    return planned, demand
+
+
+def _contract_pair(current, pair, plan, backend_einsum, shared):
+    """Replace two operands by their intermediate, computing it unless it is in the ``memo``."""
+    (key_a, axes_a, array_a), (key_b, axes_b, array_b) = (current[k] for k in pair)
+    current = [operand for k, operand in enumerate(current) if k not in pair]
+    result = named_einsum.paths.result_axes(
+        axes_a, axes_b, [axes for _, axes, _ in current], plan.output_axes
+    )
+    key = _intermediate_key(key_a, key_b, result)
+    if key in shared.memo:
+        shared.report.shared_intermediates += 1
+    else:
+        subscripts = named_einsum.paths.einsum_subscripts([axes_a, axes_b], result)
+        shared.memo[key] = (result, backend_einsum(subscripts, array_a, array_b))
+        shared.report.flops += _size(set(axes_a).union(axes_b), plan.axis_sizes)
+    return current + [(key,) + shared.memo[key]]
+
+
+def _contract_sharing(expression, variables, arrays, plan, shared):
+    """Contract one expression, reusing and adding to the ``memo`` of intermediates."""
+    arrays = [array if shape is None else array.reshape(shape)
+              for array, shape in zip(arrays, plan.input_shapes)]
+    backend_einsum = autoray.get_lib_fn(autoray.infer_backend(arrays[0]), 'einsum')
+    report = shared.report
+
+    greedy = expression.contraction_path(plan, 'greedy')
+    report.flops_without_sharing += named_einsum.paths.path_cost(
+        plan.input_axes, plan.output_axes, plan.axis_sizes, greedy
+    )[0]
+
+    current = [(_leaf_key(variable, axes), tuple(axes), array)
+               for variable, axes, array in zip(variables, plan.input_axes, arrays)]
+    path = shared_greedy_path([(key, axes) for key, axes, _ in current], plan.output_axes,
+                              plan.axis_sizes, shared.memo, shared.demand)
+    for pair in path:
+        current = _contract_pair(current, pair, plan, backend_einsum, shared)
+
+    # Sum out or transpose whatever remains into the output order
+    _, axes, output = current[0]
+    if axes != tuple(plan.output_axes):
+        output = backend_einsum(
+            named_einsum.paths.einsum_subscripts([axes], plan.output_axes), output
+        )
+        report.flops += _size(axes, plan.axis_sizes)
+    if expression.output_layout is not None:
+        output = output.reshape(expression.output_layout.unflattened_shape(output.shape))
+    return output
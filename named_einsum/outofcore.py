@@ -0,0 +1,205 @@
+"""Out-of-core contraction of memory-mapped operands, block by block along a named axis."""
+import functools
+import os
+
+import numpy as np
+
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.layout
+import named_einsum.paths
+import named_einsum.slicing
+
+
+def _size(axes, axis_sizes):
+    size = 1
+    for axis in axes:
+        size *= axis_sizes[axis]
+    return size
+
+
+def block_elements(plan, path, axis, chunk_size):
+    """
+    Estimate the number of elements held in memory while contracting one block.
+
+    This counts the blocks read from every operand that has the axis, the intermediates and
+    output of the block, and the running sum if the axis is contracted.
+    """
+    sizes = dict(plan.axis_sizes)
+    sizes[axis] = chunk_size
+
+    elements = sum(_size(axes, sizes) for axes in plan.input_axes if axis in axes)
+    work = _size(plan.output_axes, sizes)
+    if path is not None:
+        _, largest = named_einsum.paths.path_cost(plan.input_axes, plan.output_axes, sizes, path)
+        work = max(work, largest)
+    elements += work
+    if axis not in plan.output_axes:
+        elements += _size(plan.output_axes, plan.axis_sizes)
+    return elements
+
+
+def _largest_block(plan, path, axis, max_elements):
+    """Returns the largest block along an axis that fits, found by bisection."""
+    low, high = 1, plan.axis_sizes[axis]
+    while low < high:
+        middle = (low + high + 1) // 2
+        if block_elements(plan, path, axis, middle) <= max_elements:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def choose_blocks(plan, itemsize, memory_limit, path=None, axis=None):
+    """
+    Pick an axis to read blocks along, and the size of each block.
+
+    Axes that lead the most operand bytes are preferred, since their blocks are contiguous on
+    disk and are read sequentially.  Among those, output axes are preferred over contracted
+    ones, and then the largest block that fits ``memory_limit`` is used.
+
+    Parameters
+    ----------
+    plan : SimpleNamespace
+      Plan returned by ``Expression.plan``
+    itemsize : int
+      Bytes per element
+    memory_limit : int
+      Maximum number of bytes to hold in memory at once
+    path : list of tuple, optional
+      Pairwise contraction path, if one is used
+    axis : string, optional
+      Axis to read blocks along, instead of picking one automatically
+
+    Returns
+    -------
+    tuple
+      The axis and block size
+    """
+    if plan.output_axes is None:
+        raise named_einsum.exceptions.SlicingError('inputs have differing numbers of ellipses')
+    if axis is not None:
+        axis = axis.lower()
+        if axis not in plan.axis_sizes:
+            raise named_einsum.exceptions.UnknownAxisError(axis)
+
+    best = best_key = None
+    smallest = None
+    for candidate in ([axis] if axis is not None else plan.axis_sizes):
+        needed = block_elements(plan, path, candidate, 1) * itemsize
+        if needed > memory_limit:
+            smallest = needed if smallest is None else min(smallest, needed)
+            continue
+
+        block_size = _largest_block(plan, path, candidate, memory_limit // itemsize)
+        sequential = sum(_size(axes, plan.axis_sizes) for axes in plan.input_axes
+                         if axes and axes[0] == candidate)
+        key = (-sequential, candidate not in plan.output_axes,
+               -(-plan.axis_sizes[candidate] // block_size))
+        if best_key is None or key < best_key:
+            best, best_key = (candidate, block_size), key
+
+    if best is None:
+        raise named_einsum.exceptions.MemoryLimitError(memory_limit, smallest)
+    return best
+
+
+def _open_output(out, shape, dtype):
+    """Open (or check) the output array, creating a .npy memmap if given a path."""
+    if isinstance(out, (str, os.PathLike)):
+        return np.lib.format.open_memmap(out, mode='w+', dtype=dtype, shape=shape)
+    if tuple(out.shape) != tuple(shape):
+        raise named_einsum.exceptions.OutputShapeError(tuple(shape), tuple(out.shape))
+    return out
+
+
+def out_of_core(subscripts, *arrays, out, memory_limit, axis=None, optimize=False):
+    """
+    Contract (memory-mapped) operands block by block, writing into a (memory-mapped) output.
+
+    Blocks along one named axis are read from every operand that has the axis, in order, and
+    contracted.  If the axis is in the output, each block of the output is written straight
+    into ``out``; otherwise the blocks are summed in memory and written at the end.
+
+    Parameters
+    ----------
+    subscripts : string
+      Readable einsum subscripts string
+    arrays : numpy.ndarray or numpy.memmap
+      Input arrays, one per input variable
+    out : numpy.ndarray, numpy.memmap or path
+      Output array, or the path of a .npy file to create as a memmap
+    memory_limit : int
+      Maximum number of bytes to hold in memory at once, which determines the block size
+    axis : string, optional
+      Axis to read blocks along.  By default an axis that leads the operands is chosen.
+    optimize : bool, string or list of tuple, optional
+      Contraction path strategy, see ``Expression.__call__``
+
+    Returns
+    -------
+    numpy.ndarray or numpy.memmap
+      The output array
+    """
+    expression = named_einsum.prepare(subscripts)
+    plan = expression.plan([array.shape for array in arrays])
+    arrays = [array if shape is None else array.reshape(shape)
+              for array, shape in zip(arrays, plan.input_shapes)]
+
+    path = None
+    if expression.compiled is None:
+        path = expression.contraction_path(plan, 'greedy' if optimize is False else optimize)
+    elif optimize is not False and len(arrays) > 2:
+        path = expression.contraction_path(plan, optimize)
+    else:
+        named_einsum.paths.check_optimize(optimize, expression.num_inputs)
+
+    dtype = np.result_type(*arrays)
+    blocks = choose_blocks(plan, dtype.itemsize, memory_limit, path, axis)
+
+    flat_shape = tuple(plan.axis_sizes[name] for name in plan.output_axes)
+    out = _open_output(out, (() if expression.output_layout is None
+                             else expression.output_layout.unflattened_shape(flat_shape)), dtype)
+    flat_out = named_einsum.layout.reshape_view(out, flat_shape)
+    if flat_out is None:
+        raise named_einsum.exceptions.ReshapeCopyError('out', flat_shape)
+
+    contract = functools.partial(_contract_block, expression.compiled, plan, path)
+    _write_blocks(contract, arrays, plan, blocks, flat_out)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+def _contract_block(subscripts, plan, path, operands):
+    """Contract blocks of the operands that are in memory."""
+    if path is None:
+        return np.einsum(subscripts, *operands)
+    return named_einsum.paths.contract_path(
+        np.einsum, operands, plan.input_axes, plan.output_axes, path, backend='numpy'
+    )
+
+
+def _write_blocks(contract, arrays, plan, blocks, flat_out):
+    """Contract the operands block by block along an axis, writing into the flat output."""
+    axis, block_size = blocks
+    size = plan.axis_sizes[axis]
+    output_dim = plan.output_axes.index(axis) if axis in plan.output_axes else None
+    running_sum = named_einsum.slicing.RunningSum()
+    for start in range(0, size, block_size):
+        index = slice(start, min(start + block_size, size))
+        # Read each block into memory in one sequential pass
+        operands = [
+            np.array(array[tuple(index if name == axis else slice(None) for name in axes)])
+            if axis in axes else array
+            for array, axes in zip(arrays, plan.input_axes)
+        ]
+        if output_dim is None:
+            running_sum.add(contract(operands))
+        else:
+            flat_out[(slice(None),) * output_dim + (index,)] = contract(operands)
+        del operands
+
+    if output_dim is None:
+        flat_out[...] = running_sum.total
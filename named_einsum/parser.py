@@ -1,9 +1,9 @@
 """Parsing of named einsum expressions."""
 from types import SimpleNamespace
 import functools
+import threading
 from abc import ABC, abstractmethod
 
-from named_einsum.lark_parser import Lark_StandAlone
 import named_einsum.exceptions
 from named_einsum.characters import VALID_CHARACTERS
 
@@ -27,6 +27,11 @@ class BaseAxis(ABC):
         """Returns the output representation of this object in the einsum string."""
         return ''
 
+    @abstractmethod
+    def readable_repr(self):
+        """Returns the representation of this object in a named einsum string."""
+        return ''
+
 
 class NamedAxis(BaseAxis):
     """A material axis that has an (optional) name."""
@@ -47,6 +52,10 @@ class NamedAxis(BaseAxis):
         """Returns the mapped letter of this axis."""
         return mapping[self.name]
 
+    def readable_repr(self):
+        """Returns the name of this axis."""
+        return self.name
+
 
 class ProductAxis(BaseAxis):
     """An axis that is a product of several named axes."""
@@ -80,6 +89,10 @@ class ProductAxis(BaseAxis):
         """Returns the individual mapped letters of the product axes."""
         return ''.join([axis.einsum_repr(mapping) for axis in self.axes])
 
+    def readable_repr(self):
+        """Returns the names of the product axes, joined by products."""
+        return ' * '.join([axis.readable_repr() for axis in self.axes])
+
 
 class EllipsisAxis(BaseAxis):
     """A placeholder axis that can be expanded to represent some number of input/output axes."""
@@ -97,6 +110,10 @@ class EllipsisAxis(BaseAxis):
         """Ellipse output in the einsum."""
         return '...'
 
+    def readable_repr(self):
+        """Ellipse in a named einsum string."""
+        return '...'
+
 
 class Variable:
     """A named variable and its axes."""
@@ -125,6 +142,12 @@ class Variable:
         """String representation of this variable with its axes."""
         return f'({self.name}: {self.axes})'
 
+    def readable_repr(self):
+        """Returns the representation of this variable in a named einsum string."""
+        if not self.axes:
+            return self.name or ''
+        return f'{self.name or ""}[{", ".join(axis.readable_repr() for axis in self.axes)}]'
+
 
 def _parse_variable(tree):
     assert tree.data == 'variable'
@@ -158,16 +181,39 @@ def _parse_variable(tree):
     return Variable(name, axes)
 
 
-def _idx_to_letter(axis, idx):
+def _idx_to_letter(idx):
+    """Returns the einsum letter of an axis, or None if there are no letters left."""
     if idx >= len(VALID_CHARACTERS):
-        raise named_einsum.exceptions.TooManyAxesError(axis, idx)
+        return None
     return VALID_CHARACTERS[idx]
 
 
+_PARSER = None
+_PARSER_LOCK = threading.Lock()
+
+
+def get_parser():
+    """
+    Returns the shared Lark parser, constructing it on first use.
+
+    Building the parser deserializes the LALR tables, which is far more expensive than parsing
+    a typical expression, so a single instance is shared.  Parsing does not mutate the parser,
+    so the instance is safe to use from several threads at once.  The generated parser module
+    is only imported here, since importing it is a large part of the package import time.
+    """
+    global _PARSER  # pylint: disable=global-statement
+    if _PARSER is None:
+        with _PARSER_LOCK:
+            if _PARSER is None:
+                # pylint: disable-next=import-outside-toplevel
+                from named_einsum.lark_parser import Lark_StandAlone
+                _PARSER = Lark_StandAlone()
+    return _PARSER
+
+
 def parse(inp):
     """Parse an input named einsum expression into a series of input and output variables."""
-    parser = Lark_StandAlone()
-    tree = parser.parse(inp)
+    tree = get_parser().parse(inp)
 
     assert tree.data == 'einsum'
     assert len(tree.children) == 2
@@ -185,7 +231,8 @@ def parse(inp):
     output_variable = (None if len(tree_output_variable.children) == 0
                        else _parse_variable(tree_output_variable.children[0]))
 
-    # Axis name to some letter
+    # Axis name to some letter, or None for axes past the available letters.  Such expressions
+    # cannot be compiled into a single einsum, but can still be contracted pairwise.
     unique_axis_idx = 0
     axis_mapping = {}
 
@@ -196,7 +243,7 @@ def parse(inp):
     for input_variable in input_variables:
         for axis_name in input_variable.axis_names:
             if axis_name not in axis_mapping:
-                axis_mapping[axis_name] = _idx_to_letter(axis_name, unique_axis_idx)
+                axis_mapping[axis_name] = _idx_to_letter(unique_axis_idx)
                 unique_axis_idx += 1
             input_axes.add(axis_name)
 
@@ -214,3 +261,10 @@ def parse(inp):
         output_axes=output_axes,
         axis_mapping=axis_mapping
     )
+
+
+def unparse(parsed):
+    """Convert a parsed expression (as returned by ``parse``) back into a named einsum string."""
+    output = '' if parsed.output_variable is None else parsed.output_variable.readable_repr()
+    return (', '.join(variable.readable_repr() for variable in parsed.input_variables) +
+            ' -> ' + output).rstrip()
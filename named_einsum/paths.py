@@ -0,0 +1,306 @@
+"""Contraction path optimisation for named einsum expressions."""
+import itertools
+import operator
+
+import named_einsum.blas
+import named_einsum.exceptions
+from named_einsum.characters import VALID_CHARACTERS
+
+# Largest number of operands that the exhaustive search is run on before
+# falling back to the greedy search.
+OPTIMAL_MAX_OPERANDS = 10
+
+
+def _size(axes, axis_sizes):
+    size = 1
+    for axis in axes:
+        size *= axis_sizes[axis]
+    return size
+
+
+def result_axes(axes_a, axes_b, other_axes, output_axes):
+    """Axes of a pairwise contraction that are still needed by other operands or the output."""
+    keep = set(output_axes).union(*other_axes)
+    result = []
+    for axis in itertools.chain(axes_a, axes_b):
+        if axis in keep and axis not in result:
+            result.append(axis)
+    return tuple(result)
+
+
+def _positional_path(steps, num_inputs):
+    """Convert contractions between operand ids into numpy-style positional pairs."""
+    current = list(range(num_inputs))
+    path = []
+    for (a, b, result) in steps:
+        i, j = sorted((current.index(a), current.index(b)))
+        path.append((i, j))
+        current.pop(j)
+        current.pop(i)
+        current.append(result)
+    return path
+
+
+def _ranked_pairs(operands, output_axes, axis_sizes):
+    """Yields the rank, positions and result axes of every pair of operands."""
+    for i, j in itertools.combinations(range(len(operands)), 2):
+        shared = not set(operands[i]).isdisjoint(operands[j])
+        others = [axes for k, axes in enumerate(operands) if k not in (i, j)]
+        result = result_axes(operands[i], operands[j], others, output_axes)
+        removed = _size(result, axis_sizes) - (_size(operands[i], axis_sizes) +
+                                               _size(operands[j], axis_sizes))
+        cost = _size(set(operands[i]).union(operands[j]), axis_sizes)
+        yield (not shared, removed, cost), i, j, result
+
+
+def greedy_path(input_axes, output_axes, axis_sizes):
+    """
+    Find a contraction path by repeatedly contracting the cheapest pair.
+
+    Pairs that share an axis are preferred, and among those the pair whose result has the
+    smallest size relative to its inputs is chosen.
+
+    Parameters
+    ----------
+    input_axes : list of list of string
+      Flat axis names of each operand
+    output_axes : list of string
+      Flat axis names of the output
+    axis_sizes : dict
+      Size of every axis
+
+    Returns
+    -------
+    list of tuple
+      Pairs of positions to contract, where each contraction removes both operands and
+      appends the result to the end of the operand list
+    """
+    operands = [tuple(axes) for axes in input_axes]
+    path = []
+    while len(operands) > 1:
+        _, i, j, result = min(_ranked_pairs(operands, output_axes, axis_sizes),
+                              key=operator.itemgetter(0))
+        path.append((i, j))
+        operands = [axes for k, axes in enumerate(operands) if k not in (i, j)] + [result]
+    return path
+
+
+def _splits(subset):
+    """Yields every unordered split of a subset once, keeping the lowest operand on the left."""
+    low = subset & -subset
+    left = (subset - 1) & subset
+    while left:
+        right = subset ^ left
+        if left & low and right:
+            yield left, right
+        left = (left - 1) & subset
+
+
+def optimal_path(input_axes, output_axes, axis_sizes):
+    """
+    Find the contraction path with the fewest operations by searching over all subsets.
+
+    Operand counts above ``OPTIMAL_MAX_OPERANDS`` fall back to ``greedy_path``.  Parameters and
+    return value are the same as for ``greedy_path``.
+    """
+    num_inputs = len(input_axes)
+    if num_inputs > OPTIMAL_MAX_OPERANDS:
+        return greedy_path(input_axes, output_axes, axis_sizes)
+
+    operands = [frozenset(axes) for axes in input_axes]
+    output = frozenset(output_axes)
+    full = (1 << num_inputs) - 1
+
+    def _axes_of(subset):
+        inside = frozenset().union(*(operands[k] for k in range(num_inputs) if subset >> k & 1))
+        outside = output.union(*(operands[k] for k in range(num_inputs) if not subset >> k & 1))
+        return inside & outside
+
+    # best[subset] = (cost, axes of the contracted subset, split)
+    best = {1 << k: (0, operands[k], None) for k in range(num_inputs)}
+    for subset in sorted(range(1, full + 1), key=lambda s: bin(s).count('1')):
+        if subset in best:
+            continue
+        cost, split = min(
+            ((best[left][0] + best[right][0] + _size(best[left][1] | best[right][1], axis_sizes),
+              (left, right))
+             for left, right in _splits(subset)),
+            key=operator.itemgetter(0)
+        )
+        best[subset] = (cost, _axes_of(subset), split)
+
+    # Linearize the contraction tree, children first
+    steps = []
+    ids = {1 << k: k for k in range(num_inputs)}
+
+    def _visit(subset):
+        split = best[subset][2]
+        if split is None:
+            return ids[subset]
+        a, b = _visit(split[0]), _visit(split[1])
+        ids[subset] = num_inputs + len(steps)
+        steps.append((a, b, ids[subset]))
+        return ids[subset]
+
+    _visit(full)
+    return _positional_path(steps, num_inputs)
+
+
+def validate_path(path, num_inputs):
+    """Check that an explicit path contracts all operands, returning it as a list of pairs."""
+    try:
+        path = list(path)
+    except TypeError as error:
+        raise named_einsum.exceptions.InvalidPathError(path, 'not a list of pairs') from error
+    if path and path[0] == 'einsum_path':
+        # Allow paths straight from numpy.einsum_path
+        path = path[1:]
+
+    num_operands = num_inputs
+    pairs = []
+    for step in path:
+        try:
+            step = tuple(step)
+        except TypeError as error:
+            raise named_einsum.exceptions.InvalidPathError(path, f'invalid step {step}') from error
+        if (len(step) != 2 or step[0] == step[1] or
+                not all(0 <= i < num_operands for i in step)):
+            raise named_einsum.exceptions.InvalidPathError(path, f'invalid step {step}')
+        pairs.append(tuple(sorted(step)))
+        num_operands -= 1
+    if num_operands > 1:
+        raise named_einsum.exceptions.InvalidPathError(
+            path, f'{num_operands} operands remain uncontracted'
+        )
+    return pairs
+
+
+def check_optimize(optimize, num_inputs):
+    """
+    Check a strategy or explicit path, where a single einsum call is used instead of a path.
+
+    Parameters
+    ----------
+    optimize : bool, string or list of tuple
+      One of ``True``/``'greedy'``, ``'optimal'``, or an explicit path
+    num_inputs : int
+      Number of operands that an explicit path contracts
+    """
+    if isinstance(optimize, str):
+        if optimize not in ('greedy', 'optimal'):
+            raise named_einsum.exceptions.InvalidPathError(optimize,
+                                                           'unknown optimization strategy')
+    elif not isinstance(optimize, bool):
+        validate_path(optimize, num_inputs)
+
+
+def find_path(input_axes, output_axes, axis_sizes, optimize):
+    """
+    Find a contraction path with a given strategy.
+
+    Parameters
+    ----------
+    input_axes, output_axes, axis_sizes
+      See ``greedy_path``
+    optimize : bool, string or list of tuple
+      One of ``True``/``'greedy'``, ``'optimal'``, or an explicit path
+
+    Returns
+    -------
+    list of tuple
+      Pairs of positions to contract
+    """
+    if optimize is True or optimize == 'greedy':
+        return greedy_path(input_axes, output_axes, axis_sizes)
+    if optimize == 'optimal':
+        return optimal_path(input_axes, output_axes, axis_sizes)
+    if isinstance(optimize, str):
+        raise named_einsum.exceptions.InvalidPathError(optimize, 'unknown optimization strategy')
+    return validate_path(optimize, len(input_axes))
+
+
+def path_cost(input_axes, output_axes, axis_sizes, path):
+    """
+    Count the operations and largest intermediate of a contraction path.
+
+    Returns
+    -------
+    tuple
+      Number of multiply-adds and the size of the largest intermediate
+    """
+    operands = [tuple(axes) for axes in input_axes]
+    flops = 0
+    largest = 0
+    for i, j in path:
+        others = [axes for k, axes in enumerate(operands) if k not in (i, j)]
+        result = result_axes(operands[i], operands[j], others, output_axes)
+        flops += _size(set(operands[i]).union(operands[j]), axis_sizes)
+        largest = max(largest, _size(result, axis_sizes))
+        operands = others + [result]
+    if len(operands) == 1 and tuple(operands[0]) != tuple(output_axes):
+        flops += _size(operands[0], axis_sizes)
+    return flops, largest
+
+
+def einsum_subscripts(input_axes, output_axes):
+    """Generate an einsum string for some operands, with letters local to this contraction."""
+    mapping = {}
+    for axis in itertools.chain(*input_axes, output_axes):
+        if axis not in mapping:
+            if len(mapping) >= len(VALID_CHARACTERS):
+                raise named_einsum.exceptions.TooManyAxesError(axis, len(mapping))
+            mapping[axis] = VALID_CHARACTERS[len(mapping)]
+
+    return (','.join(''.join(mapping[axis] for axis in axes) for axes in input_axes) +
+            '->' + ''.join(mapping[axis] for axis in output_axes))
+
+
+def contract_path(backend_einsum, arrays, input_axes, output_axes, path, backend=None,
+                  **kwargs):
+    """
+    Evaluate a contraction as a sequence of pairwise einsums.
+
+    Parameters
+    ----------
+    backend_einsum : callable
+      Backend einsum function
+    arrays : list of array
+      Operands, with product axes already expanded
+    input_axes, output_axes
+      See ``greedy_path``
+    path : list of tuple
+      Pairs of positions to contract
+    backend : string, optional
+      Name of the array backend.  If it is in ``blas.BACKENDS`` and no extra keyword arguments
+      are given, pairwise steps that are large matrix products are dispatched to matmul.
+    kwargs
+      Extra keyword arguments passed to every backend einsum call
+
+    Returns
+    -------
+    array
+      Output of the contraction, with axes ordered as ``output_axes``
+    """
+    blas = backend in named_einsum.blas.BACKENDS and not kwargs
+    operands = list(zip(arrays, [tuple(axes) for axes in input_axes]))
+    for i, j in path:
+        (array_a, axes_a), (array_b, axes_b) = operands[i], operands[j]
+        operands = [operand for k, operand in enumerate(operands) if k not in (i, j)]
+        result = result_axes(axes_a, axes_b, [axes for _, axes in operands], output_axes)
+        recipe = None
+        if blas:
+            sizes = dict(zip(axes_a, array_a.shape))
+            sizes.update(zip(axes_b, array_b.shape))
+            recipe = named_einsum.blas.find(axes_a, axes_b, result, sizes)
+        if recipe is not None:
+            array = named_einsum.blas.contract(backend, recipe, array_a, array_b)
+        else:
+            array = backend_einsum(einsum_subscripts([axes_a, axes_b], result), array_a,
+                                   array_b, **kwargs)
+        operands.append((array, result))
+
+    # Sum out or transpose whatever remains into the output order
+    array, axes = operands[0]
+    if axes != tuple(output_axes):
+        array = backend_einsum(einsum_subscripts([axes], output_axes), array, **kwargs)
+    return array
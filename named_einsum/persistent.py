@@ -0,0 +1,181 @@
+"""Opt-in persistent cache of translated expressions and contraction paths on disk."""
+# The modules needed to read and write entries are only imported once a cache is used, to keep
+# them out of the package import time
+# pylint: disable=import-outside-toplevel
+import os
+import threading
+
+# Bumped whenever the layout or contents of cache entries change
+FORMAT_VERSION = 1
+
+# Sources that determine the cached translations and paths (i.e. the parser, the axis naming of
+# plans, the canonical form in path keys and the plans that are rewritten or split), so editing
+# any of them (or the grammar) starts a new cache directory
+_SOURCES = ('grammar.g', 'parser.py', '__init__.py', 'paths.py', 'expression.py', 'cache.py',
+            'rewrite.py', 'constants.py')
+
+ENVIRONMENT_VARIABLE = 'NAMED_EINSUM_CACHE_DIR'
+
+_LOCK = threading.Lock()
+_STATE = {'cache': None, 'checked_environment': False}
+
+
+def default_directory():
+    """Returns the default cache directory, ``$XDG_CACHE_HOME/named_einsum``."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'named_einsum')
+
+
+def library_version():
+    """Returns a string identifying the library version and the sources of cached entries."""
+    import hashlib
+    digest = hashlib.sha256(f'{FORMAT_VERSION}'.encode())
+    package = os.path.dirname(os.path.abspath(__file__))
+    for source in _SOURCES:
+        try:
+            with open(os.path.join(package, source), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(source.encode())
+
+    try:
+        from named_einsum.version import version
+    except ImportError:
+        version = 'unknown'
+    return f'{version}-{digest.hexdigest()[:16]}'
+
+
+class PersistentCache:
+    """
+    A cache of picklable values stored as one file per entry in a directory.
+
+    Entries are written to a temporary file and atomically renamed into place, so several
+    processes can read and write the same directory at once: readers see either no entry or a
+    complete one, and concurrent writers of the same entry simply replace each other.
+
+    Parameters
+    ----------
+    directory : string
+      Directory to store entries in.  A subdirectory per library version is used, so entries
+      of other versions are never loaded.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.join(directory, library_version())
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, namespace, key):
+        import hashlib
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, namespace, digest[:2], digest + '.pickle')
+
+    def get(self, namespace, key, validate=None):
+        """
+        Returns the value stored for a key, or None if there is none.
+
+        Values for which ``validate`` returns False (i.e. from older versions of a module that
+        is not part of the version hash) count as misses.
+        """
+        import pickle
+        try:
+            with open(self._path(namespace, key), 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError,
+                TypeError, ValueError):
+            # Unreadable, truncated, or referring to a class that has moved or changed
+            self.misses += 1
+            return None
+        if stored_key != key or (validate is not None and not validate(value)):
+            # Hash collision, an entry from an incompatible pickle, or an invalid value
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, namespace, key, value):
+        """Store a value for a key, ignoring failures to write."""
+        import pickle
+        import tempfile
+        path = self._path(namespace, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary, path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove all entries of this library version."""
+        for root, _, files in os.walk(self.directory, topdown=False):
+            for name in files:
+                try:
+                    os.unlink(os.path.join(root, name))
+                except OSError:
+                    pass
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+
+def enable_persistent_cache(directory=None):
+    """
+    Store translated expressions and contraction paths on disk, and load them in new processes.
+
+    The cache can also be enabled for a process (i.e. pool workers) by setting the
+    ``NAMED_EINSUM_CACHE_DIR`` environment variable to a directory.
+
+    Parameters
+    ----------
+    directory : string, optional
+      Directory to store the cache in, by default ``$XDG_CACHE_HOME/named_einsum``
+
+    Returns
+    -------
+    PersistentCache
+      The enabled cache
+    """
+    cache = PersistentCache(directory or default_directory())
+    with _LOCK:
+        _STATE['cache'] = cache
+        _STATE['checked_environment'] = True
+    return cache
+
+
+def disable_persistent_cache():
+    """Stop using the persistent cache (including one enabled by the environment)."""
+    with _LOCK:
+        _STATE['cache'] = None
+        _STATE['checked_environment'] = True
+
+
+def get_cache():
+    """Returns the enabled persistent cache, or None if it is disabled."""
+    if not _STATE['checked_environment']:
+        with _LOCK:
+            if not _STATE['checked_environment']:
+                directory = os.environ.get(ENVIRONMENT_VARIABLE)
+                if directory:
+                    _STATE['cache'] = PersistentCache(directory)
+                _STATE['checked_environment'] = True
+    return _STATE['cache']
+
+
+def load(namespace, key, validate=None):
+    """Returns a valid value from the persistent cache, or None if it is missing or disabled."""
+    cache = get_cache()
+    return None if cache is None else cache.get(namespace, key, validate)
+
+
+def store(namespace, key, value):
+    """Store a value in the persistent cache, if it is enabled."""
+    cache = get_cache()
+    if cache is not None:
+        cache.put(namespace, key, value)
@@ -0,0 +1,181 @@
+"""Process-pool execution of contractions over operands in shared memory."""
+import concurrent.futures
+import contextlib
+import functools
+import multiprocessing
+import operator
+import sys
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import autoray
+import numpy as np
+
+import named_einsum.exceptions
+import named_einsum.paths
+
+
+def _attach(name):
+    """Attach to an existing shared memory block without taking ownership of it."""
+    if sys.version_info >= (3, 13):
+        # pylint: disable-next=unexpected-keyword-arg
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Workers share the resource tracker of the process that created the block, so attaching
+    # here only repeats its registration and the block is unlinked once, by its creator
+    return shared_memory.SharedMemory(name=name)
+
+
+def _slice_operands(arrays, input_axes, axis, bounds):
+    index = slice(*bounds)
+    return [
+        array[tuple(index if name == axis else slice(None) for name in axes)]
+        if axis in axes else array
+        for array, axes in zip(arrays, input_axes)
+    ]
+
+
+def _process_pool(workers):
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else None
+    return concurrent.futures.ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context(method)
+    )
+
+
+def _contract_shared_slice(task):
+    """Contract one slice of operands in shared memory into the shared output (in a worker)."""
+    contraction, operand_specs, output_spec, bounds, slot = task
+
+    blocks = []
+    try:
+        def _array(spec):
+            name, shape, dtype = spec
+            blocks.append(_attach(name))
+            return np.ndarray(shape, dtype=dtype, buffer=blocks[-1].buf)
+
+        operands = _slice_operands([_array(spec) for spec in operand_specs],
+                                   contraction.input_axes, contraction.axis, bounds)
+        output = _array(output_spec)
+        if slot is not None:
+            target = output[slot]
+        else:
+            target = output[(slice(None),) * contraction.output_axes.index(contraction.axis) +
+                            (slice(*bounds),)]
+
+        if contraction.path is None:
+            np.einsum(contraction.subscripts, *operands, out=target, **contraction.kwargs)
+        else:
+            target[...] = _contract_pickled_slice((operands, contraction))
+        # Views into the blocks must be released before the blocks are closed
+        del operands, output, target
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def contract_shared(call, **kwargs):
+    """
+    Evaluate a contraction in slices on a process pool, sharing operands through shared memory.
+
+    Operands are copied once into shared memory blocks, and each worker writes its slice of
+    the output into a shared output block, so no arrays are pickled.  Slices along a
+    contracted axis are written into separate partial outputs, which are summed at the end.
+    Object arrays cannot be placed in shared memory, so their slices are pickled instead.
+
+    Parameters
+    ----------
+    call : SimpleNamespace
+      The call to contract: its compiled einsum string (``compiled``), pairwise contraction
+      ``path`` (or None), numpy operands (``arrays``, with product axes already expanded),
+      ``plan`` (as returned by ``Expression.plan``), the axis to slice along and the size of
+      each slice (``slices``), and the process pool to use (``executor``).  Without a pool,
+      one of ``workers`` processes is created, which are started from a fork server where
+      available since forking a multithreaded process (for example one that has imported jax)
+      is unsafe.
+    kwargs
+      Extra keyword arguments passed to numpy.einsum
+
+    Returns
+    -------
+    numpy.ndarray
+      Flat output of the contraction
+    """
+    for array in call.arrays:
+        if autoray.infer_backend(array) != 'numpy':
+            raise named_einsum.exceptions.SlicingError(
+                'process execution requires numpy arrays'
+            )
+
+    axis, chunk_size = call.slices
+    size = call.plan.axis_sizes[axis]
+    bounds = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+    # What workers need to contract a slice, which is pickled for each of them
+    contraction = SimpleNamespace(subscripts=call.compiled, path=call.path, axis=axis,
+                                  input_axes=call.plan.input_axes,
+                                  output_axes=call.plan.output_axes, kwargs=kwargs)
+
+    with contextlib.ExitStack() as stack:
+        executor = call.executor
+        if executor is None:
+            executor = stack.enter_context(_process_pool(call.workers))
+
+        if any(array.dtype.hasobject for array in call.arrays):
+            # Object arrays only hold references, so their slices have to be pickled
+            results = list(executor.map(_contract_pickled_slice, [
+                (_slice_operands(call.arrays, contraction.input_axes, axis, bound), contraction)
+                for bound in bounds
+            ]))
+            if axis not in contraction.output_axes:
+                return functools.reduce(operator.add, results)
+            return np.concatenate(results, axis=contraction.output_axes.index(axis))
+
+        output_shape = tuple(call.plan.axis_sizes[name] for name in contraction.output_axes)
+        return _contract_in_shared_memory(executor, contraction, call.arrays, bounds,
+                                          output_shape)
+
+
+def _contract_pickled_slice(task):
+    """Contract one slice of pickled operands (in a worker)."""
+    operands, contraction = task
+    if contraction.path is None:
+        return np.einsum(contraction.subscripts, *operands, **contraction.kwargs)
+    return named_einsum.paths.contract_path(
+        np.einsum, operands, contraction.input_axes, contraction.output_axes, contraction.path,
+        backend='numpy', **contraction.kwargs
+    )
+
+
+def _contract_in_shared_memory(executor, contraction, arrays, bounds, output_shape):
+    contracted = contraction.axis not in contraction.output_axes
+    if contracted:
+        output_shape = (len(bounds),) + output_shape
+    dtype = np.result_type(*arrays)
+
+    blocks = []
+
+    def _share(shape, dtype):
+        blocks.append(shared_memory.SharedMemory(
+            create=True, size=max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        ))
+        return (blocks[-1].name, tuple(shape), np.dtype(dtype).str)
+
+    try:
+        operand_specs = []
+        for array in arrays:
+            operand_specs.append(_share(array.shape, array.dtype))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=blocks[-1].buf)[...] = array
+        output_spec = _share(output_shape, dtype)
+
+        list(executor.map(_contract_shared_slice, [
+            (contraction, operand_specs, output_spec, bound, slot if contracted else None)
+            for slot, bound in enumerate(bounds)
+        ]))
+
+        # Copy out of shared memory before the blocks are released
+        output = np.ndarray(output_shape, dtype=dtype, buffer=blocks[-1].buf)
+        result = output.sum(axis=0) if contracted else output.copy()
+        del output
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return result
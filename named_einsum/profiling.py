@@ -0,0 +1,277 @@
+"""Per-phase profiling of expression evaluation."""
+import contextlib
+import threading
+import time
+
+import named_einsum.cache
+
+# Checked on every call, so that evaluation only pays for profiling while it is in use
+ENABLED = False
+
+PHASES = ('prepare', 'plan', 'reshape_inputs', 'path', 'contract', 'reshape_output')
+
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+_PROFILERS = []
+_CALLBACKS = []
+
+
+class CallRecord:
+    """
+    Timings and details of one evaluation of an expression.
+
+    Attributes
+    ----------
+    expression : string
+      Compiled einsum string of the expression
+    phases : dict
+      Seconds spent in each phase, out of ``PHASES``
+    total : float
+      Seconds spent in the whole call
+    cache : dict
+      Hits and misses of each library cache during the call, by cache name.  Calls on other
+      threads at the same time are counted as well.
+    backend : string
+      Backend the contraction was dispatched to
+    shapes : list of tuple
+      Shapes of the operands, as given
+    output_bytes : int
+      Bytes of the output array
+    peak_bytes : int
+      Estimated bytes allocated at once by the contraction
+    path : list of tuple
+      Pairwise contraction path, or None for a single einsum call
+    slices : tuple
+      Axis and slice size, or None if the contraction was not sliced
+    """
+
+    def __init__(self, expression=None):
+        self.expression = expression
+        self.phases = {}
+        self.total = 0.0
+        self.backend = None
+        self.shapes = None
+        self.output_bytes = None
+        self.peak_bytes = None
+        self.path = None
+        self.slices = None
+        self.cache = {}
+        self._cache_before = named_einsum.cache.cache_info()
+        self._start = self._last = time.perf_counter()
+
+    def phase(self, name):
+        """End the current phase, attributing the time since the previous phase to ``name``."""
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def complete(self, plan, backend, output, path, slices, itemsize, concurrency=1):
+        """Record the details of the finished contraction."""
+        # pylint: disable-next=import-outside-toplevel
+        import named_einsum.slicing
+        self.backend = backend
+        self.path = path
+        self.slices = slices
+        nbytes = getattr(output, 'nbytes', None)
+        self.output_bytes = int(nbytes) if nbytes is not None else None
+        if plan.output_axes is not None:
+            self.peak_bytes = named_einsum.slicing.peak_elements(
+                plan, path, *(slices or ()), concurrency=concurrency
+            ) * itemsize
+
+    def finish(self):
+        """Stop the clock and compute the cache statistics of the call."""
+        self.total = time.perf_counter() - self._start
+        for name, after in named_einsum.cache.cache_info().items():
+            before = self._cache_before.get(name, named_einsum.cache.CacheInfo(0, 0, None, 0))
+            self.cache[name] = (after.hits - before.hits, after.misses - before.misses)
+
+    def as_dict(self):
+        """Returns the record as a JSON-serializable dictionary."""
+        return {
+            'expression': self.expression,
+            'total': self.total,
+            'phases': dict(self.phases),
+            'cache': {name: list(counts) for name, counts in self.cache.items()},
+            'backend': self.backend,
+            'shapes': [list(shape) for shape in self.shapes or ()],
+            'output_bytes': self.output_bytes,
+            'peak_bytes': self.peak_bytes,
+            'path': [list(pair) for pair in self.path] if self.path is not None else None,
+            'slices': list(self.slices) if self.slices is not None else None,
+        }
+
+
+def _update_enabled():
+    global ENABLED  # pylint: disable=global-statement
+    ENABLED = bool(_PROFILERS or _CALLBACKS)
+
+
+def _emit(record):
+    record.finish()
+    for profiler in list(_PROFILERS):
+        profiler.add(record)
+    for callback in list(_CALLBACKS):
+        callback(record)
+
+
+def add_callback(callback):
+    """Call ``callback(record)`` with a ``CallRecord`` after every evaluation."""
+    with _LOCK:
+        _CALLBACKS.append(callback)
+        _update_enabled()
+
+
+def remove_callback(callback):
+    """Stop calling a callback added with ``add_callback``."""
+    with _LOCK:
+        _CALLBACKS.remove(callback)
+        _update_enabled()
+
+
+@contextlib.contextmanager
+def record_call(expression=None):
+    """
+    Record one call on this thread, yielding its ``CallRecord``.
+
+    Evaluations started within the call add their phases to the same record instead of
+    recording calls of their own.  The record is emitted when the call returns.
+    """
+    outer = getattr(_LOCAL, 'record', None)
+    if outer is not None:
+        yield outer
+        return
+
+    record = CallRecord(expression)
+    _LOCAL.record = record
+    try:
+        yield record
+    finally:
+        _LOCAL.record = None
+    _emit(record)
+
+
+def begin(expression, arrays):
+    """
+    Returns the record of the call in progress on this thread, or starts a new one.
+
+    Returns
+    -------
+    tuple
+      The record, and whether the caller owns it and must pass it to ``end``
+    """
+    record = getattr(_LOCAL, 'record', None)
+    owned = record is None
+    if owned:
+        record = CallRecord(expression)
+    record.expression = expression
+    record.shapes = [tuple(array.shape) for array in arrays]
+    return record, owned
+
+
+def end(record, owned):
+    """Emit a record started by ``begin``, if the caller owns it."""
+    if owned:
+        _emit(record)
+
+
+def aggregate(records):
+    """
+    Aggregate call records by expression.
+
+    Returns
+    -------
+    dict
+      For each compiled expression (and ``'all'`` for every call), the number of calls, total
+      and per-phase seconds, cache hits and misses, backends used and output bytes
+    """
+    stats = {}
+    for record in records:
+        for key in (record.expression, 'all'):
+            entry = stats.setdefault(key, {
+                'calls': 0, 'total': 0.0, 'phases': {}, 'cache': {}, 'backends': [],
+                'output_bytes': 0,
+            })
+            entry['calls'] += 1
+            entry['total'] += record.total
+            for name, seconds in record.phases.items():
+                entry['phases'][name] = entry['phases'].get(name, 0.0) + seconds
+            for name, (hits, misses) in record.cache.items():
+                counts = entry['cache'].setdefault(name, [0, 0])
+                counts[0] += hits
+                counts[1] += misses
+            if record.backend is not None and record.backend not in entry['backends']:
+                entry['backends'].append(record.backend)
+            entry['output_bytes'] += record.output_bytes or 0
+    return stats
+
+
+class Profiler:
+    """
+    Collects a ``CallRecord`` for every evaluation while it is active.
+
+    Use as a context manager, i.e. ``with named_einsum.profile() as profiler:``.
+
+    Attributes
+    ----------
+    records : list of CallRecord
+      Records of every call, in order
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        """Start collecting records."""
+        with _LOCK:
+            _PROFILERS.append(self)
+            _update_enabled()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stop collecting records."""
+        with _LOCK:
+            _PROFILERS.remove(self)
+            _update_enabled()
+
+    def add(self, record):
+        """Add a record of a call."""
+        with self._lock:
+            self.records.append(record)
+
+    def stats(self):
+        """Returns the records aggregated by expression, see ``aggregate``."""
+        with self._lock:
+            return aggregate(self.records)
+
+    def export(self, path=None, records=False):
+        """
+        Export the aggregated statistics (and optionally every record) as JSON.
+
+        Parameters
+        ----------
+        path : string, optional
+          File to write the JSON to
+        records : bool, optional
+          Whether to include every record alongside the aggregated statistics
+
+        Returns
+        -------
+        dict
+          The exported data
+        """
+        import json  # pylint: disable=import-outside-toplevel
+        data = {'stats': self.stats()}
+        if records:
+            with self._lock:
+                data['records'] = [record.as_dict() for record in self.records]
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+        return data
+
+
+def profile():
+    """Returns a ``Profiler``, which records every evaluation within its ``with`` block."""
+    return Profiler()
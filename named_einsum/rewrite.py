@@ -0,0 +1,156 @@
+"""Algebraic rewrites of planned contractions, applied to the operands before contracting."""
+from types import SimpleNamespace
+
+import autoray
+
+import named_einsum.blas
+import named_einsum.exceptions
+import named_einsum.paths
+
+# Fewest multiply-adds that pre-reducing operands must save to be worth the extra einsum calls
+MIN_SAVED_FLOPS = 4096
+
+
+def _size(axes, axis_sizes):
+    size = 1
+    for axis in axes:
+        size *= axis_sizes[axis]
+    return size
+
+
+def _kept_axes(input_axes, output_axes, axis_sizes, reduce):
+    """
+    Axes of each operand that the contraction still needs.
+
+    Size-1 axes outside the output are always dropped.  With ``reduce``, so are axes that only
+    one operand has and the output does not, and repeated axes within an operand are merged.
+    """
+    counts = {}
+    for axes in input_axes:
+        for axis in set(axes):
+            counts[axis] = counts.get(axis, 0) + 1
+    output = set(output_axes)
+    if reduce:
+        return [[axis for axis in dict.fromkeys(axes)
+                 if axis in output or (counts[axis] > 1 and axis_sizes[axis] != 1)]
+                for axes in input_axes]
+    return [[axis for axis in axes if axis in output or axis_sizes[axis] != 1]
+            for axes in input_axes]
+
+
+def _leaf_order(path, num_inputs):
+    """Order operands by when a pairwise contraction path first contracts them."""
+    current = list(range(num_inputs))
+    order = []
+    for step, (i, j) in enumerate(path):
+        order.extend(current[k] for k in (i, j) if current[k] < num_inputs)
+        current = [operand for k, operand in enumerate(current) if k not in (i, j)]
+        current.append(num_inputs + step)
+    return order + [operand for operand in current if operand < num_inputs]
+
+
+def rewrite_plan(plan):
+    """
+    Simplify a planned contraction before it is evaluated.
+
+    Axes that only one operand has and the output does not are summed out of that operand
+    first, so that they are not carried through the whole contraction.  This is only done if
+    it saves at least ``MIN_SAVED_FLOPS`` multiply-adds.  Size-1 axes outside the output are
+    squeezed, operands without axes are multiplied together and folded into the smallest
+    operand, and the remaining operands are ordered by when the greedy path contracts them,
+    for backends that contract left to right.
+
+    Parameters
+    ----------
+    plan : SimpleNamespace
+      Plan returned by ``Expression.plan``
+
+    Returns
+    -------
+    SimpleNamespace or None
+      ``reductions`` holds, per input, the einsum string to reduce it with or the shape to
+      squeeze it to (or None for neither), ``scalars`` the positions of the inputs folded into
+      operand ``scale``, ``order`` the positions of the remaining inputs, ``plan`` the plan of
+      the rewritten contraction and ``compiled`` its einsum string (None if it has more axes
+      than letters).  None if the contraction cannot be simplified.
+    """
+    if plan.output_axes is None:
+        return None
+    input_axes, output_axes, axis_sizes = plan.input_axes, plan.output_axes, plan.axis_sizes
+
+    kept = _kept_axes(input_axes, output_axes, axis_sizes, True)
+    merged = set().union(*kept) if kept else set()
+    reduced = sum(_size(axes, axis_sizes) for axes, new_axes in zip(input_axes, kept)
+                  if any(axis_sizes[axis] != 1 for axis in axes if axis not in new_axes) or
+                  len(set(axes)) != len(axes))
+    # A single einsum call multiplies every operand for every combination of axis values
+    saved = (_size(axis_sizes, axis_sizes) * len(input_axes) -
+             _size(merged, axis_sizes) * sum(1 for axes in kept if axes) - reduced)
+    if saved < MIN_SAVED_FLOPS:
+        kept = _kept_axes(input_axes, output_axes, axis_sizes, False)
+
+    reductions = []
+    for axes, new_axes in zip(input_axes, kept):
+        if list(axes) == new_axes:
+            reductions.append(None)
+        elif [axis for axis in axes if axis in new_axes] == new_axes and all(
+                axis_sizes[axis] == 1 for axis in axes if axis not in new_axes):
+            reductions.append(tuple(axis_sizes[axis] for axis in new_axes))
+        else:
+            reductions.append(named_einsum.paths.einsum_subscripts([axes], new_axes))
+
+    operands = [k for k, axes in enumerate(kept) if axes] or [0]
+    scalars = [k for k in range(len(kept)) if k not in operands]
+    if len(operands) > 2:
+        path = named_einsum.paths.greedy_path([kept[k] for k in operands], output_axes,
+                                              axis_sizes)
+        operands = [operands[k] for k in _leaf_order(path, len(operands))]
+
+    if (all(reduction is None for reduction in reductions) and not scalars and
+            operands == list(range(len(input_axes)))):
+        return None
+
+    new_axes = [kept[k] for k in operands]
+    remaining = set(output_axes).union(*new_axes)
+    new_plan = SimpleNamespace(
+        axis_sizes={axis: size for axis, size in axis_sizes.items() if axis in remaining},
+        input_axes=new_axes,
+        input_shapes=[None] * len(new_axes),
+        output_axes=output_axes,
+        blas=None,
+    )
+    if len(new_axes) == 2:
+        new_plan.blas = named_einsum.blas.find(*new_axes, output_axes, axis_sizes)
+    try:
+        compiled = named_einsum.paths.einsum_subscripts(new_axes, output_axes)
+    except named_einsum.exceptions.TooManyAxesError:
+        compiled = None
+
+    return SimpleNamespace(
+        reductions=reductions,
+        scalars=scalars,
+        order=operands,
+        scale=min(range(len(new_axes)), key=lambda k: _size(new_axes[k], axis_sizes)),
+        plan=new_plan,
+        compiled=compiled,
+    )
+
+
+def apply(rewrite, arrays, backend):
+    """Returns the operands of a rewritten contraction, see ``rewrite_plan``."""
+    backend_einsum = autoray.get_lib_fn(backend, 'einsum')
+    reduced = []
+    for array, reduction in zip(arrays, rewrite.reductions):
+        if isinstance(reduction, str):
+            array = backend_einsum(reduction, array)
+        elif reduction is not None:
+            array = array.reshape(reduction)
+        reduced.append(array)
+
+    operands = [reduced[k] for k in rewrite.order]
+    if rewrite.scalars:
+        scale = reduced[rewrite.scalars[0]]
+        for k in rewrite.scalars[1:]:
+            scale = scale * reduced[k]
+        operands[rewrite.scale] = operands[rewrite.scale] * scale
+    return operands
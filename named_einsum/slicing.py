@@ -0,0 +1,261 @@
+"""Memory-bounded and parallel execution of contractions by slicing along a named axis."""
+import operator
+import threading
+
+import autoray
+
+import named_einsum.exceptions
+import named_einsum.paths
+
+
+def _size(axes, axis_sizes):
+    size = 1
+    for axis in axes:
+        size *= axis_sizes[axis]
+    return size
+
+
+def peak_elements(plan, path=None, axis=None, chunk_size=None, concurrency=1):
+    """
+    Estimate the number of elements allocated at once by a (sliced) contraction.
+
+    Inputs are not counted, since slicing them only creates views.  Without a path, the
+    backend einsum is assumed to only allocate its output.
+
+    Parameters
+    ----------
+    plan : SimpleNamespace
+      Plan returned by ``Expression.plan``
+    path : list of tuple, optional
+      Pairwise contraction path, if one is used
+    axis : string, optional
+      Axis that the contraction is sliced along
+    chunk_size : int, optional
+      Size of each slice of ``axis``
+    concurrency : int, optional
+      Number of slices that are evaluated at the same time
+
+    Returns
+    -------
+    int
+      Number of elements
+    """
+    sizes = plan.axis_sizes
+    if axis is not None:
+        sizes = dict(sizes)
+        sizes[axis] = chunk_size
+
+    work = _size(plan.output_axes, sizes)
+    if path is not None:
+        _, largest = named_einsum.paths.path_cost(plan.input_axes, plan.output_axes, sizes, path)
+        work = max(work, largest)
+
+    if axis is None:
+        return work
+    # The full output (or running sum) is held alongside the work of each slice
+    return _size(plan.output_axes, plan.axis_sizes) + concurrency * work
+
+
+def _fit_slice(plan, itemsize, path, axis, options):
+    """Returns the size and peak bytes of as many slices as asked for, or the largest that fit."""
+    size = plan.axis_sizes[axis]
+    if options.slice_count is not None:
+        chunk_size = -(-size // min(options.slice_count, size))
+    else:
+        # Largest slice that fits, found by bisection since the peak grows with the slice
+        low, high = 1, size
+        while low < high:
+            middle = (low + high + 1) // 2
+            peak = peak_elements(plan, path, axis, middle, options.concurrency) * itemsize
+            if peak <= options.memory_limit:
+                low = middle
+            else:
+                high = middle - 1
+        chunk_size = low
+    return chunk_size, peak_elements(plan, path, axis, chunk_size, options.concurrency) * itemsize
+
+
+def choose_slices(plan, itemsize, path, options):
+    """
+    Pick an axis to slice a contraction along, and the size of each slice.
+
+    Parameters
+    ----------
+    plan : SimpleNamespace
+      Plan returned by ``Expression.plan``
+    itemsize : int
+      Bytes per element of the output
+    path : list of tuple or None
+      Pairwise contraction path, if one is used
+    options : SimpleNamespace
+      Options of the call: the maximum number of bytes to allocate at once
+      (``memory_limit``), the axis to slice along (``slice_over``, by default the axis
+      needing the fewest slices), the number of slices (``slice_count``, by default the fewest
+      that fit in the memory limit) and the number of slices evaluated at the same time
+      (``concurrency``)
+
+    Returns
+    -------
+    tuple or None
+      The axis and slice size, or None if no slicing is needed
+    """
+    memory_limit = options.memory_limit
+    if plan.output_axes is None:
+        raise named_einsum.exceptions.SlicingError('inputs have differing numbers of ellipses')
+    if memory_limit is None and options.slice_count is None:
+        raise named_einsum.exceptions.SlicingError('one of memory_limit or num_slices is needed')
+
+    candidates = list(plan.axis_sizes)
+    if options.slice_over is not None:
+        candidates = [options.slice_over.lower()]
+        if candidates[0] not in plan.axis_sizes:
+            raise named_einsum.exceptions.UnknownAxisError(candidates[0])
+    unsliced = peak_elements(plan, path) * itemsize
+    if options.slice_count is None and unsliced <= memory_limit:
+        return None
+
+    best = best_key = None
+    smallest_peak = None
+    for candidate in candidates:
+        if plan.axis_sizes[candidate] <= 1:
+            continue
+        chunk_size, peak = _fit_slice(plan, itemsize, path, candidate, options)
+        if memory_limit is not None and peak > memory_limit:
+            smallest_peak = peak if smallest_peak is None else min(smallest_peak, peak)
+            continue
+
+        # Prefer as many slices as asked for (or as few as fit the memory limit), then slicing
+        # output axes, which need no accumulation
+        actual_slices = -(-plan.axis_sizes[candidate] // chunk_size)
+        key = (-actual_slices if options.slice_count is not None else actual_slices,
+               candidate not in plan.output_axes, peak)
+        if best_key is None or key < best_key:
+            best, best_key = (candidate, chunk_size), key
+
+    if best is None and memory_limit is not None and unsliced > memory_limit:
+        raise named_einsum.exceptions.MemoryLimitError(
+            memory_limit, unsliced if smallest_peak is None else smallest_peak
+        )
+    # Without any axis to slice along (i.e. only size-1 axes), it is fine if it fits unsliced
+    return best
+
+
+class RunningSum:
+    """Running sum of contraction results, which is only copied on the first addition."""
+
+    def __init__(self):
+        self.total = None
+        self._owned = False
+
+    def add(self, value):
+        """Add a value to the sum."""
+        if self.total is None:
+            # The first value may be a view of an input, so it is not added to in place
+            self.total = value
+        elif self._owned:
+            self.total += value
+        else:
+            self.total = self.total + value
+            self._owned = True
+
+
+class SlicedOutput:
+    """An output that is assembled from slices along one dimension, from any thread."""
+
+    def __init__(self, size, dim, array=None):
+        self.size = size
+        self.dim = dim
+        self.array = array
+        self.chunks = {}
+        self._lock = threading.Lock()
+
+    def write(self, index, value):
+        """Write the slice ``index`` of the output."""
+        with self._lock:
+            if self.array is None and not self.chunks:
+                shape = list(value.shape)
+                shape[self.dim] = self.size
+                self.array = autoray.do('empty', tuple(shape), dtype=value.dtype, like=value)
+        try:
+            self.array[(slice(None),) * self.dim + (index,)] = value
+        except TypeError:
+            # Immutable arrays are concatenated once all slices are written
+            with self._lock:
+                self.chunks[index.start] = value
+
+    def result(self):
+        """Returns the assembled output."""
+        if self.chunks:
+            return autoray.do('concatenate', [self.chunks[start] for start in sorted(self.chunks)],
+                              axis=self.dim)
+        return self.array
+
+
+def tree_sum(executor, values):
+    """Sum a list of arrays pairwise, running the additions of each level on an executor."""
+    while len(values) > 1:
+        sums = list(executor.map(operator.add, values[0::2], values[1::2]))
+        if len(values) % 2:
+            sums.append(values[-1])
+        values = sums
+    return values[0]
+
+
+def contract_sliced(contract, call, executor=None, out=None):
+    """
+    Evaluate a contraction in slices along one axis.
+
+    Slices of an output axis are written into a preallocated output, or concatenated for
+    backends with immutable arrays.  Slices of a contracted axis are summed: one after the
+    other when run serially, or with a tree reduction when run on an executor.
+
+    Parameters
+    ----------
+    contract : callable
+      Function that contracts some (sliced) operands into a flat output
+    call : SimpleNamespace
+      The call to contract: its operands (``arrays``, with product axes already expanded), its
+      ``plan`` (as returned by ``Expression.plan``) and the axis to slice along and the size of
+      each slice (``slices``)
+    executor : concurrent.futures.Executor, optional
+      Executor to evaluate the slices on.  By default slices are evaluated in order.
+    out : array, optional
+      Flat array to write slices of an output axis into, instead of a new one
+
+    Returns
+    -------
+    array
+      Flat output of the contraction
+    """
+    arrays, plan = call.arrays, call.plan
+    axis, chunk_size = call.slices
+    size = plan.axis_sizes[axis]
+    indices = [slice(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+    def _contract_slice(index):
+        return contract(*[
+            array[tuple(index if name == axis else slice(None) for name in axes)]
+            if axis in axes else array
+            for array, axes in zip(arrays, plan.input_axes)
+        ])
+
+    if axis not in plan.output_axes:
+        if executor is not None:
+            return tree_sum(executor, list(executor.map(_contract_slice, indices)))
+        running_sum = RunningSum()
+        for index in indices:
+            running_sum.add(_contract_slice(index))
+        return running_sum.total
+
+    output = SlicedOutput(size, plan.output_axes.index(axis), out)
+
+    def _contract_into(index):
+        output.write(index, _contract_slice(index))
+
+    if executor is not None:
+        # Consume the results so that exceptions are raised here
+        list(executor.map(_contract_into, indices))
+    else:
+        for index in indices:
+            _contract_into(index)
+    return output.result()
@@ -0,0 +1,240 @@
+"""Contraction of sparse (scipy.sparse and pydata sparse) operands, keeping them sparse."""
+import itertools
+import operator
+
+import autoray
+import numpy as np
+
+import named_einsum
+import named_einsum.blas
+import named_einsum.paths
+
+# Backends (as inferred by autoray) of sparse arrays
+SPARSE_BACKENDS = {'scipy', 'sparse'}
+
+# Fraction of nonzero entries above which intermediates and outputs are converted to dense arrays
+DENSE_THRESHOLD = 0.1
+
+
+def _product(values):
+    out = 1
+    for value in values:
+        out *= value
+    return out
+
+
+def _size(axes, axis_sizes):
+    return _product(axis_sizes[axis] for axis in axes)
+
+
+# Whether arrays of each type seen so far are sparse, since this is checked on every call
+_IS_SPARSE = {}
+
+
+def _is_sparse(array):
+    cls = type(array)
+    is_sparse = _IS_SPARSE.get(cls)
+    if is_sparse is None:
+        is_sparse = _IS_SPARSE[cls] = autoray.infer_backend(array) in SPARSE_BACKENDS
+    return is_sparse
+
+
+def has_sparse(arrays):
+    """Returns whether any of some arrays is sparse."""
+    for array in arrays:
+        is_sparse = _IS_SPARSE.get(type(array))
+        if is_sparse is None:
+            is_sparse = _is_sparse(array)
+        if is_sparse:
+            return True
+    return False
+
+
+def _import_sparse():
+    try:
+        # pylint: disable-next=import-outside-toplevel
+        import sparse
+    except ImportError as error:
+        raise ImportError('Contracting sparse operands needs the pydata sparse package, '
+                          'i.e. pip install sparse') from error
+    return sparse
+
+
+def density(array):
+    """
+    Returns the fraction of nonzero entries of a sparse array, or 1 for dense arrays.
+
+    Sparse arrays whose fill value is not zero (i.e. results of pydata sparse reductions) are
+    dense in all but storage, so they count as dense too.
+    """
+    if _is_sparse(array) and getattr(array, 'fill_value', 0) == 0:
+        return array.nnz / max(_product(array.shape), 1)
+    return 1.0
+
+
+def _ranked_pairs(operands, output_axes, axis_sizes):
+    """Yields the rank, positions and resulting operand of every pair of operands."""
+    for i, j in itertools.combinations(range(len(operands)), 2):
+        (axes_i, density_i), (axes_j, density_j) = operands[i], operands[j]
+        others = [axes for k, (axes, _) in enumerate(operands) if k not in (i, j)]
+        result = named_einsum.paths.result_axes(axes_i, axes_j, others, output_axes)
+        flops = _size(set(axes_i).union(axes_j), axis_sizes) * density_i * density_j
+        result_density = min(1.0, flops / max(_size(result, axis_sizes), 1))
+        removed = _size(result, axis_sizes) * result_density - (
+            _size(axes_i, axis_sizes) * density_i + _size(axes_j, axis_sizes) * density_j
+        )
+        yield (set(axes_i).isdisjoint(axes_j), flops, removed), i, j, (result, result_density)
+
+
+def sparse_greedy_path(input_axes, output_axes, axis_sizes, densities):
+    """
+    Find a contraction path that keeps sparse operands sparse for as long as possible.
+
+    Like ``paths.greedy_path``, pairs sharing an axis are contracted first, but they are ranked
+    by their expected number of multiply-adds, then by the expected number of nonzeros they
+    remove.  Both are estimated from the densities of the operands, assuming their nonzeros
+    are independent, so products of sparse operands are contracted first and dense operands
+    are left for last.
+
+    Parameters
+    ----------
+    input_axes, output_axes, axis_sizes
+      See ``paths.greedy_path``
+    densities : list of float
+      Fraction of nonzero entries of each operand
+
+    Returns
+    -------
+    list of tuple
+      Pairs of positions to contract
+    """
+    operands = [(tuple(axes), value) for axes, value in zip(input_axes, densities)]
+    path = []
+    while len(operands) > 1:
+        _, i, j, operand = min(_ranked_pairs(operands, output_axes, axis_sizes),
+                               key=operator.itemgetter(0))
+        path.append((i, j))
+        operands = [operand_k for k, operand_k in enumerate(operands) if k not in (i, j)]
+        operands.append(operand)
+    return path
+
+
+def _to_format(array):
+    """
+    Convert an array to a dense numpy array or a ``COO`` array, whichever suits its density.
+
+    Scalars (0-d arrays) are always dense, since sparse ones hold their value as a fill value.
+    """
+    sparse = _import_sparse()
+    if isinstance(array, sparse.SparseArray):
+        return array.todense() if not array.ndim or density(array) > DENSE_THRESHOLD else array
+    array = np.asarray(array)
+    if array.ndim and np.count_nonzero(array) <= DENSE_THRESHOLD * array.size:
+        return sparse.COO.from_numpy(array)
+    return array
+
+
+def _einsum(subscripts, *arrays):
+    """Einsum of dense and sparse arrays, stored as suits the density of the result."""
+    if has_sparse(arrays):
+        return _to_format(_import_sparse().einsum(subscripts, *arrays))
+    return np.einsum(subscripts, *arrays)
+
+
+def _matmul(recipe, a, b):
+    """Evaluate a matrix product recipe with the transpose, reshape and matmul of the arrays."""
+    batch = tuple(a.shape[dim] for dim in recipe.batch_dims)
+    rows = tuple(a.shape[dim] for dim in recipe.row_dims)
+    columns = tuple(b.shape[dim] for dim in recipe.column_dims)
+    num_contracted = _product(a.shape[dim] for dim in recipe.contracted_dims)
+    if recipe.perm_a is not None:
+        a = a.transpose(recipe.perm_a)
+    if recipe.perm_b is not None:
+        b = b.transpose(recipe.perm_b)
+
+    num_batch = (_product(batch),) if batch else ()
+    a = a.reshape(num_batch + (_product(rows), num_contracted))
+    b = b.reshape(num_batch + (num_contracted, _product(columns)))
+    output = (a @ b).reshape(batch + rows + columns)
+    if recipe.perm_output is not None:
+        output = output.transpose(recipe.perm_output)
+    return output
+
+
+def _contract_path(arrays, input_axes, output_axes, path):
+    """
+    Contract dense and sparse operands pairwise along a path.
+
+    Matrix products are done by matmul, which is much faster than einsum for sparse arrays,
+    and other pairs by einsum.  After each step, the result is stored as suits its density
+    (see ``DENSE_THRESHOLD``).
+    """
+    operands = list(zip(arrays, [tuple(axes) for axes in input_axes]))
+    for i, j in path:
+        (array_a, axes_a), (array_b, axes_b) = operands[i], operands[j]
+        operands = [operand for k, operand in enumerate(operands) if k not in (i, j)]
+        result = named_einsum.paths.result_axes(axes_a, axes_b, [axes for _, axes in operands],
+                                                output_axes)
+        recipe = named_einsum.blas.matmul_recipe(list(axes_a), list(axes_b), list(result))
+        if recipe is not None and recipe.contracted and has_sparse([array_a, array_b]):
+            array = _to_format(_matmul(recipe, array_a, array_b))
+        else:
+            array = _einsum(named_einsum.paths.einsum_subscripts([axes_a, axes_b], result),
+                            array_a, array_b)
+        operands.append((array, result))
+
+    array, axes = operands[0]
+    if axes != tuple(output_axes):
+        array = _einsum(named_einsum.paths.einsum_subscripts([axes], output_axes), array)
+    return array
+
+
+def contract(expression, arrays, optimize=False):
+    """
+    Evaluate an expression on operands of which some are sparse.
+
+    Sparse operands are converted to pydata sparse ``COO`` arrays (or numpy arrays, if their fill
+    value is not zero), and dense operands must be numpy arrays.  The operands are contracted
+    pairwise along ``sparse_greedy_path``, unless an explicit path is given.  Every intermediate
+    and the output is stored sparse if at most ``DENSE_THRESHOLD`` of its entries are nonzero,
+    and dense otherwise.
+
+    Parameters
+    ----------
+    expression : Expression
+      Prepared expression
+    arrays : list of array
+      Input arrays, one per input variable
+    optimize : bool, string or list of tuple, optional
+      An explicit contraction path, or any strategy for the sparse greedy path
+
+    Returns
+    -------
+    array
+      Output, as a ``COO`` array if it is sparse and a numpy array otherwise
+    """
+    sparse = _import_sparse()
+    arrays = [sparse.COO.from_scipy_sparse(array) if autoray.infer_backend(array) == 'scipy'
+              else array for array in arrays]
+    # Arrays with a nonzero fill value are dense in all but storage, and pydata sparse only
+    # multiplies arrays whose fill value is zero
+    arrays = [array.todense() if getattr(array, 'fill_value', 0) != 0 else array
+              for array in arrays]
+    plan = expression.plan([array.shape for array in arrays])
+    arrays = [array if shape is None else array.reshape(shape)
+              for array, shape in zip(arrays, plan.input_shapes)]
+
+    if plan.output_axes is None:
+        # Broadcasting between differing numbers of ellipses needs a single einsum call
+        output = _einsum(named_einsum.compile(expression.parsed), *arrays)
+    else:
+        if isinstance(optimize, (bool, str)):
+            path = sparse_greedy_path(plan.input_axes, plan.output_axes, plan.axis_sizes,
+                                      [density(array) for array in arrays])
+        else:
+            path = named_einsum.paths.validate_path(optimize, len(arrays))
+        output = _contract_path(arrays, plan.input_axes, plan.output_axes, path)
+
+    if expression.output_layout is not None and expression.output_layout.has_product:
+        output = output.reshape(expression.output_layout.unflattened_shape(output.shape))
+    return output
@@ -0,0 +1,145 @@
+"""Expressions specialised to fixed shapes, as pure functions for jax and torch compilers."""
+import autoray
+
+import named_einsum
+import named_einsum.blas
+import named_einsum.paths
+import named_einsum.rewrite
+
+
+def specialize(expression, shapes, backend, optimize=False):
+    """
+    Resolve every static piece of an expression for some input shapes.
+
+    The shape checks, reshape targets, rewrites and contraction path are worked out here, so
+    that the returned function only calls the backend's reshape and einsum (or matmul).  It
+    does no Python work that depends on the data, so a tracing compiler sees a plain sequence
+    of array operations.
+
+    Parameters
+    ----------
+    expression : Expression
+      Prepared expression
+    shapes : list of tuple
+      Shape of each input
+    backend : string
+      Name of the array backend
+    optimize : bool or string, optional
+      Contraction path strategy, see ``Expression.__call__``
+
+    Returns
+    -------
+    callable
+      Function from the input arrays to the output array
+    """
+    plan = expression.plan(shapes)
+    backend_einsum = autoray.get_lib_fn(backend, 'einsum')
+    input_shapes = plan.input_shapes
+    compiled = expression.compiled
+    rewrite = plan.rewrite
+    if rewrite is not None:
+        plan = rewrite.plan
+        compiled = rewrite.compiled if compiled is not None else None
+
+    path = None
+    if compiled is None:
+        if plan.output_axes is None:
+            # Broadcasting ellipses needs a single einsum call, so report the missing letters
+            named_einsum.compile(expression.parsed)
+        path = expression.contraction_path(plan, 'greedy' if optimize is False else optimize)
+    elif optimize is not False and len(plan.input_axes) > 2 and plan.output_axes is not None:
+        path = expression.contraction_path(plan, optimize)
+    else:
+        named_einsum.paths.check_optimize(optimize, expression.num_inputs)
+    recipe = (getattr(plan, 'blas', None) if path is None and
+              backend in named_einsum.blas.BACKENDS else None)
+
+    output_shape = None
+    if expression.output_layout is not None and expression.output_layout.has_product:
+        output_shape = expression.output_layout.unflattened_shape(
+            tuple(plan.axis_sizes[name] for name in plan.output_axes)
+        )
+
+    def _evaluate(*arrays):
+        arrays = [array if shape is None else array.reshape(shape)
+                  for array, shape in zip(arrays, input_shapes)]
+        if rewrite is not None:
+            arrays = named_einsum.rewrite.apply(rewrite, arrays, backend)
+        if recipe is not None:
+            output = named_einsum.blas.contract(backend, recipe, *arrays)
+        elif path is None:
+            output = backend_einsum(compiled, *arrays)
+        else:
+            output = named_einsum.paths.contract_path(
+                backend_einsum, arrays, plan.input_axes, plan.output_axes, path, backend
+            )
+        return output if output_shape is None else output.reshape(output_shape)
+
+    return _evaluate
+
+
+def _compile(function, backend):
+    """Compile a specialised function with the backend's compiler."""
+    # pylint: disable=import-outside-toplevel
+    if backend == 'jax':
+        import jax
+        return jax.jit(function)
+    if backend == 'torch':
+        import torch
+        return torch.compile(function, dynamic=False)
+    return function
+
+
+class JitExpression:
+    """
+    A named einsum expression specialised to each signature of input shapes it is called with.
+
+    Calls look up the function specialised to the input shapes (see ``specialize``), which is
+    built on the first call with those shapes, optionally compiled, and reused afterwards.
+    Inside a traced function (i.e. ``jax.jit``), the lookup only happens while tracing.
+
+    Parameters
+    ----------
+    subscripts : string
+      Readable einsum subscripts string
+    optimize : bool or string, optional
+      Contraction path strategy, see ``Expression.__call__``
+    compile : bool, optional
+      Compile each specialised function with ``jax.jit`` or ``torch.compile``.  By default jax
+      functions are compiled, and torch functions are not, since ``torch.compile`` needs a
+      working compiler toolchain.
+    """
+
+    def __init__(self, subscripts, optimize=False, compile=None):
+        self.expression = named_einsum.prepare(subscripts)
+        self.optimize = optimize
+        self.compile = compile
+        self.functions = {}
+
+    def __repr__(self):
+        """String representation of this expression."""
+        return f'JitExpression({self.expression.compiled or self.expression.subscripts!r})'
+
+    def specialize(self, shapes, backend):
+        """Returns the function for some input shapes on a backend, building it if needed."""
+        key = (backend, tuple(tuple(shape) for shape in shapes))
+        function = self.functions.get(key)
+        if function is None:
+            function = specialize(self.expression, list(key[1]), backend, self.optimize)
+            if self.compile or (self.compile is None and backend == 'jax'):
+                function = _compile(function, backend)
+            self.functions[key] = function
+        return function
+
+    def __call__(self, *arrays):
+        """Evaluate the expression on some input arrays."""
+        backend = autoray.infer_backend(arrays[0])
+        function = self.functions.get((backend, tuple(array.shape for array in arrays)))
+        if function is None:
+            function = self.specialize([array.shape for array in arrays], backend)
+        return function(*arrays)
+
+
+def jit(subscripts, optimize=False, compile=None):
+    """Returns a ``JitExpression``, evaluating through functions specialised to fixed shapes."""
+    return JitExpression(subscripts, optimize, compile)
@@ -0,0 +1,93 @@
+"""Streaming evaluation of contractions over chunks of operands."""
+import functools
+
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.slicing
+
+
+def _check_stream(expression, axis, constants):
+    """Check the streamed axis and constant operands, returning the streamed variable names."""
+    parsed = expression.parsed
+    if axis not in parsed.input_axes:
+        raise named_einsum.exceptions.UnknownAxisError(axis)
+
+    names = [variable.name for variable in parsed.input_variables]
+    for name in constants:
+        if name not in names:
+            raise named_einsum.exceptions.UnknownVariableError(name)
+    for variable in parsed.input_variables:
+        if variable.name in constants and axis in variable.axis_names:
+            raise named_einsum.exceptions.SlicingError(
+                f'constant {variable.name} has the streamed axis {axis}'
+            )
+
+    if parsed.output_variable is not None:
+        for output_axis in parsed.output_variable.axes:
+            if axis in output_axis.axis_names[1:]:
+                raise named_einsum.exceptions.SlicingError(
+                    f'streamed axis {axis} must lead its output product axis'
+                )
+
+    # Variables that appear several times under the same name are streamed once
+    return list(dict.fromkeys(name for name in names if name not in constants))
+
+
+def _operands(names, streamed_names, constants, chunk):
+    """Combine one chunk of streamed operands with the constant operands, in input order."""
+    if isinstance(chunk, dict):
+        streamed = chunk
+    elif len(streamed_names) == 1 and not isinstance(chunk, (tuple, list)):
+        streamed = {streamed_names[0]: chunk}
+    else:
+        streamed = dict(zip(streamed_names, chunk))
+    return [constants[name] if name in constants else streamed[name] for name in names]
+
+
+def _stream_output(expression, operands, chunks, kwargs):
+    for chunk in chunks:
+        yield expression(*operands(chunk), **kwargs)
+
+
+def stream(subscripts, chunks, axis, *, constants=None, optimize=False):
+    """
+    Evaluate an expression over an iterable of operand chunks split along one named axis.
+
+    Only one chunk of the streamed operands is held at a time.
+
+    Parameters
+    ----------
+    subscripts : string
+      Readable einsum subscripts string
+    chunks : iterable
+      Chunks of the operands that have the streamed axis.  Each chunk is either a dict from
+      variable name to array, a tuple of arrays for the non-constant variables in input order,
+      or a single array if only one variable is not constant.
+    axis : string
+      Name of the axis that the chunks are split along
+    constants : dict, optional
+      Operands that are the same for every chunk, by variable name
+    optimize : bool, string or list of tuple, optional
+      Contraction path strategy, see ``Expression.__call__``
+
+    Returns
+    -------
+    iterator or array
+      If the streamed axis is in the output, an iterator over output chunks.  Otherwise, the
+      sum of the contraction over all chunks (None if there were no chunks).
+    """
+    expression = named_einsum.prepare(subscripts)
+    axis = axis.lower()
+    constants = constants or {}
+    streamed_names = _check_stream(expression, axis, constants)
+    names = [variable.name for variable in expression.parsed.input_variables]
+    operands = functools.partial(_operands, names, streamed_names, constants)
+    kwargs = {'optimize': optimize}
+
+    if axis in expression.parsed.output_axes:
+        return _stream_output(expression, operands, chunks, kwargs)
+
+    running_sum = named_einsum.slicing.RunningSum()
+    for chunk in chunks:
+        running_sum.add(expression(*operands(chunk), **kwargs))
+    return running_sum.total
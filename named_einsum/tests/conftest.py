@@ -0,0 +1,58 @@
+"""Fixtures shared by the tests."""
+import numpy as np
+import pytest
+
+# Element mass matrices of a 1D finite element discretisation, with each matrix flattened
+MASS = '''
+phi_i[basis_i, quad],
+phi_j[basis_j, quad],
+weight[quad],
+jacobian_det[element, quad]
+->
+mass[element, basis_i * basis_j]
+'''
+
+# Element mass matrices of a 2D tensor-product discretisation, as in the README
+MASS_2D = '''
+phi_ix[basis_ix, quad_x],
+phi_iy[basis_iy, quad_y],
+phi_jx[basis_jx, quad_x],
+phi_jy[basis_jy, quad_y],
+weight_x[quad_x],
+weight_y[quad_y],
+jacobian_det[element, quad_x, quad_y]
+->
+mass[element, basis_ix, basis_iy, basis_jx, basis_jy]
+'''
+
+
+@pytest.fixture
+def mass():
+    """Subscripts of 1D element mass matrices."""
+    return MASS
+
+
+@pytest.fixture
+def mass_operands():
+    """Factory of random operands of ``mass``, with 4 basis functions and 6 quadrature points."""
+    def _mass_operands(num_elements=50):
+        return [np.random.rand(4, 6), np.random.rand(4, 6), np.random.rand(6),
+                np.random.rand(num_elements, 6)]
+    return _mass_operands
+
+
+@pytest.fixture
+def mass_2d():
+    """Subscripts of 2D element mass matrices."""
+    return MASS_2D
+
+
+@pytest.fixture
+def mass_2d_operands():
+    """Factory of random operands of ``mass_2d``, with 3 basis functions in each direction."""
+    def _mass_2d_operands(num_elements=6):
+        phi_x = np.random.rand(3, 4)
+        phi_y = np.random.rand(3, 5)
+        return [phi_x, phi_y, phi_x, phi_y, np.random.rand(4), np.random.rand(5),
+                np.random.rand(num_elements, 4, 5)]
+    return _mass_2d_operands
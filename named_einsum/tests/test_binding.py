@@ -0,0 +1,69 @@
+"""Tests of binding operands to expressions ahead of time."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.exceptions
+
+MASS = '''
+  phi_ix[basis_ix, quadrature_x],
+  phi_jx[basis_jx, quadrature_x],
+  weight_x[quadrature_x],
+  jacobian_det[element, quadrature_x]
+  ->
+  mass[element, basis_ix * basis_jx]
+'''
+
+
+def test_bind():
+    """Bound operands are contracted into one tensor, leaving an expression of the rest."""
+    phi, weight, jacobian = np.random.rand(4, 5), np.random.rand(5), np.random.rand(6, 5)
+    subscripts, bound = named_einsum.bind(
+        MASS, {'phi_ix': phi, 'phi_jx': phi, 'weight_x': weight}
+    )
+    assert subscripts == ('jacobian_det[element, quadrature_x], '
+                          'bound[basis_ix, quadrature_x, basis_jx] -> '
+                          'mass[element, basis_ix * basis_jx]')
+    assert bound.shape == (4, 5, 4)
+    expected = named_einsum.einsum(MASS, phi, phi, weight, jacobian)
+    assert np.allclose(named_einsum.einsum(subscripts, jacobian, bound), expected)
+
+    # Remaining expressions can be bound again, under another name
+    subscripts, factor = named_einsum.bind(subscripts, {'jacobian_det': jacobian}, name='factor')
+    assert subscripts.startswith('bound[basis_ix, quadrature_x, basis_jx], '
+                                 'factor[element, quadrature_x] ->')
+    assert np.allclose(named_einsum.einsum(subscripts, bound, factor), expected)
+
+
+def test_bind_products_and_scalars():
+    """Product axes of bound operands are expanded, and fully contracted operands are scalars."""
+    expression = 'A[i, j * k], x[k], y[j], w[i] -> z[i]'
+    A, x, y, w = np.random.rand(3, 20), np.random.rand(5), np.random.rand(4), np.random.rand(3)
+    subscripts, bound = named_einsum.bind(expression, {'A': A, 'x': x, 'y': y})
+    assert subscripts == 'w[i], bound[i] -> z[i]'
+    assert np.allclose(named_einsum.einsum(subscripts, w, bound),
+                       named_einsum.einsum(expression, A, x, y, w))
+
+    subscripts, bound = named_einsum.bind('a[i], b[i], C[j] -> D[j]', {'a': x, 'b': x})
+    assert subscripts == 'C[j], bound -> D[j]'
+    assert np.allclose(bound, x @ x)
+
+
+def test_bind_errors():
+    """Unknown variables, ellipses and unsized product axes cannot be bound."""
+    A = np.random.rand(3, 4)
+    with pytest.raises(named_einsum.exceptions.UnknownVariableError):
+        named_einsum.bind('A[i, j], B[j] -> C[i]', {'X': A})
+    with pytest.raises(named_einsum.exceptions.BindingError):
+        named_einsum.bind('A[i, ...], B[j] -> C[i, ...]', {'A': A})
+    with pytest.raises(named_einsum.exceptions.BindingError):
+        named_einsum.bind('A[i, j * k], B[k] -> C[i]', {'A': A})
+    with pytest.raises(named_einsum.exceptions.BindingError):
+        named_einsum.bind('A[i, j], bound[j] -> C[i]', {'A': A})
+
+
+def test_bind_variable_named_name():
+    """A variable called ``name`` is bound like any other."""
+    x, y = np.random.rand(4), np.random.rand(4)
+    subscripts, bound = named_einsum.bind('name[i], y[i] -> z', {'name': x})
+    assert subscripts == 'y[i], bound[i] -> z'
+    assert np.allclose(named_einsum.einsum(subscripts, y, bound), x @ y)
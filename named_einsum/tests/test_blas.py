@@ -0,0 +1,64 @@
+"""Tests of dispatching matrix products to matmul."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.blas
+
+
+@pytest.mark.parametrize('axes_a, axes_b, output_axes, recognised', [
+    (['i', 'k'], ['k', 'j'], ['i', 'j'], True),  # matmul
+    (['b', 'i', 'k'], ['b', 'k', 'j'], ['b', 'i', 'j'], True),  # batched matmul
+    (['k', 'i'], ['j', 'k'], ['j', 'i'], True),  # transposed operands and output
+    (['i'], ['j'], ['i', 'j'], True),  # outer product
+    (['i', 'k', 'l'], ['l', 'k', 'j'], ['j', 'i'], True),  # tensordot
+    (['i', 'i'], ['i', 'j'], ['j'], False),  # diagonal
+    (['i', 'k'], ['j'], ['i', 'j'], False),  # sum within one operand
+])
+def test_recipe(axes_a, axes_b, output_axes, recognised):
+    """Matrix products are recognised with any axis order, other contractions are not."""
+    recipe = named_einsum.blas.matmul_recipe(axes_a, axes_b, output_axes)
+    assert (recipe is not None) == recognised
+
+
+@pytest.mark.parametrize('expression, shapes', [
+    ('A[i, k], B[k, j] -> C[i, j]', [(20, 30), (30, 40)]),
+    ('A[b, i, k], B[b, k, j] -> C[b, i, j]', [(4, 20, 30), (4, 30, 40)]),
+    ('A[k, i], B[j, k] -> C[j, i]', [(30, 20), (40, 30)]),
+    ('A[i, k], x[k] -> y[i]', [(200, 300), (300,)]),
+    ('A[k, l], B[k, l, j] -> y[j]', [(30, 20), (30, 20, 40)]),
+    ('A[i, k * l], B[l, k, j] -> C[j * i]', [(20, 60), (10, 6, 30)]),
+    ('A[b, i, k], B[k, b] -> C[i, b]', [(16, 40, 30), (30, 16)]),
+])
+def test_matches_einsum(expression, shapes):
+    """Contractions dispatched to matmul give the same output as einsum."""
+    rng = np.random.default_rng(0)
+    arrays = [rng.standard_normal(shape) for shape in shapes]
+    prepared = named_einsum.prepare(expression)
+    assert prepared.plan([array.shape for array in arrays]).blas is not None
+
+    # Extra keyword arguments for the backend einsum bypass matmul
+    output = prepared(*arrays)
+    np.testing.assert_allclose(output, prepared(*arrays, dtype=float))
+
+    out = np.empty_like(output)
+    assert prepared(*arrays, out=out) is out
+    np.testing.assert_allclose(out, output)
+
+
+def test_small_and_sliced():
+    """Small and outer products stay with einsum, and sliced or pairwise contractions match."""
+    small = named_einsum.prepare('A[i, k], B[k, j] -> C[i, j]')
+    assert small.plan([(2, 3), (3, 4)]).blas is None
+    outer = named_einsum.prepare('x[i], y[j] -> A[i, j]')
+    assert outer.plan([(500,), (500,)]).blas is None
+
+    rng = np.random.default_rng(1)
+    A, B, C = (rng.standard_normal((32, 32)) for _ in range(3))
+    expected = A @ B @ C
+    chain = named_einsum.prepare('A[i, j], B[j, k], C[k, l] -> D[i, l]')
+    np.testing.assert_allclose(chain(A, B, C, optimize=True), expected)
+    np.testing.assert_allclose(chain(A, B, C, optimize=True, num_slices=4), expected)
+
+    pair = named_einsum.prepare('A[i, k], B[k, j] -> C[i, j]')
+    np.testing.assert_allclose(pair(A, B, slice_over='k', num_slices=4), A @ B)
+    np.testing.assert_allclose(pair(A, B, slice_over='i', num_slices=4), A @ B)
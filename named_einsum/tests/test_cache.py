@@ -0,0 +1,99 @@
+"""Tests of the translation and plan caches."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.cache
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted first."""
+    cache = named_einsum.cache.LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert 'a' in cache and 'c' in cache and 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.info() == named_einsum.cache.CacheInfo(1, 1, 2, 2)
+
+    cache.maxsize = 1
+    assert len(cache) == 1 and 'c' in cache
+
+
+def test_canonical_form():
+    """Formatting, comments and naming do not change the canonical form."""
+    a = named_einsum.parse('A[i, k], B[k, j] -> C[i, j]')
+    b = named_einsum.parse('''
+    // matrix product
+    left[row,inner],right[inner,col]->[row,col]
+    ''')
+    c = named_einsum.parse('A[i, k], B[k, j] -> C[j, i]')
+    assert named_einsum.cache.canonical_form(a) == named_einsum.cache.canonical_form(b)
+    assert named_einsum.cache.canonical_form(a) != named_einsum.cache.canonical_form(c)
+
+
+def test_translate_cache_stats():
+    """Reformatted and renamed expressions reuse entries, and clearing resets statistics."""
+    named_einsum.cache_clear()
+    assert named_einsum.translate('A[i, k], B[k, j] -> C[i, j]') == 'AB,BC->AC'
+    assert named_einsum.translate('A[i, k], B[k, j] -> C[i, j]') == 'AB,BC->AC'
+    assert named_einsum.translate('X[a, b], Y[b, c] -> Z[a, c]') == 'AB,BC->AC'
+
+    # Formatting and comments are normalised away, sharing the parsed expression
+    reformatted = 'A[i,k],\n  B[k , j]  // right factor\n->C[i,j]'
+    assert named_einsum.translate(reformatted) == 'AB,BC->AC'
+    assert (named_einsum.translate(reformatted, True)[1] is
+            named_einsum.translate('A[i, k], B[k, j] -> C[i, j]', True)[1])
+    assert named_einsum.prepare(reformatted) is named_einsum.prepare('A[i, k], B[k, j] -> C[i, j]')
+
+    info = named_einsum.cache_info()
+    assert info['translate'].hits == 5 and info['translate'].misses == 2
+    assert info['canonical'].hits == 1 and info['canonical'].misses == 1
+    assert info['canonical'].currsize == 1
+
+    named_einsum.cache_clear()
+    assert named_einsum.translate.cache_info().currsize == 0
+
+
+def test_translate_cache_bounded():
+    """The translation cache never grows past its maximum size."""
+    named_einsum.set_cache_size(8, 'translate')
+    try:
+        for n in range(32):
+            named_einsum.translate(f'A[i{n}] -> [i{n}]')
+        assert named_einsum.translate.cache_info().currsize == 8
+    finally:
+        named_einsum.set_cache_size(named_einsum.cache.DEFAULT_MAXSIZE, 'translate')
+
+
+def test_fifo_policy():
+    """The FIFO policy evicts the oldest entry even if it was used recently."""
+    cache = named_einsum.cache.LRUCache(maxsize=2, policy='fifo')
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'a' not in cache and 'b' in cache and 'c' in cache
+    with pytest.raises(ValueError):
+        cache.policy = 'random'
+
+
+def test_plan_cache():
+    """Plans are memoised per expression and input shapes."""
+    named_einsum.cache_clear()
+    expr = named_einsum.prepare('A[i, k], B[k, j] -> C[i * j]')
+    A, B = np.random.rand(2, 3), np.random.rand(3, 4)
+    for _ in range(3):
+        assert np.allclose(expr(A, B), (A @ B).reshape(-1))
+    expr(np.random.rand(5, 3), B)
+
+    info = named_einsum.cache_info()['plans']
+    assert info.hits == 2 and info.misses == 2
+    assert expr.plan([[2, 3], [3, 4]]) is expr.plan([(2, 3), (3, 4)])
+
+    named_einsum.set_cache_policy('fifo', 'plans')
+    try:
+        assert np.allclose(expr(A, B), (A @ B).reshape(-1))
+    finally:
+        named_einsum.set_cache_policy('lru')
@@ -0,0 +1,59 @@
+"""Tests of generated kernels for tiny fixed-size contractions."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.cache
+import named_einsum.codegen
+import named_einsum.exceptions
+
+MASS = 'phi_i[a, q], phi_j[b, q], weight[q], det[q] -> mass[a * b]'
+
+
+def _methods():
+    try:
+        import numba  # noqa: F401  pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        return ['numpy']
+    return ['numpy', 'numba']
+
+
+@pytest.mark.parametrize('method', _methods())
+def test_kernel_matches_einsum(method):
+    """Kernels give the same output as einsum over every batch entry."""
+    kernel = named_einsum.kernel('A[i, k], B[k, j] -> C[i, j]', [(3, 3), (3, 3)], method)
+    # Small batches are gathered by numpy kernels, and large ones are run in blocks
+    for num_batch in (5, named_einsum.codegen.BLOCK_SIZE + 3):
+        A, B = np.random.rand(num_batch, 3, 3), np.random.rand(num_batch, 3, 3)
+        assert np.allclose(kernel(A, B), A @ B)
+
+    phi, weight, det = np.random.rand(7, 4, 5), np.random.rand(7, 5), np.random.rand(7, 5)
+    kernel = named_einsum.kernel(MASS, [(4, 5), (4, 5), (5,), (5,)], method)
+    assert np.allclose(kernel(phi, phi, weight, det),
+                       np.einsum('naq,nbq,nq,nq->nab', phi, phi, weight, det).reshape(7, 16))
+
+    # Traces, ellipses and scalar outputs
+    kernel = named_einsum.kernel('A[..., i, i] -> t', [(2, 3, 3)], method)
+    assert np.allclose(kernel(A[:2].reshape(1, 2, 3, 3)),
+                       np.einsum('nbii->n', A[:2].reshape(1, 2, 3, 3)))
+
+
+def test_kernel_cached():
+    """Kernels are generated once per expression, shapes and method."""
+    named_einsum.cache.cache_clear()
+    shapes = [(2, 2), (2, 2)]
+    kernel = named_einsum.kernel('A[i, k], B[k, j] -> C[i, j]', shapes, 'numpy')
+    assert named_einsum.kernel('X[a, b], Y[b, c] -> Z[a, c]', shapes, 'numpy') is kernel
+    assert named_einsum.kernel('A[i, k], B[k, j] -> C[i, j]', [(2, 3), (3, 2)], 'numpy') \
+        is not kernel
+    assert named_einsum.cache.cache_info()['kernels'].hits == 1
+
+
+def test_kernel_errors():
+    """Operands of other shapes and contractions too large to unroll are reported."""
+    kernel = named_einsum.kernel('A[i, k], B[k, j] -> C[i, j]', [(2, 3), (3, 2)], 'numpy')
+    with pytest.raises(named_einsum.exceptions.KernelShapeError):
+        kernel(np.ones((4, 3, 2)), np.ones((4, 2, 3)))
+    with pytest.raises(named_einsum.exceptions.KernelShapeError):
+        kernel(np.ones((4, 2, 3)), np.ones((5, 3, 2)))
+    with pytest.raises(named_einsum.exceptions.KernelSizeError):
+        named_einsum.kernel('A[i, k], B[k, j] -> C[i, j]', [(32, 32), (32, 32)])
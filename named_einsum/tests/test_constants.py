@@ -0,0 +1,95 @@
+"""Tests of memoised intermediates of constant operands."""
+import numpy as np
+import pytest
+import torch
+import named_einsum
+import named_einsum.cache
+import named_einsum.exceptions
+
+MASS = '''
+  phi_ix[basis_ix, quadrature_x],
+  phi_jx[basis_jx, quadrature_x],
+  weight_x[quadrature_x],
+  jacobian_det[element, quadrature_x]
+  ->
+  mass[element, basis_ix * basis_jx]
+'''
+CONSTANTS = ('phi_ix', 'phi_jx', 'weight_x')
+
+
+def _operands(num_elements=6):
+    phi, weight = np.random.rand(4, 5), np.random.rand(5)
+    return phi, phi, weight, np.random.rand(num_elements, 5)
+
+
+def _expected(phi_ix, phi_jx, weight_x, jacobian_det):
+    return np.einsum('iq,jq,q,eq->eij', phi_ix, phi_jx, weight_x,
+                     jacobian_det).reshape(len(jacobian_det), -1)
+
+
+def test_constants_reused():
+    """Constant operands are contracted once, and reused while they are the same objects."""
+    named_einsum.cache.cache_clear()
+    phi, _, weight, jacobian = _operands()
+    for _ in range(3):
+        jacobian = np.random.rand(6, 5)
+        output = named_einsum.einsum(MASS, phi, phi, weight, jacobian, constants=CONSTANTS)
+        assert np.allclose(output, _expected(phi, phi, weight, jacobian))
+    assert named_einsum.cache.cache_info()['constants'].hits == 2
+
+    # New constant operands are noticed, an in-place change is not without a version
+    weight = weight * 2
+    output = named_einsum.einsum(MASS, phi, phi, weight, jacobian, constants=CONSTANTS)
+    assert np.allclose(output, _expected(phi, phi, weight, jacobian))
+    weight *= 2
+    stale = named_einsum.einsum(MASS, phi, phi, weight, jacobian, constants=CONSTANTS)
+    assert np.allclose(stale * 2, _expected(phi, phi, weight, jacobian))
+
+    versions = {'phi_ix': 0, 'phi_jx': 0, 'weight_x': 1}
+    output = named_einsum.einsum(MASS, phi, phi, weight, jacobian, constants=versions)
+    assert np.allclose(output, _expected(phi, phi, weight, jacobian))
+
+
+def test_constants_torch_versions():
+    """Torch tensors modified in place are noticed through their version counters."""
+    phi, _, weight, jacobian = (torch.from_numpy(array) for array in _operands())
+    expression = named_einsum.prepare(MASS)
+    expression(phi, phi, weight, jacobian, constants=CONSTANTS)
+    weight.mul_(2)
+    output = expression(phi, phi, weight, jacobian, constants=CONSTANTS)
+    expected = _expected(phi.numpy(), phi.numpy(), weight.numpy(), jacobian.numpy())
+    assert np.allclose(output.numpy(), expected)
+
+
+def test_constants_options():
+    """Constants combine with searched paths and slicing, and are checked by name."""
+    operands = _operands()
+    expected = _expected(*operands)
+    assert np.allclose(named_einsum.einsum(MASS, *operands, constants=CONSTANTS,
+                                           optimize=True), expected)
+    assert np.allclose(named_einsum.einsum(MASS, *operands, constants=['weight_x'],
+                                           slice_over='element', num_slices=3), expected)
+    everything = CONSTANTS + ('jacobian_det',)
+    assert np.allclose(named_einsum.einsum(MASS, *operands, constants=everything), expected)
+    for nothing in ([], {}):
+        assert np.allclose(named_einsum.einsum(MASS, *operands, constants=nothing), expected)
+
+    with pytest.raises(named_einsum.exceptions.UnknownVariableError):
+        named_einsum.einsum(MASS, *operands, constants=['phi'])
+    with pytest.raises(named_einsum.exceptions.UnknownVariableError):
+        named_einsum.einsum(MASS, *operands, constants=['Weight_X'])
+    with pytest.raises(named_einsum.exceptions.InvalidPathError):
+        named_einsum.einsum(MASS, *operands, constants=CONSTANTS, optimize=[(0, 1), (0, 1), (0, 1)])
+
+
+def test_constants_repeated_variable():
+    """A constant variable that appears more than once is constant at every position."""
+    subscripts = 'phi[basis_i, q], phi[basis_j, q], weight[q], det[e, q] -> [e, basis_i * basis_j]'
+    phi, _, weight, jacobian = _operands()
+    output = named_einsum.einsum(subscripts, phi, phi, weight, jacobian, constants=['phi'])
+    assert np.allclose(output, _expected(phi, phi, weight, jacobian))
+
+    # Both positions hold the memoised intermediate, so an in-place change goes unnoticed
+    phi *= 2
+    stale = named_einsum.einsum(subscripts, phi, phi, weight, jacobian, constants=['phi'])
+    assert np.allclose(stale * 4, _expected(phi, phi, weight, jacobian))
@@ -0,0 +1,34 @@
+"""Tests of cost and memory estimates."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.exceptions
+
+CHAIN = 'A[i, j], B[j, k], C[k, l] -> D[i * l]'
+
+
+def test_estimate_naive_and_optimized():
+    """Estimates come from shapes alone, for a single call and for a contraction path."""
+    naive = named_einsum.estimate(CHAIN, (10, 20), (20, 30), (30, 5))
+    assert naive.flops == 10 * 20 * 30 * 5
+    assert naive.output_size == naive.largest_intermediate == 50
+    assert naive.output_shape == (50,)
+    assert naive.axis_sizes == {'i': 10, 'j': 20, 'k': 30, 'l': 5}
+    assert naive.path is None and naive.peak_bytes is None
+
+    optimized = named_einsum.estimate(CHAIN, (10, 20), (20, 30), (30, 5), optimize='optimal')
+    assert optimized.path == [(1, 2), (0, 1)]
+    assert optimized.flops == 20 * 30 * 5 + 10 * 20 * 5
+    assert optimized.largest_intermediate == 20 * 5
+    assert optimized.flops < naive.flops
+
+
+def test_estimate_arrays():
+    """Arrays give their shapes and itemsize, and shapes are checked."""
+    A = np.empty((10, 20), dtype=np.float32)
+    estimate = named_einsum.estimate('A[i, j], x[j] -> y[i]', A, (20,))
+    assert estimate.peak_bytes == 10 * 4
+    assert named_einsum.estimate('A[i, j] ->', (3, 4), itemsize=8).output_shape == ()
+
+    with pytest.raises(named_einsum.exceptions.InconsistentAxisSizeError):
+        named_einsum.estimate('A[i, j], x[j] -> y[i]', (10, 20), (30,))
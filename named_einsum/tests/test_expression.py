@@ -0,0 +1,97 @@
+"""Tests of prepared expressions."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.exceptions
+
+
+def test_prepare_matches_einsum():
+    """A prepared expression gives the same result as einsum."""
+    A = np.random.rand(4, 5)
+    B = np.random.rand(5, 6)
+    expr = named_einsum.prepare('A[i, k], B[k, j] -> C[i, j]')
+
+    assert isinstance(expr, named_einsum.Expression)
+    assert expr.compiled == 'AB,BC->AC'
+    assert np.allclose(expr(A, B), A @ B)
+    assert np.allclose(expr(A, B), named_einsum.einsum('A[i, k], B[k, j] -> C[i, j]', A, B))
+
+
+def test_prepare_product_axes():
+    """Product axes in both inputs and outputs are reshaped."""
+    A = np.random.rand(3, 4)
+    B = np.random.rand(3 * 4, 2)
+    expr = named_einsum.prepare('A[i, j], B[i * j, k] -> C[k * i]')
+
+    out = expr(A, B)
+    expected = np.einsum('ij,ijk->ki', A, B.reshape(3, 4, 2)).reshape(-1)
+    assert out.shape == (2 * 3,)
+    assert np.allclose(out, expected)
+
+
+def test_prepare_trailing_ellipsis():
+    """Axes after a leading ellipsis are matched to the trailing dimensions."""
+    A = np.random.rand(2, 3, 4, 5)
+    B = np.random.rand(4, 5)
+    out = named_einsum.prepare('[..., a, b], [a, b] -> [...]')(A, B)
+    assert np.allclose(out, np.einsum('...ab,ab->...', A, B))
+
+
+def test_prepare_shape_errors():
+    """Shape errors are raised on call, and ellipsis errors on preparation."""
+    expr = named_einsum.prepare('[a], [a] ->')
+    with pytest.raises(named_einsum.exceptions.InconsistentAxisSizeError):
+        expr(np.empty(5), np.empty(10))
+    with pytest.raises(named_einsum.exceptions.InconsistentShapeDefinitionError):
+        expr(np.empty((5, 5)), np.empty(5))
+    with pytest.raises(named_einsum.exceptions.InconsistentAxisSizeError):
+        named_einsum.prepare('[i], [j], [i * j] ->')(np.empty(2), np.empty(3), np.empty(7))
+    with pytest.raises(named_einsum.exceptions.AmbiguousEllipsesError):
+        named_einsum.prepare('[..., a, ...] ->')
+
+
+def test_out_product_axes():
+    """Outputs with product axes are written through a flat view of ``out``."""
+    A = np.random.rand(3, 4)
+    B = np.random.rand(4, 5)
+    expr = named_einsum.prepare('A[i, k], B[k, j] -> C[i * j]')
+    expected = (A @ B).reshape(-1)
+
+    out = np.empty(3 * 5)
+    assert expr(A, B, out=out) is out
+    assert np.allclose(out, expected)
+    for kwargs in ({'optimize': [(0, 1)]}, {'num_slices': 2, 'slice_over': 'k'},
+                   {'num_slices': 3, 'slice_over': 'i'}):
+        out[...] = 0
+        expr(A, B, out=out, **kwargs)
+        assert np.allclose(out, expected)
+
+    # Strided outputs are still written in place
+    strided = np.zeros(2 * 3 * 5)
+    expr(A, B, out=strided[::2])
+    assert np.allclose(strided[::2], expected)
+    with pytest.raises(named_einsum.exceptions.OutputShapeError):
+        expr(A, B, out=np.empty((3, 5)))
+
+
+def test_on_copy():
+    """Reshapes that would copy warn or raise when asked to."""
+    A = np.random.rand(3, 4)
+    expr = named_einsum.prepare('A[i, j] -> C[j * i]')
+
+    # Collapsing the transposed output of einsum needs a copy
+    with pytest.raises(named_einsum.exceptions.ReshapeCopyError):
+        expr(A, on_copy='raise')
+    with pytest.warns(named_einsum.exceptions.ReshapeCopyWarning):
+        assert np.allclose(expr(A, on_copy='warn'), A.T.reshape(-1))
+    with pytest.raises(named_einsum.exceptions.ReshapeCopyError, match='Reshaping output'):
+        named_einsum.einsum('A[i, j] -> [j * i]', A, on_copy='raise')
+    out = np.empty(4 * 3)
+    expr(A, out=out, on_copy='raise')
+    assert np.allclose(out, A.T.reshape(-1))
+
+    # Expanding product axes of non-contiguous inputs only creates views
+    B = np.random.rand(5, 6).T
+    out = named_einsum.einsum('B[i * k, j], v[i], w[k] -> C[i, j, k]', B, np.ones(2),
+                              np.ones(3), on_copy='raise')
+    assert np.allclose(out, B.reshape(2, 3, 5).transpose(0, 2, 1))
@@ -0,0 +1,28 @@
+"""Tests of lazy imports."""
+import subprocess
+import sys
+
+import named_einsum
+
+
+def test_import_is_lazy():
+    """Importing the package and translating does not import the array backends."""
+    output = subprocess.run(
+        [sys.executable, '-c', 'import sys, named_einsum; '
+         'print(" ".join(sys.modules)); named_einsum.translate("[a] ->"); '
+         'print(" ".join(sys.modules))'],
+        check=True, capture_output=True, text=True
+    ).stdout.splitlines()
+    after_import, after_translate = output[0].split(), output[1].split()
+
+    for module in ['autoray', 'numpy', 'named_einsum.lark_parser', 'named_einsum.expression']:
+        assert module not in after_import
+    assert 'named_einsum.lark_parser' in after_translate
+    assert 'autoray' not in after_translate
+
+
+def test_lazy_attributes():
+    """Lazily imported attributes and submodules resolve on access."""
+    assert named_einsum.Expression is named_einsum.expression.Expression
+    assert named_einsum.out_of_core is named_einsum.outofcore.out_of_core
+    assert 'stream' in dir(named_einsum)
@@ -0,0 +1,37 @@
+"""Tests of multi-expression evaluation with shared intermediates."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.exceptions
+
+STIFFNESS = '''
+dphi_i[basis_i, quad], dphi_j[basis_j, quad], weight[quad], jacobian_det[element, quad]
+->
+stiffness[element, basis_i * basis_j]
+'''
+LOAD = 'phi_i[basis_i, quad], weight[quad], jacobian_det[element, quad] -> load[element, basis_i]'
+
+
+def test_einsum_many(mass, mass_operands):
+    """Shared intermediates are computed once and outputs match separate evaluation."""
+    operands = dict(zip(['phi_i', 'phi_j', 'weight', 'jacobian_det'], mass_operands()),
+                    dphi_i=np.random.rand(4, 6), dphi_j=np.random.rand(4, 6))
+    expressions = {'mass': mass, 'stiffness': STIFFNESS, 'load': LOAD}
+    outputs, report = named_einsum.einsum_many(expressions, operands)
+
+    for name, subscripts in expressions.items():
+        variables = [v.name for v in named_einsum.parse(subscripts).input_variables]
+        expected = named_einsum.einsum(subscripts, *[operands[v] for v in variables])
+        assert outputs[name].shape == expected.shape
+        assert np.allclose(outputs[name], expected)
+
+    # weight * jacobian_det is shared by all three expressions
+    assert report.shared_intermediates >= 2
+    assert report.flops_saved > 0
+    assert report.flops + report.flops_saved == report.flops_without_sharing
+
+    outputs, _ = named_einsum.einsum_many([LOAD], operands)
+    assert isinstance(outputs, list) and len(outputs) == 1
+
+    with pytest.raises(named_einsum.exceptions.MissingOperandError):
+        named_einsum.einsum_many([mass], {'phi_i': operands['phi_i']})
@@ -0,0 +1,53 @@
+"""Tests of out-of-core contraction over memory-mapped arrays."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.outofcore
+
+
+def _memmap(tmp_path, name, array):
+    mapped = np.lib.format.open_memmap(tmp_path / name, mode='w+', dtype=array.dtype,
+                                       shape=array.shape)
+    mapped[...] = array
+    mapped.flush()
+    return np.load(tmp_path / name, mmap_mode='r')
+
+
+def test_out_of_core_output_axis(tmp_path, mass, mass_operands):
+    """Blocks along the leading element axis are written into a memmapped output file."""
+    phi_i, phi_j, weight, jacobian_det = mass_operands(500)
+    expected = named_einsum.einsum(mass, phi_i, phi_j, weight, jacobian_det)
+    jacobian_det = _memmap(tmp_path, 'jacobian_det.npy', jacobian_det)
+
+    out = named_einsum.out_of_core(mass, phi_i, phi_j, weight, jacobian_det,
+                                   out=tmp_path / 'mass.npy', memory_limit=8 * 4096)
+    assert isinstance(out, np.memmap)
+    assert np.allclose(np.load(tmp_path / 'mass.npy'), expected)
+
+    plan = named_einsum.prepare(mass).plan([phi_i.shape, phi_j.shape, weight.shape, (500, 6)])
+    axis, block_size = named_einsum.outofcore.choose_blocks(plan, 8, 8 * 4096)
+    assert axis == 'element'
+    assert named_einsum.outofcore.block_elements(plan, None, axis, block_size) * 8 <= 8 * 4096
+
+
+def test_out_of_core_contracted_axis(tmp_path):
+    """Blocks along a contracted axis are summed before being written."""
+    A = _memmap(tmp_path, 'A.npy', np.random.rand(300, 5))
+    B = _memmap(tmp_path, 'B.npy', np.random.rand(300, 7))
+    out = np.empty((5, 7))
+    result = named_einsum.out_of_core('A[n, i], B[n, j] -> C[i, j]', A, B,
+                                      out=out, memory_limit=8 * 1000)
+    assert result is out
+    assert np.allclose(out, np.asarray(A).T @ np.asarray(B))
+
+
+def test_out_of_core_errors(tmp_path):
+    """Infeasible budgets and mismatched outputs raise."""
+    A = np.random.rand(100, 5)
+    with pytest.raises(named_einsum.exceptions.MemoryLimitError):
+        named_einsum.out_of_core('A[n, i] -> [n, i]', A, out=np.empty((100, 5)),
+                                 memory_limit=8)
+    with pytest.raises(named_einsum.exceptions.OutputShapeError):
+        named_einsum.out_of_core('A[n, i] -> [n, i]', A, out=np.empty((5, 100)),
+                                 memory_limit=8 * 100)
@@ -0,0 +1,43 @@
+"""Tests of multithreaded execution."""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import jax.numpy as jnp
+import torch
+import pytest
+import named_einsum
+import named_einsum.slicing
+
+
+@pytest.mark.parametrize('workers', [1, 2, 4, 7])
+def test_parallel_output_axis(workers, mass, mass_operands):
+    """Partitions along an output axis are written into the output."""
+    operands = mass_operands(103)
+    expected = named_einsum.einsum(mass, *operands)
+    out = named_einsum.einsum(mass, *operands, workers=workers)
+    assert np.allclose(out, expected)
+
+
+@pytest.mark.parametrize('num_slices', [2, 5, 8])
+def test_parallel_contracted_axis(num_slices):
+    """Partitions along a contracted axis are combined with a tree reduction."""
+    A, x = np.random.rand(10, 400), np.random.rand(400)
+    with ThreadPoolExecutor(3) as executor:
+        out = named_einsum.einsum('A[i, j], x[j] -> y[i]', A, x, executor=executor,
+                                  slice_over='j', num_slices=num_slices)
+    assert np.allclose(out, A @ x)
+
+
+def test_tree_sum():
+    """Tree reduction sums every value exactly once."""
+    with ThreadPoolExecutor(2) as executor:
+        for n in range(1, 10):
+            assert named_einsum.slicing.tree_sum(executor, list(range(n))) == sum(range(n))
+
+
+@pytest.mark.parametrize('backend', [jnp.asarray, torch.from_numpy])
+def test_parallel_backends(backend, mass, mass_operands):
+    """Partitioned execution works for mutable and immutable backend arrays."""
+    operands = mass_operands(103)
+    expected = named_einsum.einsum(mass, *operands)
+    out = named_einsum.einsum(mass, *[backend(o) for o in operands], workers=3)
+    assert np.allclose(np.asarray(out), expected)
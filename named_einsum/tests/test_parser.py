@@ -0,0 +1,36 @@
+"""Tests of the expression parser."""
+from concurrent.futures import ThreadPoolExecutor
+import named_einsum
+import named_einsum.parser
+
+
+def test_shared_parser():
+    """The Lark parser is only constructed once."""
+    assert named_einsum.parser.get_parser() is named_einsum.parser.get_parser()
+
+
+def test_threaded_parse():
+    """Parsing from several threads at once gives consistent results."""
+    expressions = [
+        f'A[i{n}, j{n}], B[j{n}, k{n}] -> C[i{n}, k{n}]' for n in range(200)
+    ]
+
+    def _parse(expression):
+        parsed = named_einsum.parser.parse(expression)
+        return [v.axis_names for v in parsed.input_variables]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_parse, expressions))
+
+    for n, result in enumerate(results):
+        assert result == [[f'i{n}', f'j{n}'], [f'j{n}', f'k{n}']]
+
+
+def test_unparse():
+    """Parsed expressions are converted back into equivalent named einsum strings."""
+    for expression in ['A[i, j * k, ...], b, C[...] -> D[i * j, ...]', '[i, j], [j] -> [i]',
+                       'A[i] ->', 'A[i] -> s']:
+        unparsed = named_einsum.parser.unparse(named_einsum.parser.parse(expression))
+        assert named_einsum.translate(unparsed) == named_einsum.translate(expression)
+    assert (named_einsum.parser.unparse(named_einsum.parser.parse('A[i,j*k]->B[ i ]')) ==
+            'A[i, j * k] -> B[i]')
@@ -0,0 +1,104 @@
+"""Tests of contraction path optimisation."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.cache
+import named_einsum.exceptions
+import named_einsum.paths
+
+
+@pytest.mark.parametrize('optimize', [True, 'greedy', 'optimal'])
+def test_optimized_mass_matrix(optimize, mass_2d, mass_2d_operands):
+    """Path-optimized contraction agrees with the single einsum call."""
+    operands = mass_2d_operands()
+    expected = named_einsum.einsum(mass_2d, *operands)
+    out = named_einsum.einsum(mass_2d, *operands, optimize=optimize)
+    assert out.shape == (6, 3, 3, 3, 3)
+    assert np.allclose(out, expected)
+
+
+def test_optimal_not_worse_than_greedy(mass_2d, mass_2d_operands):
+    """The exhaustive search never finds a more expensive path than the greedy one."""
+    expr = named_einsum.prepare(mass_2d)
+    plan = expr.plan([operand.shape for operand in mass_2d_operands()])
+    args = (plan.input_axes, plan.output_axes, plan.axis_sizes)
+
+    greedy_cost, _ = named_einsum.paths.path_cost(*args, named_einsum.paths.greedy_path(*args))
+    optimal_cost, _ = named_einsum.paths.path_cost(*args, named_einsum.paths.optimal_path(*args))
+    naive_cost, _ = named_einsum.paths.path_cost(*args, [(0, 1), (0, 1), (0, 1), (0, 1), (0, 1),
+                                                         (0, 1)])
+    assert optimal_cost <= greedy_cost <= naive_cost
+
+
+def test_explicit_path():
+    """Explicit paths, including those from numpy.einsum_path, are accepted."""
+    A, B, C = np.random.rand(3, 4), np.random.rand(4, 5), np.random.rand(5, 2)
+    subscripts = 'A[i, j], B[j, k], C[k, l] -> D[i * l]'
+    expected = (A @ B @ C).reshape(-1)
+
+    assert np.allclose(named_einsum.einsum(subscripts, A, B, C, optimize=[(1, 2), (0, 1)]),
+                       expected)
+    numpy_path, _ = np.einsum_path('ij,jk,kl->il', A, B, C, optimize='optimal')
+    assert np.allclose(named_einsum.einsum(subscripts, A, B, C, optimize=numpy_path), expected)
+    assert np.allclose(named_einsum.einsum(subscripts, A, B, C, optimize=None), expected)
+
+    for invalid in (7, [0, 1]):
+        with pytest.raises(named_einsum.exceptions.InvalidPathError):
+            named_einsum.einsum(subscripts, A, B, C, optimize=invalid)
+    with pytest.raises(named_einsum.exceptions.InvalidPathError):
+        named_einsum.einsum(subscripts, A, B, C, optimize=[(0, 1)])
+    with pytest.raises(named_einsum.exceptions.InvalidPathError):
+        named_einsum.einsum(subscripts, A, B, C, optimize=[(0, 3), (0, 1)])
+    with pytest.raises(named_einsum.exceptions.InvalidPathError):
+        named_einsum.einsum(subscripts, A, B, C, optimize='fastest')
+
+
+@pytest.mark.parametrize('invalid', [[(0, 7)], [(0, 1), (0, 1)], 'bogus'])
+def test_invalid_path_single_call(invalid):
+    """Invalid paths are rejected even when a single einsum call is used."""
+    A, B = np.random.rand(3, 4), np.random.rand(4, 5)
+    with pytest.raises(named_einsum.exceptions.InvalidPathError):
+        named_einsum.einsum('A[i, j], B[j, k] -> [i, k]', A, B, optimize=invalid)
+    with pytest.raises(named_einsum.exceptions.InvalidPathError):
+        named_einsum.einsum('[..., i], [..., i] -> [...]', np.random.rand(2, 3, 4),
+                            np.random.rand(2, 4), optimize=invalid)
+
+
+def test_path_cache():
+    """Paths are cached per shape signature, and shared between renamed expressions."""
+    named_einsum.cache_clear()
+    A, B, C = np.random.rand(3, 4), np.random.rand(4, 5), np.random.rand(5, 2)
+    named_einsum.einsum('A[i, j], B[j, k], C[k, l] -> [i, l]', A, B, C, optimize=True)
+    named_einsum.einsum('X[a, b], Y[b, c], Z[c, d] -> [a, d]', A, B, C, optimize=True)
+    assert named_einsum.cache_info()['paths'] == named_einsum.cache.CacheInfo(
+        1, 1, named_einsum.cache.DEFAULT_MAXSIZE, 1
+    )
+
+    named_einsum.einsum('A[i, j], B[j, k], C[k, l] -> [i, l]', A, B, C.T.T[:, :1], optimize=True)
+    assert named_einsum.cache_info()['paths'].currsize == 2
+
+
+def test_optimized_ellipsis():
+    """Ellipsis axes are carried through pairwise contractions."""
+    A, B, C = np.random.rand(2, 7, 3), np.random.rand(2, 7, 3), np.random.rand(3)
+    out = named_einsum.einsum('[..., i], [..., i], [i] -> [...]', A, B, C, optimize='greedy')
+    assert np.allclose(out, np.einsum('...i,...i,i->...', A, B, C))
+
+
+def test_more_axes_than_letters():
+    """Expressions with more than 52 unique axes are contracted pairwise."""
+    num_sites = 30
+    subscripts = (', '.join(f'T{k}[bond{k}, phys{k}, bond{k + 1}]' for k in range(num_sites)) +
+                  f' -> out[bond0, bond{num_sites}]')
+    sites = [np.random.rand(2, 2, 2) for _ in range(num_sites)]
+
+    with pytest.raises(named_einsum.exceptions.TooManyAxesError):
+        named_einsum.translate(subscripts)
+    assert named_einsum.prepare(subscripts).compiled is None
+
+    expected = sites[0].sum(axis=1)
+    for site in sites[1:]:
+        expected = expected @ site.sum(axis=1)
+    assert np.allclose(named_einsum.einsum(subscripts, *sites), expected)
+    assert np.allclose(named_einsum.einsum(subscripts, *sites, optimize='optimal'), expected)
+    assert named_einsum.estimate(subscripts, *sites).path is not None
@@ -0,0 +1,91 @@
+"""Tests of the persistent on-disk cache."""
+import os
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+import named_einsum
+import named_einsum.persistent
+
+EXPRESSION = 'A[i, j], B[j, k], C[k, l] -> D[i, l]'
+
+WORKER = '''
+import sys
+import numpy as np
+import named_einsum
+import named_einsum.persistent
+arrays = [np.ones((2, 3)), np.ones((3, 4)), np.ones((4, 5))]
+named_einsum.einsum(sys.argv[1], *arrays, optimize='optimal')
+cache = named_einsum.persistent.get_cache()
+print(cache.hits, cache.misses, 'named_einsum.lark_parser' in sys.modules)
+'''
+
+
+class _Unloadable:
+    """Pickles to a call that raises a TypeError when it is unpickled."""
+
+    def __reduce__(self):
+        return int, ('1', 2, 3)
+
+
+def _start_worker(directory):
+    environment = dict(os.environ, NAMED_EINSUM_CACHE_DIR=str(directory))
+    return subprocess.Popen([sys.executable, '-c', WORKER, EXPRESSION], env=environment,
+                            stdout=subprocess.PIPE, text=True)
+
+
+def _result(worker):
+    output = worker.communicate()[0].split()
+    assert worker.returncode == 0
+    return int(output[0]), int(output[1]), output[2] == 'True'
+
+
+def test_persistent_cache(tmp_path):
+    """Entries are versioned, round-trip through disk, and survive concurrent writers."""
+    cache = named_einsum.persistent.PersistentCache(tmp_path)
+    assert cache.directory.startswith(str(tmp_path))
+    assert cache.get('paths', ('key', 1)) is None
+    cache.put('paths', ('key', 1), [(0, 1)])
+    assert cache.get('paths', ('key', 1)) == [(0, 1)]
+    assert not [name for _, _, files in os.walk(tmp_path) for name in files
+                if name.endswith('.tmp')]
+    cache.clear()
+    assert cache.get('paths', ('key', 1)) is None
+
+    # Entries that fail validation, i.e. from older versions of unhashed modules, are misses
+    cache.put('translate', 'A[i] -> B[i]', 'A->A')
+    misses = cache.misses
+    assert cache.get('translate', 'A[i] -> B[i]', named_einsum._is_valid_translation) is None
+    assert cache.misses == misses + 1
+    cache.clear()
+
+    # Entries that cannot be unpickled, i.e. of moved or changed classes, are misses
+    for data in (b'cno_such_module\nPath\n.', pickle.dumps(_Unloadable())):
+        os.makedirs(os.path.dirname(cache._path('paths', 'stale')), exist_ok=True)
+        with open(cache._path('paths', 'stale'), 'wb') as f:
+            f.write(data)
+        assert cache.get('paths', 'stale') is None
+    cache.clear()
+
+    # Cold processes parse and search while writing the same entries at once, and later ones
+    # load both from disk
+    for hits, misses, parsed in [_result(worker) for worker in
+                                 [_start_worker(tmp_path) for _ in range(3)]]:
+        assert hits + misses == 2 and (parsed or hits == 2)
+    assert _result(_start_worker(tmp_path)) == (2, 0, False)
+
+
+def test_enable_persistent_cache(tmp_path):
+    """Translations are loaded from an enabled cache after the memory caches are cleared."""
+    try:
+        cache = named_einsum.enable_persistent_cache(tmp_path)
+        named_einsum.cache_clear()
+        out = named_einsum.einsum(EXPRESSION, np.ones((2, 3)), np.ones((3, 4)), np.ones((4, 5)),
+                                  optimize=True)
+        named_einsum.cache_clear()
+        assert named_einsum.translate(EXPRESSION) == 'AB,BC,CD->AD'
+        assert cache.hits == 1
+        assert np.allclose(out, 12)
+    finally:
+        named_einsum.disable_persistent_cache()
@@ -0,0 +1,50 @@
+"""Tests of process-pool execution over shared memory."""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pytest
+import torch
+import named_einsum
+import named_einsum.exceptions
+
+
+def test_processes_output_axis(mass, mass_operands):
+    """Slices along an output axis are written into the shared output."""
+    operands = mass_operands(53)
+    expected = named_einsum.einsum(mass, *operands)
+    out = named_einsum.einsum(mass, *operands, workers=2, executor='processes')
+    assert out.shape == (53, 16)
+    assert np.allclose(out, expected)
+
+    out = named_einsum.einsum(mass, *operands, workers=2, executor='processes', optimize=True)
+    assert np.allclose(out, expected)
+
+
+def test_processes_contracted_axis():
+    """Slices along a contracted axis are written to separate partial outputs."""
+    A, x = np.random.rand(10, 400), np.random.rand(400)
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('forkserver')) as executor:
+        out = named_einsum.einsum('A[i, j], x[j] -> y[i]', A, x, executor=executor,
+                                  slice_over='j', num_slices=3)
+    assert np.allclose(out, A @ x)
+
+
+def test_processes_object_arrays():
+    """Object arrays are pickled instead of shared."""
+    A = np.arange(12).reshape(3, 4).astype(object)
+    x = np.arange(4).astype(object)
+    out = named_einsum.einsum('A[i, j], x[j] -> y[i]', A, x, workers=2, executor='processes')
+    assert out.dtype == object and list(out) == list(A.dot(x))
+
+    out = named_einsum.einsum('A[i, j], x[j] -> y[i]', A, x, workers=2, executor='processes',
+                              slice_over='j')
+    assert list(out) == list(A.dot(x))
+
+
+def test_processes_errors():
+    """Process execution is restricted to numpy, and unknown executors are rejected."""
+    A, x = torch.ones((4, 4)), torch.ones(4)
+    with pytest.raises(named_einsum.exceptions.SlicingError):
+        named_einsum.einsum('A[i, j], x[j] -> y[i]', A, x, workers=2, executor='processes')
+    with pytest.raises(named_einsum.exceptions.SlicingError):
+        named_einsum.einsum('A[i, j], x[j] -> y[i]', A, x, executor='fibers')
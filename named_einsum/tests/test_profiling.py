@@ -0,0 +1,45 @@
+"""Tests of profiling hooks."""
+import json
+
+import numpy as np
+import named_einsum
+import named_einsum.profiling
+
+
+def test_profile_records_phases(tmp_path):
+    """Each call records its phases, details and cache statistics."""
+    A, B = np.random.rand(4, 5), np.random.rand(5, 6)
+    named_einsum.cache_clear()
+    with named_einsum.profile() as profiler:
+        named_einsum.einsum('A[i, k], B[k, j] -> C[i * j]', A, B)
+        named_einsum.einsum('A[i, k], B[k, j] -> C[i * j]', A, B)
+        named_einsum.prepare('A[i, k] -> C[i]')(A)
+    assert not named_einsum.profiling.ENABLED
+
+    first, second, third = profiler.records
+    assert set(first.phases) == set(named_einsum.profiling.PHASES)
+    assert 'prepare' not in third.phases
+    assert first.total >= sum(first.phases.values()) * 0.99
+    assert first.backend == 'numpy'
+    assert first.shapes == [(4, 5), (5, 6)]
+    assert first.output_bytes == 4 * 6 * 8
+    assert first.cache['prepare'] == (0, 1) and second.cache['prepare'] == (1, 0)
+
+    stats = profiler.export(tmp_path / 'stats.json', records=True)
+    assert stats['stats']['AB,BC->AC']['calls'] == 2
+    assert stats['stats']['all']['calls'] == 3
+    assert json.loads((tmp_path / 'stats.json').read_text())['records'][0]['backend'] == 'numpy'
+
+
+def test_callback():
+    """Callbacks receive a record of every call until removed."""
+    records = []
+    named_einsum.profiling.add_callback(records.append)
+    try:
+        named_einsum.einsum('A[i] ->', np.ones(3), optimize=True, num_slices=3)
+    finally:
+        named_einsum.profiling.remove_callback(records.append)
+    named_einsum.einsum('A[i] ->', np.ones(3))
+
+    assert len(records) == 1
+    assert records[0].slices == ('i', 1)
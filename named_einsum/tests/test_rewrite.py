@@ -0,0 +1,106 @@
+"""Tests of the rewrite pass applied before contracting."""
+import numpy as np
+import torch
+import named_einsum
+
+
+def _rewrite(subscripts, *shapes):
+    return named_einsum.prepare(subscripts).plan(shapes).rewrite
+
+
+def test_pre_reduce():
+    """Axes that only one input has are summed out of it first, if that saves enough work."""
+    subscripts = 'A[i, j], B[j, k] -> C[i]'
+    rewrite = _rewrite(subscripts, (40, 50), (50, 60))
+    assert rewrite.reductions == [None, 'AB->A']
+    assert rewrite.plan.input_axes == [['i', 'j'], ['j']]
+    assert 'k' not in rewrite.plan.axis_sizes
+
+    A, B = np.random.rand(40, 50), np.random.rand(50, 60)
+    expected = np.einsum('ij,jk->i', A, B)
+    assert np.allclose(named_einsum.einsum(subscripts, A, B), expected)
+    assert np.allclose(named_einsum.einsum(subscripts, A, B, rewrite=False), expected)
+
+    # Too little work saved for the extra einsum call
+    assert _rewrite(subscripts, (2, 3), (3, 4)) is None
+
+
+def test_squeeze_and_scalars():
+    """Size-1 axes are squeezed and scalar inputs are folded into the smallest operand."""
+    subscripts = 'alpha, A[i, j, u], x[j, u] -> y[i, u]'
+    rewrite = _rewrite(subscripts, (), (3, 4, 1), (4, 1))
+    assert rewrite.reductions == [None, None, None]
+    assert rewrite.scalars == [0] and rewrite.order == [1, 2] and rewrite.scale == 1
+
+    squeezed = _rewrite('A[i, j, u], x[j, u] -> y[i]', (3, 4, 1), (4, 1))
+    assert squeezed.reductions == [(3, 4), (4,)]
+
+    alpha, A, x = np.float64(2.0), np.random.rand(3, 4, 1), np.random.rand(4, 1)
+    assert np.allclose(named_einsum.einsum(subscripts, alpha, A, x),
+                       np.einsum(',iju,ju->iu', alpha, A, x))
+    assert np.allclose(named_einsum.einsum('alpha, beta -> gamma', alpha, np.float64(3.0)), 6.0)
+
+
+def test_reorder():
+    """Inputs are reordered by the greedy path, which matters for left-to-right backends."""
+    subscripts = 'A[i, j], C[k, l], B[j, k] -> D[i, l]'
+    rewrite = _rewrite(subscripts, (10, 20), (30, 5), (20, 30))
+    assert rewrite.reductions == [None] * 3
+    # B and C shrink the most when contracted, so they come first
+    assert rewrite.order == [1, 2, 0]
+
+    arrays = [torch.rand(10, 20), torch.rand(30, 5), torch.rand(20, 30)]
+    expected = torch.einsum('ij,kl,jk->il', *arrays)
+    assert torch.allclose(named_einsum.einsum(subscripts, *arrays), expected)
+    assert torch.allclose(named_einsum.einsum(subscripts, *arrays, optimize=True), expected)
+
+
+def test_rewrite_with_options():
+    """Rewritten contractions work with paths, slicing and outputs, or are skipped for them."""
+    subscripts = 'A[i, j, m], B[j, k], C[k, l] -> D[i * l]'
+    arrays = [np.random.rand(10, 20, 30), np.random.rand(20, 30), np.random.rand(30, 5)]
+    expected = np.einsum('ijm,jk,kl->il', *arrays).reshape(50)
+    assert _rewrite(subscripts, *(array.shape for array in arrays)) is not None
+
+    assert np.allclose(named_einsum.einsum(subscripts, *arrays, optimize=True), expected)
+    assert np.allclose(named_einsum.einsum(subscripts, *arrays, optimize=[(1, 2), (0, 1)]),
+                       expected)
+    assert np.allclose(named_einsum.einsum(subscripts, *arrays, num_slices=3), expected)
+    assert np.allclose(named_einsum.einsum(subscripts, *arrays, slice_over='m', num_slices=3),
+                       expected)
+    out = np.empty(50)
+    assert named_einsum.einsum(subscripts, *arrays, out=out) is out
+    assert np.allclose(out, expected)
+
+
+def test_rewritten_paths_cached_by_operands(tmp_path, monkeypatch):
+    """Paths of rewritten plans are cached by the operands left, whatever the rewrite did."""
+    subscripts = 'A[i, j], B[k], C[j, l], D[l, m] -> [i, m]'
+    arrays = [np.random.rand(*shape) for shape in [(3, 4), (5,), (4, 6), (6, 7)]]
+    expected = np.einsum('ij,k,jl,lm->im', *arrays)
+    try:
+        named_einsum.enable_persistent_cache(tmp_path)
+        for min_saved_flops in (10 ** 12, 0):
+            named_einsum.cache_clear()
+            monkeypatch.setattr(named_einsum.rewrite, 'MIN_SAVED_FLOPS', min_saved_flops)
+            assert np.allclose(named_einsum.einsum(subscripts, *arrays, optimize='greedy'),
+                               expected)
+    finally:
+        named_einsum.disable_persistent_cache()
+
+
+def test_invalid_persistent_paths_missed(tmp_path):
+    """Stored paths that do not fit the operands are treated as misses."""
+    expression = named_einsum.prepare('A[i, j], B[j, k], C[k, l] -> D[i, l]')
+    plan = expression.plan([(2, 3), (3, 4), (4, 5)])
+    try:
+        cache = named_einsum.enable_persistent_cache(tmp_path)
+        key = (expression.key, 'greedy', named_einsum.expression.path_signature(plan))
+        cache.put('paths', key, [(0, 5), (0, 1)])
+        named_einsum.cache_clear()
+        assert expression.contraction_path(plan, 'greedy') == named_einsum.paths.find_path(
+            plan.input_axes, plan.output_axes, plan.axis_sizes, 'greedy'
+        )
+        assert cache.misses == 1
+    finally:
+        named_einsum.disable_persistent_cache()
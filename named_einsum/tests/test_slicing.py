@@ -0,0 +1,79 @@
+"""Tests of memory-bounded sliced execution."""
+import numpy as np
+import jax.numpy as jnp
+import torch
+import pytest
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.expression
+import named_einsum.slicing
+
+
+def test_slice_output_axis(mass, mass_operands):
+    """Slicing along an output axis gives the same result as the full contraction."""
+    operands = mass_operands()
+    expected = named_einsum.einsum(mass, *operands)
+
+    out = named_einsum.einsum(mass, *operands, slice_over='element', num_slices=7)
+    assert out.shape == (50, 16)
+    assert np.allclose(out, expected)
+
+
+def test_slice_contracted_axis(mass, mass_operands):
+    """Slicing along a contracted axis accumulates the slices."""
+    operands = mass_operands()
+    expected = named_einsum.einsum(mass, *operands)
+
+    out = named_einsum.einsum(mass, *operands, slice_over='quad', num_slices=4, optimize=True)
+    assert np.allclose(out, expected)
+
+
+def test_memory_limit():
+    """The memory limit picks an axis and a slice count that fits the budget."""
+    A, B, c = np.random.rand(1000, 6), np.random.rand(6, 50), np.random.rand(50)
+    expr = named_einsum.prepare('A[e, k], B[k, j], c[j] -> [e]')
+    path = [(0, 1), (0, 1)]
+    expected = expr(A, B, c)
+
+    # The (e, j) intermediate dominates the 1000 element output
+    plan = expr.plan([A.shape, B.shape, c.shape])
+    limit = (1000 + 100 * 50) * 8
+    options = named_einsum.expression.call_options
+    assert named_einsum.slicing.choose_slices(
+        plan, 8, path, options({'memory_limit': 50000 * 8})
+    ) is None
+    assert named_einsum.slicing.choose_slices(
+        plan, 8, path, options({'memory_limit': limit})
+    ) == ('e', 100)
+    assert np.allclose(expr(A, B, c, optimize=path, memory_limit=limit), expected)
+    assert np.allclose(expr(A, B, c, optimize=path, memory_limit=limit, slice_over='j'),
+                       expected)
+
+    with pytest.raises(named_einsum.exceptions.MemoryLimitError):
+        expr(A, B, c, optimize=path, memory_limit=1000 * 8)
+    with pytest.raises(named_einsum.exceptions.UnknownAxisError):
+        expr(A, B, c, slice_over='element', num_slices=2)
+
+
+def test_size_one_axes():
+    """Contractions with only size-1 axes to slice along run unsliced if they fit the budget."""
+    A = np.random.rand(1, 1)
+    assert np.allclose(named_einsum.einsum('A[e, i] -> C[e, i]', A, workers=2,
+                                           memory_limit=10 ** 9), A)
+    B = np.random.rand(1, 4)
+    assert np.allclose(named_einsum.einsum('A[e, i], B[e, j] -> C[i, j]', A, B, slice_over='e',
+                                           num_slices=3, memory_limit=10 ** 6), A.T @ B)
+    with pytest.raises(named_einsum.exceptions.MemoryLimitError):
+        named_einsum.einsum('A[e, i] -> C[e, i]', A, slice_over='e', num_slices=3,
+                            memory_limit=4)
+
+
+@pytest.mark.parametrize('backend', [jnp.asarray, torch.from_numpy])
+def test_slice_backends(backend, mass, mass_operands):
+    """Slices are assembled for both mutable and immutable backend arrays."""
+    operands = mass_operands()
+    expected = named_einsum.einsum(mass, *operands)
+
+    out = named_einsum.einsum(mass, *[backend(o) for o in operands],
+                              slice_over='element', num_slices=3)
+    assert np.allclose(np.asarray(out), expected)
@@ -0,0 +1,70 @@
+"""Tests of contractions with sparse operands."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.exceptions
+import named_einsum.sparsity
+
+sparse = pytest.importorskip('sparse')
+scipy_sparse = pytest.importorskip('scipy.sparse')
+
+
+def test_sparse_kept_sparse():
+    """Products of sparse operands stay sparse, and dense outputs are densified."""
+    A = scipy_sparse.random(50, 60, density=0.02, format='csr', random_state=0)
+    B = sparse.random((60, 70), density=0.02, random_state=1)
+    x = np.random.rand(70, 3)
+    dense_A, dense_B = A.toarray(), B.todense()
+
+    output = named_einsum.einsum('A[i, j], B[j, k] -> C[i, k]', A, B)
+    assert isinstance(output, sparse.COO)
+    assert np.allclose(output.todense(), dense_A @ dense_B)
+
+    for optimize in (False, True, [(0, 1), (0, 1)]):
+        output = named_einsum.einsum('A[i, j], B[j, k], x[k, m] -> y[i, m]', A, B, x,
+                                     optimize=optimize)
+        assert isinstance(output, np.ndarray)
+        assert np.allclose(output, dense_A @ dense_B @ x)
+
+
+def test_sparse_products_and_ellipses():
+    """Product axes and ellipses are expanded on sparse operands as on dense ones."""
+    A = sparse.random((4, 6, 5), density=0.3, random_state=2)
+    B = np.random.rand(5, 7)
+    output = named_einsum.einsum('A[..., l], B[l, k] -> C[..., k]', A, B)
+    assert np.allclose(output.todense() if isinstance(output, sparse.COO) else output,
+                       np.einsum('abl,lk->abk', A.todense(), B))
+
+    output = named_einsum.einsum('A[i, j, l], B[l, k] -> C[i * j, k]', A, B)
+    assert output.shape == (24, 7)
+    assert np.allclose(output, np.einsum('ijl,lk->ijk', A.todense(), B).reshape(24, 7))
+
+
+def test_sparse_greedy_path():
+    """Sparse operands are contracted with each other before dense ones join in."""
+    axis_sizes = {'i': 1000, 'j': 1000, 'k': 1000, 'm': 1000}
+    input_axes = [('i', 'j'), ('j', 'k'), ('k', 'm')]
+    assert named_einsum.sparsity.sparse_greedy_path(
+        input_axes, ('i', 'm'), axis_sizes, [1.0, 1e-4, 1e-4]
+    ) == [(1, 2), (0, 1)]
+
+
+def test_sparse_unsupported_options():
+    """Options that sparse contractions do not support are reported."""
+    A = sparse.random((5, 5), density=0.2)
+    with pytest.raises(named_einsum.exceptions.SparseOperandError, match='memory_limit'):
+        named_einsum.einsum('A[i, j], B[j, k] -> C[i, k]', A, A, memory_limit=100)
+
+
+def test_sparse_scalars_and_fill_values():
+    """Full reductions give dense scalars, and arrays with a nonzero fill value count as dense."""
+    A = scipy_sparse.random(20, 30, density=0.05, format='csr', random_state=3)
+    for subscripts in ('A[i, k] ->', 'A[i, k], B[i, k] ->'):
+        output = named_einsum.einsum(subscripts, *[A] * subscripts.count('['))
+        assert not isinstance(output, sparse.SparseArray)
+        assert np.allclose(output, (A.toarray() ** subscripts.count('[')).sum())
+
+    filled = sparse.COO.from_numpy(np.ones((4, 4)), fill_value=1.0)
+    assert named_einsum.sparsity.density(filled) == 1.0
+    output = named_einsum.einsum('A[i, j], B[j, k] -> C[i, k]', filled, filled)
+    assert isinstance(output, np.ndarray) and np.allclose(output, 4)
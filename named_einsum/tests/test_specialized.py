@@ -0,0 +1,60 @@
+"""Tests of expressions specialised to fixed shapes."""
+import jax
+import jax.numpy as jnp
+import numpy as np
+import torch
+import named_einsum
+
+KHATRI_RAO = 'A[i, l], B[j, l] -> KRP[i * j, l]'
+
+
+def _khatri_rao(A, B):
+    return np.einsum('il,jl->ijl', A, B).reshape(-1, A.shape[1])
+
+
+def test_jit_backends():
+    """Specialised functions give the same output as einsum on every backend."""
+    A, B = np.random.rand(3, 4), np.random.rand(5, 4)
+    expression = named_einsum.jit(KHATRI_RAO)
+    for convert in (np.asarray, jnp.asarray, torch.from_numpy):
+        output = expression(convert(A), convert(B))
+        assert np.allclose(np.asarray(output), _khatri_rao(A, B))
+    assert len(expression.functions) == 3
+
+
+def test_jit_traces_once():
+    """The specialised function is built once per shape signature, also inside jax.jit."""
+    traces = []
+    expression = named_einsum.jit('A[i, j], B[j, k], x[k, m] -> y[i]', optimize=True)
+    original = expression.specialize
+
+    def _specialize(shapes, backend):
+        traces.append(shapes)
+        return original(shapes, backend)
+    expression.specialize = _specialize
+
+    @jax.jit
+    def _scaled(A, B, x):
+        return 2 * expression(A, B, x)
+
+    A, B, x = (jnp.asarray(np.random.rand(*shape)) for shape in [(3, 4), (4, 5), (5, 6)])
+    expected = 2 * np.einsum('ij,jk,km->i', A, B, x)
+    for _ in range(3):
+        assert np.allclose(_scaled(A, B, x), expected)
+        assert np.allclose(2 * expression(A, B, x), expected)
+    assert len(traces) == 1
+
+
+def test_jit_ellipsis_and_many_axes():
+    """Ellipses and expressions with more axes than einsum letters are specialised as well."""
+    A = torch.rand(2, 3, 4)
+    expression = named_einsum.jit('A[..., i], B[i, j] -> C[..., j]')
+    B = torch.rand(4, 5)
+    assert torch.allclose(expression(A, B), A @ B)
+
+    num_sites = 30
+    subscripts = (', '.join(f'T{k}[bond{k}, phys{k}, bond{k + 1}]' for k in range(num_sites)) +
+                  f' -> out[bond0, bond{num_sites}]')
+    sites = [np.random.rand(2, 2, 2) for _ in range(num_sites)]
+    assert np.allclose(named_einsum.jit(subscripts)(*sites),
+                       named_einsum.einsum(subscripts, *sites))
@@ -0,0 +1,54 @@
+"""Tests of streaming evaluation over operand chunks."""
+import numpy as np
+import pytest
+import named_einsum
+import named_einsum.exceptions
+
+
+def _chunks(array, size):
+    for start in range(0, array.shape[0], size):
+        yield array[start:start + size]
+
+
+def test_stream_output_axis(mass, mass_operands):
+    """Chunks along an output axis yield output chunks."""
+    phi_i, phi_j, weight, jacobian_det = mass_operands(20)
+    expected = named_einsum.einsum(mass, phi_i, phi_j, weight, jacobian_det)
+
+    out = named_einsum.stream(mass, _chunks(jacobian_det, 6), axis='element',
+                              constants={'phi_i': phi_i, 'phi_j': phi_j, 'weight': weight})
+    out = list(out)
+    assert [chunk.shape[0] for chunk in out] == [6, 6, 6, 2]
+    assert np.allclose(np.concatenate(out), expected)
+
+
+def test_stream_contracted_axis():
+    """Chunks along a contracted axis are summed."""
+    A, x = np.random.rand(4, 30), np.random.rand(30)
+    chunks = ({'A': A[:, i:i + 7], 'x': x[i:i + 7]} for i in range(0, 30, 7))
+    out = named_einsum.stream('A[i, j], x[j] -> y[i]', chunks, axis='j')
+    assert np.allclose(out, A @ x)
+
+    chunks = ((A[:, i:i + 7], x[i:i + 7]) for i in range(0, 30, 7))
+    out = named_einsum.stream('A[i, j], x[j] -> y[i]', chunks, axis='j', optimize=True)
+    assert np.allclose(out, A @ x)
+
+
+def test_stream_errors():
+    """Streaming along unknown axes or with unknown constants raises."""
+    x = np.random.rand(3)
+    with pytest.raises(named_einsum.exceptions.UnknownAxisError):
+        named_einsum.stream('A[i, j], x[j] -> y[i]', [], axis='k', constants={'x': x})
+    with pytest.raises(named_einsum.exceptions.UnknownVariableError):
+        named_einsum.stream('A[i, j], x[j] -> y[i]', [], axis='i', constants={'z': x})
+    with pytest.raises(named_einsum.exceptions.SlicingError):
+        named_einsum.stream('A[i, j], x[j] -> y[i]', [], axis='j', constants={'x': x})
+
+
+def test_stream_constant_names():
+    """Constants named like the parameters of stream are passed through."""
+    A, optimize = np.random.rand(30, 4), np.random.rand(4)
+    chunks = (A[i:i + 7] for i in range(0, 30, 7))
+    out = named_einsum.stream('axis[i, j], optimize[j] -> y[i]', chunks, axis='i',
+                              constants={'optimize': optimize}, optimize=True)
+    assert np.allclose(np.concatenate(list(out)), A @ optimize)